@@ -26,6 +26,8 @@ from .models import (
     ProvinceState,
     Client,
     UserInboxMessageType,
+    ExportJob,
+    RDSDocumentLoad,
 )
 
 # Entity Data Models
@@ -37,3 +39,5 @@ admin.site.register(Country)
 admin.site.register(ProvinceState)
 admin.site.register(Client)
 admin.site.register(UserInboxMessageType)
+admin.site.register(ExportJob)
+admin.site.register(RDSDocumentLoad)
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class UoseConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "uose"
+
+    def ready(self):
+        from django.core import checks
+
+        from .uose_execution import check_shared_cache
+
+        checks.register(check_shared_cache)
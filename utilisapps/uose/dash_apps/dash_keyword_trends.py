@@ -0,0 +1,135 @@
+"""
+UOSE Keyword Trends Dashboard:
+This script contains the keyword trend chart of the UOSE application in the
+UtilisWeb project, a DjangoDash app charting uose_trends.keyword_trend. The
+entity options and the first term are set by the keyword_trends view through
+the initial arguments of the app.
+
+Version History:
+- 1.0.0 (2026-10-18): Initial version of the keyword trend chart.
+
+Change Log:
+- 2026-10-18: Created the dash_keyword_trends.py file.
+"""
+
+import plotly.graph_objects as go
+from dash import dcc, html, Input, Output, State
+from django_plotly_dash import DjangoDash
+
+from ..uose_execution import SearchBusy, SearchTimeout
+from ..uose_trends import keyword_trend
+
+app = DjangoDash("UOSEKeywordTrends")
+app.css.append_css({"external_url": "/static/dist/semantic.min.css"})
+
+app.layout = html.Div(
+    [
+        html.Div(
+            [
+                dcc.Input(
+                    id="trend_term",
+                    type="text",
+                    placeholder="Keyword, e.g. deferral NEAR/5 account",
+                    debounce=True,
+                    style={"width": "100%"},
+                ),
+                dcc.Dropdown(
+                    id="trend_entity",
+                    options=[{"label": "All Entities", "value": "*"}],
+                    value="*",
+                    clearable=False,
+                ),
+                dcc.DatePickerRange(id="trend_dates"),
+                dcc.Dropdown(
+                    id="trend_bucket",
+                    options=[
+                        {"label": "Per Month", "value": "month"},
+                        {"label": "Per Quarter", "value": "quarter"},
+                        {"label": "Per Year", "value": "year"},
+                    ],
+                    value="month",
+                    clearable=False,
+                ),
+                dcc.Dropdown(
+                    id="trend_group",
+                    options=[
+                        {"label": "All Filings", "value": "all"},
+                        {"label": "By Entity", "value": "entity"},
+                        {"label": "By Docket", "value": "docket"},
+                    ],
+                    value="all",
+                    clearable=False,
+                ),
+                dcc.RadioItems(
+                    id="trend_measure",
+                    options=[
+                        {"label": "Matching Pages", "value": "pages"},
+                        {"label": "Matching Documents", "value": "documents"},
+                    ],
+                    value="pages",
+                    inline=True,
+                ),
+                html.Button("Chart", id="trend_button", className="ui primary button"),
+            ],
+            className="ui form segment",
+        ),
+        html.Div(id="trend_message", className="ui header"),
+        dcc.Graph(id="trend_graph"),
+    ]
+)
+
+
+def _figure(trend: dict, measure: str) -> go.Figure:
+    figure = go.Figure(
+        [
+            go.Scatter(
+                x=trend["periods"],
+                y=series[measure],
+                name=series["name"],
+                mode="lines+markers",
+            )
+            for series in trend["series"]
+        ]
+    )
+    figure.update_layout(
+        xaxis_title="Issued Date",
+        yaxis_title="Matching Pages" if measure == "pages" else "Matching Documents",
+        legend_title=trend["group_by"].title(),
+        hovermode="x unified",
+    )
+    return figure
+
+
+@app.callback(
+    Output(component_id="trend_graph", component_property="figure"),
+    Output(component_id="trend_message", component_property="children"),
+    Input(component_id="trend_button", component_property="n_clicks"),
+    Input(component_id="trend_term", component_property="value"),
+    Input(component_id="trend_measure", component_property="value"),
+    State(component_id="trend_entity", component_property="value"),
+    State(component_id="trend_dates", component_property="start_date"),
+    State(component_id="trend_dates", component_property="end_date"),
+    State(component_id="trend_bucket", component_property="value"),
+    State(component_id="trend_group", component_property="value"),
+)
+def chart_trend(n_clicks, term, measure, entity, date_from, date_to, bucket, group):
+    if not (term or "").strip():
+        return go.Figure(), "Enter a keyword to chart its trend."
+    try:
+        trend = keyword_trend(
+            term,
+            bucket=bucket,
+            group_by=group,
+            entity_code=entity,
+            date_from=date_from,
+            date_to=date_to,
+        )
+    except (ValueError, SearchBusy, SearchTimeout) as ex:
+        # QuerySyntaxError is a ValueError
+        return go.Figure(), str(ex)
+    if len(trend["periods"]) == 0:
+        return go.Figure(), f'No filings match "{trend["term"]}".'
+    return (
+        _figure(trend, measure),
+        f'"{trend["term"]}": {trend["total_pages"]} matching pages',
+    )
@@ -0,0 +1,82 @@
+import sys
+import time
+import statistics
+
+from django.core.management.base import BaseCommand
+
+from uose.models import EntityDocument
+from uose.uose_query import QuerySyntaxError
+from uose.uose_search_backends import SEARCH_BACKENDS, get_search_backend
+
+
+# keywords of the benchmark: phrases and expressions of every operator
+_DEFAULT_KEYWORDS = [
+    "rate base",
+    "deferral account",
+    "revenue requirement",
+    "capital AND expenditure",
+    "settlement OR interrogatory",
+    "distribution NOT transmission",
+    "rate NEAR/3 base",
+    '"load forecast"',
+]
+
+
+class Command(BaseCommand):
+    """Benchmarks the latency of the ranked hits of every search backend
+    over the same searches, and reports the number of pages each one
+    matches. The conformance of the backends is checked by the tests."""
+
+    help = "Benchmarks the search backends."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backends",
+            nargs="+",
+            default=list(SEARCH_BACKENDS),
+            choices=list(SEARCH_BACKENDS),
+        )
+        parser.add_argument(
+            "--keywords",
+            nargs="+",
+            default=_DEFAULT_KEYWORDS,
+            help="keywords searched, one search each",
+        )
+        parser.add_argument("--entity", default="*", help="entity searched")
+        parser.add_argument("--limit", type=int, default=25)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def _latency(self, backend, documents, keyword: str, limit: int, repeat: int):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            backend.ranked_hits(documents, [keyword], limit)
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings), max(timings)
+
+    def handle(self, **options):
+        documents = EntityDocument.objects.all()
+        if options["entity"] != "*":
+            documents = documents.filter(entity=options["entity"].upper())
+        backends = [get_search_backend(name) for name in options["backends"]]
+        limit = options["limit"]
+
+        for keyword in options["keywords"]:
+            sys.stdout.write(f"\n -- {keyword} -- ")
+            for backend in backends:
+                try:
+                    _, total = backend.ranked_hits(documents, [keyword], limit)
+                    median, worst = self._latency(
+                        backend, documents, keyword, limit, options["repeat"]
+                    )
+                except QuerySyntaxError as ex:
+                    sys.stdout.write(f"\n    {backend.name}: not supported, {ex}")
+                    continue
+
+                sys.stdout.write(
+                    f"\n    {backend.name}: {total} pages, {median * 1000:.1f} ms median, {worst * 1000:.1f} ms max"
+                )
+
+        sys.stdout.write(
+            f"\n\n -- Benchmarked {len(options['keywords'])} searches -- \n"
+        )
@@ -0,0 +1,166 @@
+import os
+import re
+import sys
+import time
+import pickle
+import random
+
+from django.core.management.base import BaseCommand
+
+from uose.models import RDSTextModel
+from uose.uose_text import normalize_page_text
+
+
+# the newline repair as originally written in rds_migration, kept as the
+# baseline of the benchmark
+_LEGACY_BYPASS_STR = [
+    "Appendix",
+    "appendix" "reference",
+    "Reference",
+    "Ref",
+    "ref" "Ref.",
+    "ref.",
+    "Exhibit",
+    "exhibit",
+    "Exhibits",
+    "exhibits",
+]
+
+
+def legacy_clean_page_text(p_text: str) -> str:
+    clean_text = p_text.replace("\x00", "")
+    newline_match = re.findall("(.+?)([\n\r]+)(.+?[\\.\\?\\!]+)", clean_text)
+
+    for newline in newline_match:
+        apply_modifer = True
+        for nbs in _LEGACY_BYPASS_STR:
+            if newline[0] == " ":
+                apply_modifer = False
+                break
+            if nbs in newline[0] or nbs in newline[2]:
+                apply_modifer = False
+                break
+        if apply_modifer:
+            clean_text = clean_text.replace(
+                newline[0] + newline[1] + newline[2],
+                newline[0] + newline[2],
+            )
+    return clean_text
+
+
+_FILLER_LINES = [
+    "The applicant has filed evidence in support of the proposed distribution",
+    "rates for the 2024 rate year as set out in Exhibit 1, Tab 2.",
+    "Ontario Energy Board staff submits that the capital expenditures are",
+    "reasonable and consistent with the distribution system plan.",
+    "Interrogatory responses are attached as Appendix B to this decision and",
+    "order. The Board notes the reference to the prior proceeding.",
+    "Total revenue requirement: $12,345,678",
+    " ",
+    "Is the proposed load forecast appropriate? The parties agree that it is.",
+]
+
+
+def synthetic_page(lines: int, seed: int) -> str:
+    """
+    Builds a page resembling extracted OEB decision text, with sentences
+    broken over lines, references and table rows.
+
+    Args:
+        lines (int): number of lines on the page
+        seed (int): random seed, so runs are repeatable
+
+    Returns:
+        str: page text
+    """
+    rnd = random.Random(seed)
+    return "\n".join(rnd.choice(_FILLER_LINES) for _ in range(lines))
+
+
+class Command(BaseCommand):
+    """Compares the legacy newline repair with uose_text.normalize_page_text
+    on a sample of OEB pages and on synthetic pages of growing length."""
+
+    help = "Benchmarks the page text normalization."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default=os.path.join(os.getcwd(), "uose", "management", "analytics_files"),
+            help="directory of raw .pickle files to sample pages from",
+        )
+        parser.add_argument(
+            "--sample", type=int, default=500, help="number of pages to sample"
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def _sample_pages(self, options: dict) -> tuple:
+        sample = options["sample"]
+        pages = []
+        if os.path.isdir(options["path"]):
+            for file in sorted(os.listdir(options["path"])):
+                if not file.endswith(".pickle"):
+                    continue
+                with open(os.path.join(options["path"], file), "rb") as t_file:
+                    for text in pickle.load(t_file).values():
+                        pages.extend(text.values())
+                if len(pages) >= sample:
+                    return pages[:sample], "pickle files"
+
+        if len(pages) == 0:
+            pages = list(
+                RDSTextModel.objects.order_by("?").values_list(
+                    "content__page_text", flat=True
+                )[:sample]
+            )
+            source = "stored pages"
+        else:
+            source = "pickle files"
+
+        if len(pages) == 0:
+            pages = [synthetic_page(60, seed) for seed in range(sample)]
+            source = "synthetic pages"
+        return pages, source
+
+    def _time(self, func, pages: list, repeat: int) -> float:
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for page in pages:
+                func(page)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def _report(self, label: str, pages: list, repeat: int):
+        legacy = self._time(legacy_clean_page_text, pages, repeat)
+        current = self._time(normalize_page_text, pages, repeat)
+        characters = sum(len(page) for page in pages)
+        sys.stdout.write(
+            f"\n -- {label}: {len(pages)} pages, {characters:,} characters -- "
+            f"\n    legacy:  {legacy:.3f}s ({len(pages) / max(legacy, 1e-9):,.0f} pages/s)"
+            f"\n    current: {current:.3f}s ({len(pages) / max(current, 1e-9):,.0f} pages/s)"
+            f"\n    speedup: {legacy / max(current, 1e-9):.1f}x \n"
+        )
+
+    def handle(self, **options):
+        repeat = options["repeat"]
+        pages, source = self._sample_pages(options)
+        self._report(f"Sample of {source}", pages, repeat)
+
+        # pages whose output changed: the repaired bypass list, and the legacy
+        # replace of every copy of a match, including copies that were bypassed
+        changed = sum(
+            1
+            for page in pages
+            if legacy_clean_page_text(page) != normalize_page_text(page)
+        )
+        sys.stdout.write(
+            f"\n -- {changed} of {len(pages)} pages normalize differently -- \n"
+        )
+
+        # the legacy repair grows quadratically with the page length
+        for lines in [50, 200, 800, 3200]:
+            self._report(
+                f"Synthetic {lines} line page", [synthetic_page(lines, lines)], repeat
+            )
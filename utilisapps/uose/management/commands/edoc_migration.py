@@ -7,6 +7,8 @@ import pandas as pd
 from django.core.management.base import BaseCommand
 
 from uose.models import Entity, EntityDocument
+from uose.uose_ingest import LINK_BATCH_SIZE, link_documents
+from uose.uose_lookups import refresh_lookups
 
 
 class Command(BaseCommand):
@@ -119,6 +121,14 @@ class Command(BaseCommand):
                 ]
                 print(f"\n Executing Bulk Create: {len(edocs)} records.")
                 EntityDocument.objects.bulk_create(edocs)
+                refresh_lookups()
+
+                # pages loaded before their document are linked to it
+                urls = sorted({str(edoc.file_url) for edoc in edocs})
+                linked = 0
+                for start in range(0, len(urls), LINK_BATCH_SIZE):
+                    linked += link_documents(urls[start : start + LINK_BATCH_SIZE])
+                print(f"\n Linked pages to the new documents: {linked} pages.")
 
             except Exception as ex:
                 print(f"Error Migrating Documents: ty=={traceback.format_exc()}")
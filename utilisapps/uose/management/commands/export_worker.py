@@ -0,0 +1,111 @@
+import sys
+import time
+import datetime
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+
+from uose.models import ExportJob
+from uose.uose_exports import (
+    EXPORT_MAX_ATTEMPTS,
+    EXPORT_STALE_SECONDS,
+    claim_jobs,
+    purge_expired_jobs,
+    requeue_stale_jobs,
+    run_export_job,
+)
+
+
+class Command(BaseCommand):
+    """Generates queued report exports in a pool of worker processes, so the
+    web workers stay free for interactive traffic. Every poll also requeues,
+    or fails after --max-attempts, the jobs left running by a worker that
+    died, once they have had no heartbeat for --stale-seconds."""
+
+    help = "Runs queued report exports."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=2)
+        parser.add_argument(
+            "--poll-interval", type=float, default=5.0, help="seconds between polls"
+        )
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            default=7,
+            help="days finished exports are kept before they are deleted",
+        )
+        parser.add_argument(
+            "--stale-seconds",
+            type=int,
+            default=EXPORT_STALE_SECONDS,
+            help="seconds without a heartbeat after which a job running in another worker is abandoned",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=EXPORT_MAX_ATTEMPTS,
+            help="times a job is claimed before an abandoned job fails",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="exit once the queue is empty instead of polling",
+        )
+
+    def handle(self, **options):
+        processes = options["processes"]
+        running = {}
+
+        sys.stdout.write(
+            f"\n -- Export Worker started with {processes} processes @ {datetime.datetime.now().strftime('%H:%M:%S')} -- \n"
+        )
+        purged = purge_expired_jobs(options["retention_days"])
+        if purged > 0:
+            sys.stdout.write(f"\n -- Purged {purged} expired exports -- \n")
+
+        # spawned children set up django and open their own connections
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as pool:
+            while True:
+                for future, job_id in list(running.items()):
+                    if future.done():
+                        del running[future]
+                        try:
+                            status = future.result()
+                        except Exception:
+                            status = f"crashed: {traceback.format_exc()}"
+                            ExportJob.objects.filter(id=job_id, status="RUNG").update(
+                                status="FAIL", error_text=status
+                            )
+                        sys.stdout.write(f"\n -- Export {job_id}: {status} -- \n")
+
+                requeued, failed = requeue_stale_jobs(
+                    running.values(), options["stale_seconds"], options["max_attempts"]
+                )
+                for job_id in requeued:
+                    sys.stdout.write(
+                        f"\n -- Export {job_id}: requeued, abandoned -- \n"
+                    )
+                for job_id in failed:
+                    sys.stdout.write(f"\n -- Export {job_id}: failed, abandoned -- \n")
+
+                free = processes - len(running)
+                job_ids = claim_jobs(free) if free > 0 else []
+                for job_id in job_ids:
+                    running[pool.submit(run_export_job, job_id)] = job_id
+                    sys.stdout.write(f"\n -- Export {job_id}: started -- \n")
+
+                if options["once"] and len(running) == 0 and len(job_ids) == 0:
+                    break
+                time.sleep(options["poll_interval"])
+
+        sys.stdout.write(
+            f"\n -- Export Worker stopped @ {datetime.datetime.now().strftime('%H:%M:%S')} -- \n"
+        )
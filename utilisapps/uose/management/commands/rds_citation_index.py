@@ -0,0 +1,85 @@
+import os
+import sys
+import datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from uose.models import DocketCitation, RDSTextModel
+from uose.uose_citations import (
+    citation_checkpoint,
+    extract_page_citations,
+    save_citations,
+)
+
+
+class Command(BaseCommand):
+    """Indexes the docket numbers cited in the RDS page text, in page id
+    batches whose text is scanned by parallel worker processes. Pages loaded
+    by rds_migration are indexed on load, so by default only the pages after
+    the last indexed page are scanned; run it with --start-id 0 once after
+    migrating, to index the pages loaded before."""
+
+    help = "Indexes the docket numbers cited in the RDS page text."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=20000)
+        parser.add_argument(
+            "--start-id",
+            type=int,
+            default=None,
+            help="scan from this page id, after the last indexed page by default",
+        )
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+
+    def handle(self, **options):
+        batch_size = options["batch_size"]
+        start_id = options["start_id"]
+        if start_id is None:
+            start_id = citation_checkpoint() + 1
+        max_id = (
+            RDSTextModel.objects.order_by("-id").values_list("id", flat=True).first()
+        )
+
+        if max_id is None or start_id > max_id:
+            sys.stdout.write("\n -- No new RDS pages to index -- \n")
+            return
+
+        sys.stdout.write(
+            f"\n -- Indexing citations of pages {start_id} to {max_id} with {options['workers']} workers @ {datetime.datetime.now().strftime('%H:%M:%S')} -- "
+        )
+        found = 0
+        # spawned children set up django; they never touch the database
+        with ProcessPoolExecutor(
+            max_workers=options["workers"],
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as pool:
+            for low in range(start_id, max_id + 1, batch_size):
+                rows = list(
+                    RDSTextModel.objects.filter(
+                        id__gte=low, id__lt=low + batch_size
+                    ).values_list("id", "document_id", "content__page_text")
+                )
+                chunk = max(1, -(-len(rows) // options["workers"]))
+                citations = [
+                    citation
+                    for chunk_citations in pool.map(
+                        extract_page_citations,
+                        [rows[i : i + chunk] for i in range(0, len(rows), chunk)],
+                    )
+                    for citation in chunk_citations
+                ]
+                with transaction.atomic():
+                    save_citations(citations)
+                found += len(citations)
+                sys.stdout.write(
+                    f"\n -- Indexed pages {low} to {low + batch_size - 1}: {found} citations @ {datetime.datetime.now().strftime('%H:%M:%S')} -- "
+                )
+
+        sys.stdout.write(
+            f"\n -- Completed the citation index: {DocketCitation.objects.count()} citations -- \n"
+        )
@@ -0,0 +1,45 @@
+import sys
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from uose.models import DocumentSearchIndex, EntityDocument
+from uose.uose_document_index import refresh_document_index
+from uose.uose_search_cache import bump_search_generation
+
+
+class Command(BaseCommand):
+    """Builds the document search index from the linked RDS pages, in
+    document id batches each in its own transaction. The ingestion commands
+    keep it up to date afterwards; run it once after migrating, or to
+    rebuild the index. Interrupted runs resume with --start-id."""
+
+    help = "Builds the document search index from the RDS pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--start-id", type=int, default=0, help="resume from this document id"
+        )
+
+    def handle(self, **options):
+        batch_size = options["batch_size"]
+        document_ids = list(
+            EntityDocument.objects.filter(id__gte=options["start_id"])
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+
+        for start in range(0, len(document_ids), batch_size):
+            batch = document_ids[start : start + batch_size]
+            with transaction.atomic():
+                refresh_document_index(batch)
+            sys.stdout.write(
+                f"\n -- Indexed documents {batch[0]} to {batch[-1]} @ {datetime.datetime.now().strftime('%H:%M:%S')} -- "
+            )
+
+        bump_search_generation()
+        sys.stdout.write(
+            f"\n -- Completed the document index: {DocumentSearchIndex.objects.count()} documents -- \n"
+        )
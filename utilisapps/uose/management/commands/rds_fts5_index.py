@@ -0,0 +1,85 @@
+import sys
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from uose.models import RDSTextModel
+from uose.uose_search_backends import SQLiteFTS5SearchBackend
+
+
+class Command(BaseCommand):
+    """Builds the SQLite FTS5 sidecar index of the sqlite_fts5 search backend
+    from the RDS pages, in page id batches. Each batch removes the pages
+    deleted or reloaded since the last run, and indexes the new pages and
+    the pages whose document link or title changed, so running it after
+    each ingestion keeps the index up to date; --rebuild indexes every page
+    again."""
+
+    help = "Builds the SQLite FTS5 search index of the RDS pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--path", default=None, help="index file to build")
+        parser.add_argument(
+            "--rebuild", action="store_true", help="index every page again"
+        )
+
+    def handle(self, **options):
+        batch_size = options["batch_size"]
+        backend = SQLiteFTS5SearchBackend(options["path"])
+        if options["rebuild"]:
+            backend.drop_index()
+        backend.create_index()
+
+        max_id = max(
+            RDSTextModel.objects.order_by("-id").values_list("id", flat=True).first()
+            or 0,
+            backend.last_page_id(),
+        )
+        sys.stdout.write(
+            f"\n -- Indexing pages up to {max_id} in {backend.path} @ {datetime.datetime.now().strftime('%H:%M:%S')} -- "
+        )
+
+        indexed = removed = 0
+        for low in range(0, max_id + 1, batch_size):
+            high = low + batch_size
+            pages = RDSTextModel.objects.filter(id__gte=low, id__lt=high)
+            current = {
+                page_id: (doc_id, title)
+                for page_id, doc_id, title in pages.values_list(
+                    "id", "document_id", "document_title"
+                )
+            }
+            previous = backend.indexed_pages(low, high)
+            gone = [page_id for page_id in previous if page_id not in current]
+            changed = [
+                page_id
+                for page_id, page in current.items()
+                if previous.get(page_id) != page
+            ]
+            if len(gone) == 0 and len(changed) == 0:
+                continue
+
+            backend.index_pages(
+                list(
+                    pages.filter(id__in=changed).values_list(
+                        "id",
+                        "document_id",
+                        "document_title",
+                        "url",
+                        "page_number",
+                        "content__page_text",
+                    )
+                ),
+                gone,
+            )
+            indexed += len(changed)
+            removed += len(gone)
+            sys.stdout.write(
+                f"\n -- Indexed pages {low} to {high - 1}: {indexed} indexed, {removed} removed @ {datetime.datetime.now().strftime('%H:%M:%S')} -- "
+            )
+
+        backend.optimize()
+        sys.stdout.write(
+            f"\n -- Completed the FTS5 index: {indexed} pages indexed, {removed} removed -- \n"
+        )
@@ -0,0 +1,49 @@
+import sys
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from uose.models import EntityDocument, RDSTextModel
+from uose.uose_ingest import LINK_BATCH_SIZE, link_documents
+
+
+class Command(BaseCommand):
+    """Links the RDS pages to the oldest EntityDocument filed under their url,
+    in batches of urls with one transaction each. Only the pages whose link
+    changed are written, so the command can be run again at any time, e.g.
+    after documents were migrated or deleted."""
+
+    help = "Links RDS text pages to their EntityDocument by file url."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=LINK_BATCH_SIZE)
+
+    def handle(self, **options):
+        batch_size = options["batch_size"]
+        urls = (
+            EntityDocument.objects.filter(
+                file_url__in=RDSTextModel.objects.values("url")
+            )
+            .order_by("file_url")
+            .values_list("file_url", flat=True)
+            .distinct()
+        )
+
+        linked, batch, done = 0, [], 0
+        for url in urls.iterator():
+            batch.append(url)
+            if len(batch) == batch_size:
+                linked += link_documents(batch)
+                done += len(batch)
+                batch = []
+                sys.stdout.write(
+                    f"\n -- Linked {done} urls: {linked} pages @ {datetime.datetime.now().strftime('%H:%M:%S')} -- "
+                )
+        if len(batch) > 0:
+            linked += link_documents(batch)
+            done += len(batch)
+
+        unlinked = RDSTextModel.objects.filter(document__isnull=True).count()
+        sys.stdout.write(
+            f"\n -- Completed linking {done} urls: {linked} pages linked; {unlinked} pages have no matching document -- \n"
+        )
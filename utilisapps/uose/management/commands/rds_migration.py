@@ -1,145 +1,136 @@
 import os
 import sys
-import traceback
-import pickle
 import time
 import datetime
-import re
-
-import pathlib
-import pandas as pd
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
+import django
 from django.core.management.base import BaseCommand
 
-from uose.models import RDSTextModel
+from uose.uose_ingest import (
+    documents_by_url,
+    loaded_hashes,
+    prepare_pickle_file,
+    replace_documents,
+)
 
 
 class Command(BaseCommand):
+    """Loads the pickled RDS page text into RDSTextModel.
 
-    _SAVE_TO_DB = True
+    Pickle files are unpickled and cleaned in parallel worker processes. Only
+    urls whose content hash changed since their last load are written; their
+    pages are replaced in batches with COPY FROM STDIN (default) or
+    bulk_create, so reruns never duplicate pages."""
 
-    def __str__(self):
-        return f"EntityDocumentsMigration: {self._data.shape[0]} records\n{self._data.info()}"
+    help = "Loads new and changed RDS page text from the analytics pickle files."
 
-    def handle(self, **options):
-        """
-        Prints each row of the merged data.
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default=os.path.join(os.getcwd(), "uose", "management", "analytics_files"),
+            help="directory containing the .pickle files",
+        )
+        parser.add_argument(
+            "--loader",
+            choices=["copy", "bulk"],
+            default="copy",
+            help="write pages with COPY FROM STDIN or chunked bulk_create",
+        )
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="pages replaced per transaction; a document is never split",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="reload every document, e.g. after the text normalization changed",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="process the files without saving to the database",
+        )
 
-        This method iterates over each row of the merged data and prints the row.
+    def _save_documents(self, documents: list, linked: dict, options: dict):
+        batch = []
+        batch_pages = 0
+        for document in documents:
+            batch.append(document)
+            batch_pages += len(document[2])
+            if batch_pages >= options["batch_size"]:
+                replace_documents(batch, linked, options["loader"])
+                batch = []
+                batch_pages = 0
+        if len(batch) > 0:
+            replace_documents(batch, linked, options["loader"])
 
+    def handle(self, **options):
+        """
+        Loads the new and changed documents of every pickle file of the
+        analytics directory and reports the load throughput.
         """
-        cwd = os.getcwd()
-        analytics = os.path.join(cwd, "uose", "management", "analytics_files")
+        analytics = options["path"]
+        files = [
+            os.path.join(analytics, file)
+            for file in sorted(os.listdir(analytics))
+            if file.endswith(".pickle")  # check if file is a pickle file
+        ]
 
-        # create empty list of rds text objects
-        rds_obj = []
-        # loop through files
+        linked = documents_by_url()
+        known_hashes = {} if options["force"] else loaded_hashes()
 
         sys.stdout.write(
-            f"\n -- Processing RDS Text Files @ {datetime.datetime.now().strftime('%H:%M:%S')}-- \n"
+            f"\n -- Processing {len(files)} RDS Text Files with {options['workers']} workers, {len(known_hashes)} documents already loaded @ {datetime.datetime.now().strftime('%H:%M:%S')}-- \n"
         )
-        for file in os.listdir(analytics):
-            if file.endswith(".pickle"):  # check if file is a pickle file
-                with open(os.path.join(analytics, file), "rb") as t_file:
-                    rds_db = pickle.load(t_file)
 
+        started = time.monotonic()
+        total_pages = 0
+        total_loaded = 0
+        total_unchanged = 0
+        total_errors = 0
+        # spawned children set up django; they never touch the database
+        with ProcessPoolExecutor(
+            max_workers=options["workers"],
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as pool:
+            futures = {
+                pool.submit(prepare_pickle_file, path, known_hashes): path
+                for path in files
+            }
+            for future in as_completed(futures):
+                file = os.path.basename(futures[future])
+                try:
+                    documents, unchanged, errors = future.result()
+                    for url, error in errors:
+                        sys.stdout.write(f"\n -- Error handling {url}: {error} -- ")
+
+                    file_started = time.monotonic()
+                    if not options["dry_run"]:
+                        self._save_documents(documents, linked, options)
+                    elapsed = time.monotonic() - file_started
+                except Exception:
                     sys.stdout.write(
-                        f"\n -- Processing {file} @ @ {datetime.datetime.now().strftime('%H:%M:%S')}-- \n"
+                        f"\n -- Error loading {file}: {traceback.format_exc()} -- "
                     )
-
-                    for url, text in rds_db.items():
-                        sys.stdout.write(f"\n -- Processing {url} -- \n")
-                        try:
-                            for p_number, p_text in text.items():
-
-                                if "\x00" in p_text:
-                                    sys.stdout.write(
-                                        f"\n -- Found Null Byte in Page {p_number} -- \n"
-                                    )
-                                    p_text = p_text.replace("\x00", "")
-                                    time.sleep(1)
-
-                                if self._SAVE_TO_DB:
-
-                                    clean_text = p_text.replace("\00", "")
-                                    newline_match = re.findall(
-                                        "(.+?)([\n\r]+)(.+?[\.\?\!]+)", clean_text
-                                    )
-
-                                    # handling newline removal
-
-                                    newline_bypass_str = [
-                                        "Appendix",
-                                        "appendix" "reference",
-                                        "Reference",
-                                        "Ref",
-                                        "ref" "Ref.",
-                                        "ref.",
-                                        "Exhibit",
-                                        "exhibit",
-                                        "Exhibits",
-                                        "exhibits",
-                                    ]
-
-                                    for newline in newline_match:
-                                        apply_modifer = True
-                                        for nbs in newline_bypass_str:
-                                            """if newline[0] == " " and newline[2] == " ":
-                                            apply_modifer = False
-                                            break"""
-                                            if newline[0] == " ":
-                                                apply_modifer = False
-                                                break
-                                            if nbs in newline[0] or nbs in newline[2]:
-                                                apply_modifer = False
-                                                break
-                                        if apply_modifer:
-                                            clean_text = clean_text.replace(
-                                                newline[0] + newline[1] + newline[2],
-                                                newline[0] + newline[2],
-                                            )
-
-                                    rds_entry = RDSTextModel(
-                                        url=url,
-                                        page_number=p_number,
-                                        page_text=clean_text,
-                                    )
-
-                                    print("\n -- Start RDS Entry -- ")
-                                    print(f"\n -- URL: {rds_entry.url}")
-                                    print(f"\n -- Page Number: {rds_entry.page_number}")
-                                    print(
-                                        f"\n -- Page Text: {rds_entry.page_text[:100]}"
-                                    )
-                                    print("\n -- End RDS Entry -- ")
-
-                                    try:
-                                        rds_entry.save()
-                                    except Exception as ex:
-                                        sys.stdout.write(
-                                            f"\n -- Error Saving RDS Object: {traceback.format_exc()}  -- \n"
-                                        )
-                                        time.sleep(5)
-
-                                else:
-                                    sys.stdout.write(
-                                        f"\n -- URL: {url} -- Page: {p_number} -- Text: {p_text} -- \n"
-                                    )
-                        except Exception as ex:
-                            sys.stdout.write(
-                                f"\n -- Error handling url: {traceback.format_exc()} -- "
-                            )
-                            time.sleep(5)
-
-        # sys.stdout.write("\n -- Saving RDS Object -- \n")
-        # try:
-        #     if self._SAVE_TO_DB:
-        #         RDSTextModel.objects.bulk_create(rds_obj)
-        # except Exception as ex:
-        #     sys.stdout.write(
-        #         f"\n -- Error Saving RDS Object: {traceback.format_exc()}  -- \n"
-        #     )
-
+                    continue
+
+                pages = sum(len(document[2]) for document in documents)
+                total_pages += pages
+                total_loaded += len(documents)
+                total_unchanged += unchanged
+                total_errors += len(errors)
+                sys.stdout.write(
+                    f"\n -- {file}: {len(documents)} new or changed documents, {unchanged} unchanged, {pages} pages in {elapsed:.1f}s ({pages / max(elapsed, 1e-6):,.0f} pages/s) -- "
+                )
+
+        elapsed = time.monotonic() - started
         sys.stdout.write(
-            f"\n -- Completed Saving RDS Object @ {datetime.datetime.now().strftime('%H:%M:%S')}-- \n"
+            f"\n -- Completed {total_loaded} documents ({total_pages} pages) from {len(files)} files in {elapsed:.1f}s ({total_pages / max(elapsed, 1e-6):,.0f} pages/s), {total_unchanged} unchanged, {total_errors} urls with errors @ {datetime.datetime.now().strftime('%H:%M:%S')}-- \n"
         )
@@ -0,0 +1,93 @@
+import os
+import sys
+import datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from uose.models import DocumentSignature, PageSignature, RDSTextModel
+from uose.uose_duplicates import (
+    duplicate_text_bytes,
+    extract_page_signatures,
+    refresh_document_signatures,
+    save_page_signatures,
+    signature_checkpoint,
+)
+from uose.uose_search_cache import bump_search_generation
+
+
+class Command(BaseCommand):
+    """Signs the RDS pages with their MinHash signature, in page id batches
+    whose text is hashed by parallel worker processes, and finds the
+    near-duplicate pages and documents. Pages loaded by rds_migration are
+    signed on load, so by default only the pages after the last signed page
+    are scanned; run it with --start-id 0 once after migrating."""
+
+    help = "Finds the near-duplicate RDS pages and documents."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=20000)
+        parser.add_argument(
+            "--start-id",
+            type=int,
+            default=None,
+            help="scan from this page id, after the last signed page by default",
+        )
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+
+    def handle(self, **options):
+        batch_size = options["batch_size"]
+        start_id = options["start_id"]
+        if start_id is None:
+            start_id = signature_checkpoint() + 1
+        max_id = (
+            RDSTextModel.objects.order_by("-id").values_list("id", flat=True).first()
+        )
+
+        if max_id is None or start_id > max_id:
+            sys.stdout.write("\n -- No new RDS pages to sign -- \n")
+            return
+
+        sys.stdout.write(
+            f"\n -- Signing pages {start_id} to {max_id} with {options['workers']} workers @ {datetime.datetime.now().strftime('%H:%M:%S')} -- "
+        )
+        duplicates = 0
+        # spawned children set up django; they never touch the database
+        with ProcessPoolExecutor(
+            max_workers=options["workers"],
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as pool:
+            for low in range(start_id, max_id + 1, batch_size):
+                pages = RDSTextModel.objects.filter(
+                    id__gte=low, id__lt=low + batch_size
+                )
+                rows = list(pages.values_list("id", "content__page_text"))
+                chunk = max(1, -(-len(rows) // options["workers"]))
+                signatures = [
+                    signature
+                    for chunk_signatures in pool.map(
+                        extract_page_signatures,
+                        [rows[i : i + chunk] for i in range(0, len(rows), chunk)],
+                    )
+                    for signature in chunk_signatures
+                ]
+                with transaction.atomic():
+                    duplicates += save_page_signatures(signatures)
+                    refresh_document_signatures(
+                        pages.filter(document__isnull=False)
+                        .values_list("document_id", flat=True)
+                        .distinct()
+                    )
+                sys.stdout.write(
+                    f"\n -- Signed pages {low} to {low + batch_size - 1}: {duplicates} near-duplicates @ {datetime.datetime.now().strftime('%H:%M:%S')} -- "
+                )
+
+        # cached results were not collapsed
+        bump_search_generation()
+        sys.stdout.write(
+            f"\n -- Completed: {PageSignature.objects.filter(canonical_page__isnull=False).count()} near-duplicate pages ({duplicate_text_bytes() / 1e6:,.1f} MB of text not shared with their canonical page), {DocumentSignature.objects.filter(canonical_document__isnull=False).count()} near-duplicate documents -- \n"
+        )
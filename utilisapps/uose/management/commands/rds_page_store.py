@@ -0,0 +1,34 @@
+import sys
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from uose.uose_page_store import page_store_stats, prune_unreferenced_contents
+
+
+class Command(BaseCommand):
+    """Reports the size of the content addressed page store: the RDS pages,
+    the distinct texts they reference and the size of the texts and of
+    their search index. With --prune, first deletes the texts no page
+    references anymore, e.g. those of documents deleted with their pages."""
+
+    help = "Reports the size of the RDS page store and prunes unused texts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help="delete the texts no page references",
+        )
+
+    def handle(self, **options):
+        if options["prune"]:
+            with transaction.atomic():
+                pruned = prune_unreferenced_contents()
+            sys.stdout.write(f"\n -- Pruned {pruned} unreferenced texts -- ")
+
+        stats = page_store_stats()
+        sys.stdout.write(
+            f"\n -- {stats['pages']} pages, {stats['contents']} distinct texts ({stats['shared_pages']} pages share a stored text) -- "
+            f"\n -- Texts: {stats['store_bytes'] / 1e6:,.1f} MB, search index: {stats['index_bytes'] / 1e6:,.1f} MB -- \n"
+        )
@@ -0,0 +1,95 @@
+import os
+import sys
+import datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from uose.models import DocumentTerms, EntityDocument, RDSTextModel, RelatedDocument
+from uose.uose_related import (
+    extract_document_terms,
+    pending_documents,
+    refresh_related_documents,
+    save_document_terms,
+)
+
+
+class Command(BaseCommand):
+    """Counts the terms of the documents with linked RDS pages, in document
+    batches whose text is counted by parallel worker processes, and stores
+    the most similar documents of other dockets of each document by TF-IDF
+    cosine similarity. By default only the documents new or reloaded since
+    the last run are counted and merged into the stored lists; --rebuild
+    counts and scores every document again."""
+
+    help = "Finds the related documents of other dockets by TF-IDF similarity."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="count and score every document again",
+        )
+
+    def handle(self, **options):
+        batch_size = options["batch_size"]
+        if options["rebuild"]:
+            document_ids = list(
+                EntityDocument.objects.filter(pages__isnull=False)
+                .values_list("id", flat=True)
+                .distinct()
+                .order_by("id")
+            )
+        else:
+            document_ids = list(pending_documents())
+
+        if len(document_ids) == 0:
+            sys.stdout.write("\n -- No new documents to relate -- \n")
+            return
+
+        sys.stdout.write(
+            f"\n -- Counting the terms of {len(document_ids)} documents with {options['workers']} workers @ {datetime.datetime.now().strftime('%H:%M:%S')} -- "
+        )
+        # spawned children set up django; they never touch the database
+        with ProcessPoolExecutor(
+            max_workers=options["workers"],
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as pool:
+            for start in range(0, len(document_ids), batch_size):
+                batch = document_ids[start : start + batch_size]
+                texts = {}
+                for document_id, page_text in (
+                    RDSTextModel.objects.filter(document_id__in=batch)
+                    .order_by("document_id", "page_number")
+                    .values_list("document_id", "content__page_text")
+                ):
+                    texts.setdefault(document_id, []).append(page_text)
+                rows = list(texts.items())
+                chunk = max(1, -(-len(rows) // options["workers"]))
+                extracted = [
+                    terms
+                    for chunk_terms in pool.map(
+                        extract_document_terms,
+                        [rows[i : i + chunk] for i in range(0, len(rows), chunk)],
+                    )
+                    for terms in chunk_terms
+                ]
+                with transaction.atomic():
+                    save_document_terms(extracted)
+                sys.stdout.write(
+                    f"\n -- Counted documents {batch[0]} to {batch[-1]} @ {datetime.datetime.now().strftime('%H:%M:%S')} -- "
+                )
+
+        with transaction.atomic():
+            saved = refresh_related_documents(
+                None if options["rebuild"] else document_ids
+            )
+        sys.stdout.write(
+            f"\n -- Completed: {saved} related document lists refreshed, {RelatedDocument.objects.values('document_id').distinct().count()} of {DocumentTerms.objects.count()} documents have related documents @ {datetime.datetime.now().strftime('%H:%M:%S')} -- \n"
+        )
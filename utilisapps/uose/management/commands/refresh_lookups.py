@@ -0,0 +1,21 @@
+import sys
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from uose.models import DocketLookup, DocumentTypeLookup
+from uose.uose_lookups import refresh_lookups
+
+
+class Command(BaseCommand):
+    """Refreshes the docket and document type lookup tables used by the
+    search form pickers. Run after documents are loaded outside of
+    edoc_migration."""
+
+    help = "Refreshes the docket and document type lookup tables."
+
+    def handle(self, **options):
+        refresh_lookups()
+        sys.stdout.write(
+            f"\n -- Refreshed lookups: {DocketLookup.objects.count()} dockets, {DocumentTypeLookup.objects.count()} document types @ {datetime.datetime.now().strftime('%H:%M:%S')} -- \n"
+        )
@@ -0,0 +1,46 @@
+import sys
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from uose.models import SavedSearch
+from uose.uose_watches import WATCH_BATCH_PAGES, evaluate_saved_search, latest_page_id
+
+
+class Command(BaseCommand):
+    """Evaluates the active saved searches against the RDS pages loaded since
+    their last run and sends the new hits to their owners' inboxes. Run after
+    rds_migration, e.g. nightly."""
+
+    help = "Sends the new hits of the saved searches to their owners."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=WATCH_BATCH_PAGES,
+            help="page ids evaluated per query",
+        )
+
+    def handle(self, **options):
+        upto_id = latest_page_id()
+        saved_ids = list(
+            SavedSearch.objects.filter(is_active=True, last_page_id__lt=upto_id)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        sys.stdout.write(
+            f"\n -- Evaluating {len(saved_ids)} saved searches up to page {upto_id} @ {datetime.datetime.now().strftime('%H:%M:%S')} -- "
+        )
+
+        for saved_id in saved_ids:
+            documents = evaluate_saved_search(
+                saved_id, upto_id, batch_pages=options["batch_size"]
+            )
+            sys.stdout.write(
+                f"\n -- Saved search {saved_id}: {documents} documents with new hits -- "
+            )
+
+        sys.stdout.write(
+            f"\n -- Completed saved searches @ {datetime.datetime.now().strftime('%H:%M:%S')} -- \n"
+        )
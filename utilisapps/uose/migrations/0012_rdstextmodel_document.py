@@ -0,0 +1,86 @@
+# Generated by Django 4.2.8 on 2026-10-18 10:11
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models, transaction
+import django.db.models.deletion
+
+"""
+Version: 1.0.0
+Change Log:
+- Linked the RDS pages to the first document filed under their url
+- Linked the existing pages in page id batches, each in its own transaction;
+  an interrupted run resumes at the pages not linked yet. The search scopes
+  the pages by url, so pages without a document stay searchable
+- Deleting the linked document keeps the pages, shared by every document
+  filed under their url
+- The document and url indexes are built concurrently, without blocking the
+  page writes
+"""
+
+# pages linked per transaction
+BATCH_SIZE = 50000
+
+_LINK_SQL = """
+    UPDATE uose_rdstextmodel AS r
+    SET document_id = d.id
+    FROM (
+        SELECT DISTINCT ON (file_url) file_url, id
+        FROM uose_entitydocument
+        ORDER BY file_url, id
+    ) AS d
+    WHERE r.url = d.file_url
+    AND r.document_id IS NULL
+    AND r.id >= %s
+    AND r.id < %s
+"""
+
+
+def link_documents(apps, schema_editor):
+    """Links the existing pages to their document by file url in page id
+    batches
+
+    Args:
+        apps (TYPE): Description
+        schema_editor (TYPE): Description
+    """
+    RDSTextModel = apps.get_model("uose", "RDSTextModel")
+    max_id = RDSTextModel.objects.order_by("-id").values_list("id", flat=True).first()
+    connection = schema_editor.connection
+    for low in range(0, (max_id or 0) + 1, BATCH_SIZE):
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(_LINK_SQL, [low, low + BATCH_SIZE])
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("uose", "0011_rdstextmodel_search_vector_trigger2"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="rdstextmodel",
+            name="document",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="pages",
+                to="uose.entitydocument",
+                db_index=False,
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="rdstextmodel",
+            index=models.Index(fields=["document"], name="uose_rdstextmodel_document"),
+        ),
+        AddIndexConcurrently(
+            model_name="rdstextmodel",
+            index=django.contrib.postgres.indexes.HashIndex(
+                fields=["url"], name="uose_rdstex_url_dae360_hash"
+            ),
+        ),
+        migrations.RunPython(link_documents, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 4.2.8 on 2026-10-18 10:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("uose", "0012_rdstextmodel_document"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="userinbox",
+            name="entity_doc_ref",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="uose.entitydocument",
+            ),
+        ),
+        migrations.CreateModel(
+            name="ExportJob",
+            fields=[
+                ("id", models.AutoField(primary_key=True, serialize=False)),
+                (
+                    "report_type",
+                    models.CharField(
+                        choices=[
+                            ("DOCS", "Document Report"),
+                            ("SRCH", "Keyword Search Report"),
+                        ],
+                        max_length=4,
+                    ),
+                ),
+                ("export_format", models.CharField(default="xlsx", max_length=4)),
+                ("parameters", models.JSONField(default=dict)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("QUED", "Queued"),
+                            ("RUNG", "Running"),
+                            ("DONE", "Completed"),
+                            ("FAIL", "Failed"),
+                        ],
+                        default="QUED",
+                        max_length=4,
+                    ),
+                ),
+                ("rows_written", models.IntegerField(default=0)),
+                ("file_name", models.CharField(blank=True, max_length=250)),
+                ("error_text", models.TextField(blank=True)),
+                (
+                    "created_date",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("started_date", models.DateTimeField(blank=True, null=True)),
+                ("completed_date", models.DateTimeField(blank=True, null=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="userinbox",
+            name="export_job",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="uose.exportjob",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="exportjob",
+            index=models.Index(
+                fields=["status", "created_date"], name="uose_export_status_e303ff_idx"
+            ),
+        ),
+    ]
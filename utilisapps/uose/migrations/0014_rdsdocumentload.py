@@ -0,0 +1,37 @@
+# Generated by Django 4.2.8 on 2026-10-18 10:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("uose", "0013_exportjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RDSDocumentLoad",
+            fields=[
+                ("id", models.AutoField(primary_key=True, serialize=False)),
+                ("url", models.URLField(unique=True)),
+                ("content_hash", models.CharField(max_length=64)),
+                ("page_count", models.IntegerField()),
+                (
+                    "loaded_date",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "document",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="uose.entitydocument",
+                    ),
+                ),
+            ],
+        ),
+    ]
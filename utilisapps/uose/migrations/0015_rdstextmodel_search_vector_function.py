@@ -0,0 +1,53 @@
+from django.db import migrations
+
+"""
+Version: 1.0.0
+Change Log:
+- Replaced the tsvector_update_trigger search vector trigger with a plpgsql
+  function, so the vector definition can be changed by redefining the
+  function in a later migration
+- 0003 and 0011 assigned their operations twice, so only their whole table
+  update ran and no trigger was installed; they are left as they are and the
+  trigger is installed here. Existing vectors were computed by 0011 and are
+  kept until the definition changes
+- Indexed the page text only; the url and page number never matched a
+  keyword search
+"""
+
+
+class Migration(migrations.Migration):
+    """Migration for RDSTextModel Search Vector Function"""
+
+    dependencies = [
+        ("uose", "0014_rdsdocumentload"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE OR REPLACE FUNCTION uose_rdstextmodel_search_vector()
+            RETURNS trigger
+            LANGUAGE plpgsql
+            AS $$
+            BEGIN
+                NEW.search_vector := to_tsvector(
+                    'pg_catalog.english', coalesce(NEW.page_text, '')
+                );
+                RETURN NEW;
+            END
+            $$;
+
+            DROP TRIGGER IF EXISTS rds_srch_vec_trigger ON uose_rdstextmodel;
+
+            CREATE TRIGGER rds_srch_vec_trigger
+            BEFORE INSERT OR UPDATE OF page_text
+            ON uose_rdstextmodel
+            FOR EACH ROW
+            EXECUTE FUNCTION uose_rdstextmodel_search_vector();
+            """,
+            reverse_sql="""
+            DROP TRIGGER IF EXISTS rds_srch_vec_trigger ON uose_rdstextmodel;
+            DROP FUNCTION IF EXISTS uose_rdstextmodel_search_vector();
+            """,
+        ),
+    ]
@@ -0,0 +1,113 @@
+# Generated by Django 4.2.8 on 2026-10-18 10:25
+
+from django.db import migrations, models, transaction
+
+"""
+Version: 1.0.0
+Change Log:
+- Added the document title to RDSTextModel, copied from the linked document
+- Redefined the search vector function of 0015: document title weighted A,
+  page text weighted D; the trigger also runs when the title changes
+- Recomputed the vectors in page id batches, each in its own transaction,
+  instead of rewriting the table under one lock; an interrupted run resumes
+  at the first batch not committed
+"""
+
+# pages updated per transaction
+BATCH_SIZE = 10000
+
+# setting the title fires the trigger, which recomputes the vector; batches
+# already done are skipped when the migration is run again
+_BACKFILL_SQL = """
+    UPDATE uose_rdstextmodel AS r
+    SET document_title = coalesce(d.filename_description, '')
+    FROM uose_rdstextmodel AS p
+    LEFT JOIN uose_entitydocument AS d ON d.id = p.document_id
+    WHERE r.id = p.id
+    AND r.id >= %s
+    AND r.id < %s
+    AND r.search_vector IS DISTINCT FROM
+        setweight(to_tsvector('pg_catalog.english', coalesce(d.filename_description, '')), 'A')
+        || setweight(to_tsvector('pg_catalog.english', coalesce(r.page_text, '')), 'D')
+"""
+
+
+def backfill_search_vector(apps, schema_editor):
+    """Fills the document titles and recomputes the search vectors in page id
+    batches
+
+    Args:
+        apps (TYPE): Description
+        schema_editor (TYPE): Description
+    """
+    RDSTextModel = apps.get_model("uose", "RDSTextModel")
+    max_id = RDSTextModel.objects.order_by("-id").values_list("id", flat=True).first()
+    connection = schema_editor.connection
+    for low in range(0, (max_id or 0) + 1, BATCH_SIZE):
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(_BACKFILL_SQL, [low, low + BATCH_SIZE])
+
+
+class Migration(migrations.Migration):
+    """Migration for RDSTextModel Weighted Search Vector"""
+
+    atomic = False
+
+    dependencies = [
+        ("uose", "0015_rdstextmodel_search_vector_function"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="rdstextmodel",
+            name="document_title",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.RunSQL(
+            sql="""
+            CREATE OR REPLACE FUNCTION uose_rdstextmodel_search_vector()
+            RETURNS trigger
+            LANGUAGE plpgsql
+            AS $$
+            BEGIN
+                NEW.search_vector :=
+                    setweight(to_tsvector('pg_catalog.english', coalesce(NEW.document_title, '')), 'A')
+                    || setweight(to_tsvector('pg_catalog.english', coalesce(NEW.page_text, '')), 'D');
+                RETURN NEW;
+            END
+            $$;
+
+            DROP TRIGGER IF EXISTS rds_srch_vec_trigger ON uose_rdstextmodel;
+
+            CREATE TRIGGER rds_srch_vec_trigger
+            BEFORE INSERT OR UPDATE OF page_text, document_title
+            ON uose_rdstextmodel
+            FOR EACH ROW
+            EXECUTE FUNCTION uose_rdstextmodel_search_vector();
+            """,
+            reverse_sql="""
+            CREATE OR REPLACE FUNCTION uose_rdstextmodel_search_vector()
+            RETURNS trigger
+            LANGUAGE plpgsql
+            AS $$
+            BEGIN
+                NEW.search_vector := to_tsvector(
+                    'pg_catalog.english', coalesce(NEW.page_text, '')
+                );
+                RETURN NEW;
+            END
+            $$;
+
+            DROP TRIGGER IF EXISTS rds_srch_vec_trigger ON uose_rdstextmodel;
+
+            CREATE TRIGGER rds_srch_vec_trigger
+            BEFORE INSERT OR UPDATE OF page_text
+            ON uose_rdstextmodel
+            FOR EACH ROW
+            EXECUTE FUNCTION uose_rdstextmodel_search_vector();
+            """,
+        ),
+        migrations.RunPython(
+            backfill_search_vector, reverse_code=migrations.RunPython.noop
+        ),
+    ]
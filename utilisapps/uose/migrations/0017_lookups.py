@@ -0,0 +1,75 @@
+# Generated by Django 4.2.8 on 2026-10-18 10:30
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("uose", "0016_rdstextmodel_weighted_search_vector"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.CreateModel(
+            name="DocumentTypeLookup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("document_type", models.CharField(max_length=100, unique=True)),
+                ("document_count", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="DocketLookup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("case_number", models.CharField(max_length=100, unique=True)),
+                ("document_count", models.IntegerField(default=0)),
+                ("latest_issued_date", models.DateField(blank=True, null=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        django.contrib.postgres.indexes.OpClass(
+                            django.db.models.functions.text.Upper("case_number"),
+                            name="text_pattern_ops",
+                        ),
+                        name="uose_docketlookup_prefix",
+                    )
+                ],
+            },
+        ),
+        migrations.RunSQL(
+            sql="""
+            INSERT INTO uose_docketlookup (case_number, document_count, latest_issued_date)
+            SELECT case_number, COUNT(*), MAX(issued_by_entity_date)
+            FROM uose_entitydocument
+            GROUP BY case_number;
+
+            INSERT INTO uose_documenttypelookup (document_type, document_count)
+            SELECT document_type, COUNT(*)
+            FROM uose_entitydocument
+            GROUP BY document_type;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.8 on 2026-10-18 10:32
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # indexes are built concurrently, without blocking writes
+    atomic = False
+
+    dependencies = [
+        ("uose", "0017_lookups"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="docketlookup",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["case_number"],
+                name="uose_docketlookup_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="entity",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["entity_name"],
+                name="uose_entity_name_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="entitydocument",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["filename_description"],
+                name="uose_edoc_description_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.8 on 2026-10-18 10:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("uose", "0018_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchGeneration",
+            fields=[
+                ("id", models.AutoField(primary_key=True, serialize=False)),
+                ("generation", models.BigIntegerField(default=0)),
+                (
+                    "updated_date",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+        ),
+        migrations.RunSQL(
+            sql="INSERT INTO uose_searchgeneration (id, generation, updated_date) VALUES (1, 0, NOW());",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
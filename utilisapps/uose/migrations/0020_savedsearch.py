@@ -0,0 +1,48 @@
+# Generated by Django 4.2.8 on 2026-10-18 10:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("uose", "0019_searchgeneration"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SavedSearch",
+            fields=[
+                ("id", models.AutoField(primary_key=True, serialize=False)),
+                ("name", models.CharField(max_length=250)),
+                ("keywords", models.JSONField(default=list)),
+                ("entities", models.JSONField(blank=True, default=list)),
+                ("last_page_id", models.BigIntegerField(default=0)),
+                ("last_run_date", models.DateTimeField(blank=True, null=True)),
+                (
+                    "created_date",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["is_active", "last_page_id"],
+                        name="uose_saveds_is_acti_b3b89e_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.8 on 2026-10-18 10:50
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+"""
+Version: 1.0.0
+Change Log:
+- Added the uose_tsvector_agg aggregate, concatenating tsvectors
+- Added the document search index, filled by rds_document_index
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("uose", "0020_savedsearch"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE AGGREGATE uose_tsvector_agg(tsvector) (
+                SFUNC = tsvector_concat,
+                STYPE = tsvector,
+                INITCOND = ''
+            );
+            """,
+            reverse_sql="DROP AGGREGATE IF EXISTS uose_tsvector_agg(tsvector);",
+        ),
+        migrations.CreateModel(
+            name="DocumentSearchIndex",
+            fields=[
+                (
+                    "document",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_index",
+                        serialize=False,
+                        to="uose.entitydocument",
+                    ),
+                ),
+                (
+                    "search_vector",
+                    django.contrib.postgres.search.SearchVectorField(null=True),
+                ),
+                ("page_count", models.IntegerField(default=0)),
+                (
+                    "updated_date",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+            options={
+                "indexes": [
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["search_vector"], name="uose_docindex_vector"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.8 on 2026-10-18 10:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("uose", "0021_documentsearchindex"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocketCitation",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("cited_case_number", models.CharField(max_length=100)),
+                ("mentions", models.IntegerField(default=1)),
+                (
+                    "citing_document",
+                    models.ForeignKey(
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="docket_citations",
+                        to="uose.entitydocument",
+                    ),
+                ),
+                (
+                    "page",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="citations",
+                        to="uose.rdstextmodel",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["citing_document", "cited_case_number"],
+                        name="uose_citation_citing",
+                    ),
+                    models.Index(
+                        fields=["cited_case_number", "citing_document"],
+                        name="uose_citation_cited",
+                    ),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="docketcitation",
+            constraint=models.UniqueConstraint(
+                fields=("page", "cited_case_number"), name="uose_citation_page_docket"
+            ),
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 4.2.8 on 2026-10-18 10:52
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("uose", "0022_docketcitation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PageSignature",
+            fields=[
+                (
+                    "page",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="signature",
+                        serialize=False,
+                        to="uose.rdstextmodel",
+                    ),
+                ),
+                ("signature", models.BinaryField()),
+                (
+                    "bands",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.BigIntegerField(), size=None
+                    ),
+                ),
+                (
+                    "canonical_page",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="near_duplicates",
+                        to="uose.rdstextmodel",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["bands"], name="uose_pagesig_bands"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="DocumentSignature",
+            fields=[
+                (
+                    "document",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="signature",
+                        serialize=False,
+                        to="uose.entitydocument",
+                    ),
+                ),
+                ("signature", models.BinaryField()),
+                (
+                    "bands",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.BigIntegerField(), size=None
+                    ),
+                ),
+                ("page_count", models.IntegerField(default=0)),
+                (
+                    "canonical_document",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="near_duplicates",
+                        to="uose.entitydocument",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["bands"], name="uose_docsig_bands"
+                    )
+                ],
+            },
+        ),
+    ]
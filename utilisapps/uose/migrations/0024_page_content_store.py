@@ -0,0 +1,216 @@
+# Generated by Django 4.2.8 on 2026-10-18 10:56
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.contrib.postgres.search
+from django.db import migrations, models, transaction
+import django.db.models.deletion
+import django.utils.timezone
+import uose.models
+
+"""
+Version: 1.0.0
+Change Log:
+- Added the content addressed page store: one uose_pagecontent row per
+  distinct text, keyed by its sha256, with the text search vector (weight D)
+  and its GIN index
+- Added the nullable content reference and title vector (weight A) of the
+  RDS pages; the search vector function of 0016 also sets the title vector
+- Moved the page texts to the store in page id batches, each in its own
+  transaction; an interrupted run resumes at the pages without content
+- The page text and search vector columns are dropped by 0026, once every
+  page references its content
+"""
+
+# pages moved per transaction
+BATCH_SIZE = 5000
+
+_STORE_SQL = """
+    INSERT INTO uose_pagecontent (content_hash, page_text, created_date)
+    SELECT DISTINCT ON (content_hash) content_hash, page_text, NOW()
+    FROM (
+        SELECT encode(sha256(convert_to(page_text, 'UTF8')), 'hex') AS content_hash, page_text
+        FROM uose_rdstextmodel
+        WHERE id >= %s
+        AND id < %s
+        AND content_id IS NULL
+        AND page_text IS NOT NULL
+    ) AS p
+    ON CONFLICT (content_hash) DO NOTHING
+"""
+
+# setting the title fires the trigger, which computes the title vector
+_LINK_SQL = """
+    UPDATE uose_rdstextmodel
+    SET content_id = encode(sha256(convert_to(page_text, 'UTF8')), 'hex'),
+        document_title = document_title
+    WHERE id >= %s
+    AND id < %s
+    AND content_id IS NULL
+    AND page_text IS NOT NULL
+"""
+
+
+def backfill_page_contents(apps, schema_editor):
+    """Moves the page texts without content to the page store in page id
+    batches. Also run by 0026 for the pages written by the previous release
+    in between.
+
+    Args:
+        apps (TYPE): Description
+        schema_editor (TYPE): Description
+    """
+    RDSTextModel = apps.get_model("uose", "RDSTextModel")
+    pending = RDSTextModel.objects.filter(content__isnull=True).order_by("id")
+    low = pending.values_list("id", flat=True).first()
+    high = pending.order_by("-id").values_list("id", flat=True).first()
+    if low is None:
+        return
+    connection = schema_editor.connection
+    for start in range(low, high + 1, BATCH_SIZE):
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(_STORE_SQL, [start, start + BATCH_SIZE])
+            cursor.execute(_LINK_SQL, [start, start + BATCH_SIZE])
+
+
+class Migration(migrations.Migration):
+    """Migration for the Page Content Store"""
+
+    atomic = False
+
+    dependencies = [
+        ("uose", "0023_near_duplicate_signatures"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql="""
+                    CREATE TABLE uose_pagecontent (
+                        content_hash varchar(64) NOT NULL PRIMARY KEY,
+                        page_text text NOT NULL,
+                        search_vector tsvector GENERATED ALWAYS AS (
+                            setweight(to_tsvector('pg_catalog.english', coalesce(page_text, '')), 'D')
+                        ) STORED,
+                        created_date timestamp with time zone NOT NULL
+                    );
+                    CREATE INDEX uose_pagecontent_vector
+                    ON uose_pagecontent USING gin (search_vector);
+
+                    ALTER TABLE uose_rdstextmodel ADD COLUMN content_id varchar(64) NULL;
+                    ALTER TABLE uose_rdstextmodel
+                    ADD CONSTRAINT uose_rdstextmodel_content_id_fk_uose_pagecontent
+                    FOREIGN KEY (content_id) REFERENCES uose_pagecontent (content_hash)
+                    DEFERRABLE INITIALLY DEFERRED NOT VALID;
+                    ALTER TABLE uose_rdstextmodel ADD COLUMN title_vector tsvector NULL;
+                    ALTER TABLE uose_rdstextmodel ALTER COLUMN page_text DROP NOT NULL;
+
+                    CREATE OR REPLACE FUNCTION uose_rdstextmodel_search_vector()
+                    RETURNS trigger
+                    LANGUAGE plpgsql
+                    AS $$
+                    BEGIN
+                        NEW.title_vector := setweight(
+                            to_tsvector('pg_catalog.english', coalesce(NEW.document_title, '')), 'A'
+                        );
+                        NEW.search_vector := NEW.title_vector
+                            || setweight(to_tsvector('pg_catalog.english', coalesce(NEW.page_text, '')), 'D');
+                        RETURN NEW;
+                    END
+                    $$;
+                    """,
+                    reverse_sql="""
+                    CREATE OR REPLACE FUNCTION uose_rdstextmodel_search_vector()
+                    RETURNS trigger
+                    LANGUAGE plpgsql
+                    AS $$
+                    BEGIN
+                        NEW.search_vector :=
+                            setweight(to_tsvector('pg_catalog.english', coalesce(NEW.document_title, '')), 'A')
+                            || setweight(to_tsvector('pg_catalog.english', coalesce(NEW.page_text, '')), 'D');
+                        RETURN NEW;
+                    END
+                    $$;
+
+                    UPDATE uose_rdstextmodel AS r
+                    SET page_text = c.page_text
+                    FROM uose_pagecontent AS c
+                    WHERE c.content_hash = r.content_id
+                    AND r.page_text IS NULL;
+                    ALTER TABLE uose_rdstextmodel ALTER COLUMN page_text SET NOT NULL;
+                    ALTER TABLE uose_rdstextmodel DROP COLUMN title_vector;
+                    ALTER TABLE uose_rdstextmodel DROP COLUMN content_id;
+                    DROP TABLE uose_pagecontent;
+                    """,
+                ),
+            ],
+            state_operations=[
+                migrations.CreateModel(
+                    name="PageContent",
+                    fields=[
+                        (
+                            "content_hash",
+                            models.CharField(
+                                max_length=64, primary_key=True, serialize=False
+                            ),
+                        ),
+                        ("page_text", models.TextField()),
+                        (
+                            "search_vector",
+                            uose.models.GeneratedSearchVectorField(null=True),
+                        ),
+                        (
+                            "created_date",
+                            models.DateTimeField(default=django.utils.timezone.now),
+                        ),
+                    ],
+                    options={
+                        "indexes": [
+                            django.contrib.postgres.indexes.GinIndex(
+                                fields=["search_vector"],
+                                name="uose_pagecontent_vector",
+                            )
+                        ],
+                    },
+                ),
+                migrations.AlterField(
+                    model_name="rdstextmodel",
+                    name="page_text",
+                    field=models.TextField(null=True),
+                ),
+                migrations.AddField(
+                    model_name="rdstextmodel",
+                    name="title_vector",
+                    field=django.contrib.postgres.search.SearchVectorField(null=True),
+                ),
+                migrations.AddField(
+                    model_name="rdstextmodel",
+                    name="content",
+                    field=models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="pages",
+                        to="uose.pagecontent",
+                    ),
+                ),
+            ],
+        ),
+        # built without blocking the page writes
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS uose_rdstextmodel_content_id
+            ON uose_rdstextmodel (content_id);
+            """,
+            reverse_sql="DROP INDEX CONCURRENTLY IF EXISTS uose_rdstextmodel_content_id;",
+        ),
+        django.contrib.postgres.operations.AddIndexConcurrently(
+            model_name="rdstextmodel",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["title_vector"], name="uose_rdstext_title_vector"
+            ),
+        ),
+        migrations.RunPython(
+            backfill_page_contents, reverse_code=migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.8 on 2026-10-18 11:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("uose", "0024_page_content_store"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentTerms",
+            fields=[
+                (
+                    "document",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="terms",
+                        serialize=False,
+                        to="uose.entitydocument",
+                    ),
+                ),
+                ("terms", models.BinaryField()),
+                ("counts", models.BinaryField()),
+                ("word_count", models.IntegerField(default=0)),
+                (
+                    "updated_date",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="RelatedDocument",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("rank", models.SmallIntegerField()),
+                ("score", models.FloatField()),
+                (
+                    "document",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="similar_documents",
+                        to="uose.entitydocument",
+                    ),
+                ),
+                (
+                    "related_document",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="uose.entitydocument",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="relateddocument",
+            constraint=models.UniqueConstraint(
+                fields=("document", "rank"), name="uose_related_document_rank"
+            ),
+        ),
+    ]
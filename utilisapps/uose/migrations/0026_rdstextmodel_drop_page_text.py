@@ -0,0 +1,150 @@
+# Generated by Django 4.2.8 on 2026-10-18 11:10
+
+from importlib import import_module
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+"""
+Version: 1.0.0
+Change Log:
+- Moved the remaining page texts to the page store, i.e. the pages written
+  by the previous release since 0024
+- Made the content reference of the RDS pages required; the constraints are
+  validated first, so neither step scans the table under an exclusive lock
+- The search vector function only sets the title vector; dropped the page
+  text and search vector columns of the RDS pages
+"""
+
+_page_store = import_module("uose.migrations.0024_page_content_store")
+
+
+class Migration(migrations.Migration):
+    """Migration for RDSTextModel Page Text Removal"""
+
+    atomic = False
+
+    dependencies = [
+        ("uose", "0025_related_documents"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _page_store.backfill_page_contents,
+            reverse_code=migrations.RunPython.noop,
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql="""
+                    ALTER TABLE uose_rdstextmodel
+                    VALIDATE CONSTRAINT uose_rdstextmodel_content_id_fk_uose_pagecontent;
+                    """,
+                    reverse_sql=migrations.RunSQL.noop,
+                ),
+                migrations.RunSQL(
+                    sql="""
+                    ALTER TABLE uose_rdstextmodel
+                    ADD CONSTRAINT uose_rdstextmodel_content_id_not_null
+                    CHECK (content_id IS NOT NULL) NOT VALID;
+                    """,
+                    reverse_sql=migrations.RunSQL.noop,
+                ),
+                migrations.RunSQL(
+                    sql="""
+                    ALTER TABLE uose_rdstextmodel
+                    VALIDATE CONSTRAINT uose_rdstextmodel_content_id_not_null;
+                    """,
+                    reverse_sql=migrations.RunSQL.noop,
+                ),
+                migrations.RunSQL(
+                    sql="""
+                    ALTER TABLE uose_rdstextmodel ALTER COLUMN content_id SET NOT NULL;
+                    ALTER TABLE uose_rdstextmodel
+                    DROP CONSTRAINT uose_rdstextmodel_content_id_not_null;
+
+                    CREATE OR REPLACE FUNCTION uose_rdstextmodel_search_vector()
+                    RETURNS trigger
+                    LANGUAGE plpgsql
+                    AS $$
+                    BEGIN
+                        NEW.title_vector := setweight(
+                            to_tsvector('pg_catalog.english', coalesce(NEW.document_title, '')), 'A'
+                        );
+                        RETURN NEW;
+                    END
+                    $$;
+
+                    DROP TRIGGER IF EXISTS rds_srch_vec_trigger ON uose_rdstextmodel;
+
+                    CREATE TRIGGER rds_srch_vec_trigger
+                    BEFORE INSERT OR UPDATE OF document_title
+                    ON uose_rdstextmodel
+                    FOR EACH ROW
+                    EXECUTE FUNCTION uose_rdstextmodel_search_vector();
+
+                    ALTER TABLE uose_rdstextmodel DROP COLUMN search_vector;
+                    ALTER TABLE uose_rdstextmodel DROP COLUMN page_text;
+                    """,
+                    reverse_sql="""
+                    ALTER TABLE uose_rdstextmodel ADD COLUMN page_text text NULL;
+                    ALTER TABLE uose_rdstextmodel ADD COLUMN search_vector tsvector NULL;
+
+                    CREATE OR REPLACE FUNCTION uose_rdstextmodel_search_vector()
+                    RETURNS trigger
+                    LANGUAGE plpgsql
+                    AS $$
+                    BEGIN
+                        NEW.title_vector := setweight(
+                            to_tsvector('pg_catalog.english', coalesce(NEW.document_title, '')), 'A'
+                        );
+                        NEW.search_vector := NEW.title_vector
+                            || setweight(to_tsvector('pg_catalog.english', coalesce(NEW.page_text, '')), 'D');
+                        RETURN NEW;
+                    END
+                    $$;
+
+                    DROP TRIGGER IF EXISTS rds_srch_vec_trigger ON uose_rdstextmodel;
+
+                    CREATE TRIGGER rds_srch_vec_trigger
+                    BEFORE INSERT OR UPDATE OF page_text, document_title
+                    ON uose_rdstextmodel
+                    FOR EACH ROW
+                    EXECUTE FUNCTION uose_rdstextmodel_search_vector();
+
+                    UPDATE uose_rdstextmodel AS r
+                    SET page_text = c.page_text
+                    FROM uose_pagecontent AS c
+                    WHERE c.content_hash = r.content_id;
+
+                    CREATE INDEX uose_rdstex_search__2bf063_gin
+                    ON uose_rdstextmodel USING gin (search_vector);
+                    ALTER TABLE uose_rdstextmodel ALTER COLUMN content_id DROP NOT NULL;
+                    """,
+                ),
+            ],
+            state_operations=[
+                migrations.RemoveIndex(
+                    model_name="rdstextmodel",
+                    name="uose_rdstex_search__2bf063_gin",
+                ),
+                migrations.RemoveField(
+                    model_name="rdstextmodel",
+                    name="page_text",
+                ),
+                migrations.RemoveField(
+                    model_name="rdstextmodel",
+                    name="search_vector",
+                ),
+                migrations.AlterField(
+                    model_name="rdstextmodel",
+                    name="content",
+                    field=models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="pages",
+                        to="uose.pagecontent",
+                    ),
+                ),
+            ],
+        ),
+    ]
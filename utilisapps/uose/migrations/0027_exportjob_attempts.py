@@ -0,0 +1,18 @@
+# Generated by Django 4.2.8 on 2026-10-18 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("uose", "0026_rdstextmodel_drop_page_text"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exportjob",
+            name="attempts",
+            field=models.IntegerField(default=0),
+        ),
+    ]
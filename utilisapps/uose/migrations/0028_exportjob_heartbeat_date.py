@@ -0,0 +1,18 @@
+# Generated by Django 4.2.8 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("uose", "0027_exportjob_attempts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exportjob",
+            name="heartbeat_date",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
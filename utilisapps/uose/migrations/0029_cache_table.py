@@ -0,0 +1,37 @@
+# Generated by Django 4.2.8 on 2026-10-18 12:30
+
+from django.core.management import call_command
+from django.db import migrations
+
+"""
+Version: 1.0.0
+Change Log:
+- Created the table of the database cache shared by the web workers, as
+  createcachetable does; an existing table is left as it is
+"""
+
+
+def create_cache_table(apps, schema_editor):
+    """Creates the tables of the database cache backends of CACHES
+
+    Args:
+        apps (TYPE): Description
+        schema_editor (TYPE): Description
+    """
+    call_command(
+        "createcachetable", database=schema_editor.connection.alias, verbosity=0
+    )
+
+
+class Migration(migrations.Migration):
+    """Migration for the Shared Cache Table"""
+
+    dependencies = [
+        ("uose", "0028_exportjob_heartbeat_date"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            create_cache_table, reverse_code=migrations.RunPython.noop
+        ),
+    ]
@@ -20,11 +20,33 @@ import pandas as pd
 from django.utils import timezone
 
 from django.db import models
+from django.contrib.postgres.fields import ArrayField
 from django.contrib.postgres.search import SearchVectorField
-from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.indexes import GinIndex, HashIndex, OpClass
+from django.db.models.functions import Upper
 from django.contrib.auth.models import User
 
 
+class _DatabaseDefault(models.Expression):
+    """Compiles to DEFAULT, the only value Postgres accepts for a generated
+    column in an INSERT or UPDATE."""
+
+    def __init__(self):
+        super().__init__(output_field=SearchVectorField())
+
+    def as_sql(self, compiler, connection):
+        return "DEFAULT", []
+
+
+class GeneratedSearchVectorField(SearchVectorField):
+    """tsvector column computed by Postgres (GENERATED ALWAYS AS ... STORED).
+    The generation expression is defined in the migration creating the
+    column; Django always writes DEFAULT so Postgres recomputes it."""
+
+    def pre_save(self, model_instance, add):
+        return _DatabaseDefault()
+
+
 class EntityType(models.Model):
     """Entity Types;  Classification of Entity Types
 
@@ -97,6 +119,16 @@ class Entity(models.Model):
     entity_province_state = models.ForeignKey(ProvinceState, on_delete=models.CASCADE)
     entity_link = models.URLField()  # link to the entity site
 
+    class Meta:
+        indexes = [
+            # fuzzy name lookup (pg_trgm)
+            GinIndex(
+                fields=["entity_name"],
+                name="uose_entity_name_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
+
     def __str__(self):
         return f"{self.entity} | {self.entity_name} | {self.entity_type}"
 
@@ -135,6 +167,16 @@ class EntityDocument(models.Model):
     )  # applicant for the document
     status = models.CharField(max_length=100)
 
+    class Meta:
+        indexes = [
+            # fuzzy description lookup (pg_trgm)
+            GinIndex(
+                fields=["filename_description"],
+                name="uose_edoc_description_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
+
 
 class UserEntityDocuments(models.Model):
     """
@@ -196,21 +238,398 @@ class EntityDocumentMeta(models.Model):
         return f"{self.id} | {self.new_doc_indicator} | {self.content_type} | {self.is_loaded_to_analytics}"
 
 
+class DocketLookup(models.Model):
+    """Docket Lookup:  One row per docket / case number of the entity
+    documents, with its number of documents.  Maintained by refresh_lookups
+    so the search form never scans EntityDocument.
+
+    Args:
+        models (models.Model): Django Based Model Class
+
+    Returns:
+        models.Model: Django Based Model Class
+    """
+
+    case_number = models.CharField(max_length=100, unique=True)
+    document_count = models.IntegerField(default=0)
+    latest_issued_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # case insensitive prefix search (istartswith)
+            models.Index(
+                OpClass(Upper("case_number"), name="text_pattern_ops"),
+                name="uose_docketlookup_prefix",
+            ),
+            # fuzzy docket lookup (pg_trgm)
+            GinIndex(
+                fields=["case_number"],
+                name="uose_docketlookup_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.case_number} | {self.document_count}"
+
+
+class DocumentTypeLookup(models.Model):
+    """Document Type Lookup:  One row per document type of the entity
+    documents, with its number of documents.  Maintained by refresh_lookups.
+
+    Args:
+        models (models.Model): Django Based Model Class
+
+    Returns:
+        models.Model: Django Based Model Class
+    """
+
+    document_type = models.CharField(max_length=100, unique=True)
+    document_count = models.IntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.document_type} | {self.document_count}"
+
+
+class PageContent(models.Model):
+    """Page Content:  The text of RDS pages, stored once per distinct text
+    and keyed by its sha256, with its search vector. Pages with the same
+    text, e.g. cover letters or exhibits filed again, share one row, so it
+    is only indexed once.
+
+    Args:
+        models (models.Model): Django Based Model Class
+
+    Returns:
+        models.Model: Django Based Model Class
+    """
+
+    content_hash = models.CharField(
+        max_length=64, primary_key=True
+    )  # sha256 of the normalized page text
+    page_text = models.TextField()
+    search_vector = GeneratedSearchVectorField(null=True)  # page text weighted D
+    created_date = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="uose_pagecontent_vector"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.content_hash} | {len(self.page_text)} characters"
+
+
 class RDSTextModel(models.Model):
     url = models.URLField()
+    document = models.ForeignKey(
+        EntityDocument,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="pages",
+        db_index=False,  # uose_rdstextmodel_document, built concurrently
+    )  # first document filed under the url; searches scope the pages by url,
+    # which the other documents of the url share, so they outlive it
+    document_title = models.TextField(
+        blank=True, default=""
+    )  # filename description of the linked document, weighted in the vector
     page_number = models.IntegerField()
-    page_text = models.TextField()
-    search_vector = SearchVectorField(null=True)
+    content = models.ForeignKey(
+        PageContent, on_delete=models.PROTECT, related_name="pages"
+    )  # text of the page, shared by the pages with the same text
+    title_vector = SearchVectorField(
+        null=True
+    )  # title weighted A, set by the uose_rdstextmodel_search_vector trigger
 
     class Meta:
         indexes = [
-            GinIndex(fields=["search_vector"]),
+            GinIndex(fields=["title_vector"], name="uose_rdstext_title_vector"),
+            HashIndex(fields=["url"]),
+            models.Index(fields=["document"], name="uose_rdstextmodel_document"),
         ]
 
+    @property
+    def page_text(self) -> str:
+        return self.content.page_text
+
     def __str__(self):
         return f"{self.url} | Page {self.page_number}"
 
 
+class DocumentSearchIndex(models.Model):
+    """Document Search Index:  One row per EntityDocument with RDS pages,
+    holding the search vectors of all its pages merged, so documents can be
+    ranked without reading their pages. Refreshed by the ingestion commands.
+
+    Args:
+        models (models.Model): Django Based Model Class
+
+    Returns:
+        models.Model: Django Based Model Class
+    """
+
+    document = models.OneToOneField(
+        EntityDocument,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_index",
+    )
+    search_vector = SearchVectorField(
+        null=True
+    )  # title weighted A, text of every page weighted D
+    page_count = models.IntegerField(default=0)
+    updated_date = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="uose_docindex_vector"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.document_id} | {self.page_count} pages"
+
+
+class DocketCitation(models.Model):
+    """Docket Citation:  A docket or case number cited in the text of an RDS
+    page, e.g. EB-2022-0200, with the number of times the page mentions it.
+    Extracted when pages are loaded, so the documents a document cites and
+    the documents citing its docket are index lookups.
+
+    Args:
+        models (models.Model): Django Based Model Class
+
+    Returns:
+        models.Model: Django Based Model Class
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    page = models.ForeignKey(
+        RDSTextModel,
+        on_delete=models.CASCADE,
+        related_name="citations",
+        db_index=False,  # leading column of the unique constraint
+    )
+    citing_document = models.ForeignKey(
+        EntityDocument,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name="docket_citations",
+        db_index=False,  # leading column of uose_citation_citing
+    )  # document of the page, set once the page is linked
+    cited_case_number = models.CharField(max_length=100)
+    mentions = models.IntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["page", "cited_case_number"], name="uose_citation_page_docket"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["citing_document", "cited_case_number"],
+                name="uose_citation_citing",
+            ),
+            models.Index(
+                fields=["cited_case_number", "citing_document"],
+                name="uose_citation_cited",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.page_id} | {self.cited_case_number} | {self.mentions}"
+
+
+class PageSignature(models.Model):
+    """Page Signature:  MinHash signature of the text of an RDS page, with
+    its LSH band buckets, used to find the near-duplicates of the page. The
+    canonical page is the oldest page it duplicates, empty for the first
+    copy of a text.
+
+    Args:
+        models (models.Model): Django Based Model Class
+
+    Returns:
+        models.Model: Django Based Model Class
+    """
+
+    page = models.OneToOneField(
+        RDSTextModel,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="signature",
+    )
+    signature = models.BinaryField()  # MinHash values, little endian uint32
+    bands = ArrayField(
+        models.BigIntegerField()
+    )  # LSH bucket of every band of the signature
+    canonical_page = models.ForeignKey(
+        RDSTextModel,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="near_duplicates",
+    )
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["bands"], name="uose_pagesig_bands"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.page_id} | {self.canonical_page_id}"
+
+
+class DocumentSignature(models.Model):
+    """Document Signature:  MinHash signature of all the page text of an
+    EntityDocument, with its LSH band buckets, used to find the documents
+    refiled under other dockets or versions. The canonical document is the
+    oldest document it duplicates.
+
+    Args:
+        models (models.Model): Django Based Model Class
+
+    Returns:
+        models.Model: Django Based Model Class
+    """
+
+    document = models.OneToOneField(
+        EntityDocument,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="signature",
+    )
+    signature = models.BinaryField()  # MinHash values, little endian uint32
+    bands = ArrayField(
+        models.BigIntegerField()
+    )  # LSH bucket of every band of the signature
+    canonical_document = models.ForeignKey(
+        EntityDocument,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="near_duplicates",
+    )
+    page_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["bands"], name="uose_docsig_bands"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.document_id} | {self.canonical_document_id}"
+
+
+class DocumentTerms(models.Model):
+    """Document Terms:  The hashed word counts of all the page text of an
+    EntityDocument, from which the rds_related_documents command builds its
+    TF-IDF vector. Deleted when the pages of the document change, so the
+    command counts them again.
+
+    Args:
+        models (models.Model): Django Based Model Class
+
+    Returns:
+        models.Model: Django Based Model Class
+    """
+
+    document = models.OneToOneField(
+        EntityDocument,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="terms",
+    )
+    terms = models.BinaryField()  # sorted term hashes, little endian int32
+    counts = models.BinaryField()  # count of every term, little endian int32
+    word_count = models.IntegerField(default=0)
+    updated_date = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f"{self.document_id} | {self.word_count} words"
+
+
+class RelatedDocument(models.Model):
+    """Related Document:  One of the documents of other dockets most similar
+    to an EntityDocument, by cosine similarity of their TF-IDF vectors,
+    precomputed by the rds_related_documents command so the document detail
+    page reads them with one index lookup.
+
+    Args:
+        models (models.Model): Django Based Model Class
+
+    Returns:
+        models.Model: Django Based Model Class
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    document = models.ForeignKey(
+        EntityDocument,
+        on_delete=models.CASCADE,
+        related_name="similar_documents",
+        db_index=False,  # leading column of the unique constraint
+    )
+    related_document = models.ForeignKey(
+        EntityDocument, on_delete=models.CASCADE, related_name="+"
+    )
+    rank = models.SmallIntegerField()  # 1 for the most similar document
+    score = models.FloatField()  # cosine similarity, 0 to 1
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["document", "rank"], name="uose_related_document_rank"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.document_id} | {self.rank} | {self.related_document_id}"
+
+
+class RDSDocumentLoad(models.Model):
+    """RDS Document Load:  Records the page text loaded for each RDS url, so
+    the rds_migration command only reloads new or changed documents.
+
+    Args:
+        models (models.Model): Django Based Model Class
+
+    Returns:
+        models.Model: Django Based Model Class
+    """
+
+    id = models.AutoField(primary_key=True)
+    url = models.URLField(unique=True)
+    document = models.ForeignKey(
+        EntityDocument, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    content_hash = models.CharField(max_length=64)  # sha256 of the raw page text
+    page_count = models.IntegerField()
+    loaded_date = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f"{self.url} | {self.page_count} pages | {self.loaded_date}"
+
+
+class SearchGeneration(models.Model):
+    """Search Generation:  Counter bumped whenever RDS pages are loaded,
+    linked or reindexed. Cached search results are keyed on the generation,
+    so results cached before an ingestion are never served after it.
+
+    Args:
+        models (models.Model): Django Based Model Class
+
+    Returns:
+        models.Model: Django Based Model Class
+    """
+
+    id = models.AutoField(primary_key=True)
+    generation = models.BigIntegerField(default=0)
+    updated_date = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f"{self.generation} | {self.updated_date}"
+
+
 class RegulatorApplicaations(models.Model):
     """Regulator Applications:  Represents the applications to the regulator
     for various things like rate changes, new services, etc....
@@ -259,6 +678,88 @@ class UserInboxMessageType(models.Model):
     message_type_description = models.CharField(max_length=250)
 
 
+class ExportJob(models.Model):
+    """Export Job:  A report export queued from the document, docket or
+    search pages and generated in the background by the export_worker
+    command.
+
+    Args:
+        models (models.Model): Django Based Model Class
+
+    Returns:
+        models.Model: Django Based Model Class
+    """
+
+    REPORT_TYPES = [
+        ("DOCS", "Document Report"),
+        ("SRCH", "Keyword Search Report"),
+    ]
+    STATUSES = [
+        ("QUED", "Queued"),
+        ("RUNG", "Running"),
+        ("DONE", "Completed"),
+        ("FAIL", "Failed"),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    report_type = models.CharField(max_length=4, choices=REPORT_TYPES)
+    export_format = models.CharField(max_length=4, default="xlsx")  # xlsx or csv
+    parameters = models.JSONField(default=dict)  # report filters
+    status = models.CharField(max_length=4, choices=STATUSES, default="QUED")
+    rows_written = models.IntegerField(default=0)  # progress of the export
+    attempts = models.IntegerField(default=0)  # times claimed by a worker
+    file_name = models.CharField(max_length=250, blank=True)
+    error_text = models.TextField(blank=True)
+    created_date = models.DateTimeField(default=timezone.now)
+    started_date = models.DateTimeField(null=True, blank=True)
+    heartbeat_date = models.DateTimeField(null=True, blank=True)  # last progress
+    completed_date = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_date"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.id} | {self.user} | {self.report_type} | {self.status}"
+
+
+class SavedSearch(models.Model):
+    """Saved Search:  A standing keyword watch. The run_saved_searches command
+    evaluates it only against the RDS pages loaded after its checkpoint and
+    sends the documents with new hits to the owner's inbox.
+
+    Args:
+        models (models.Model): Django Based Model Class
+
+    Returns:
+        models.Model: Django Based Model Class
+    """
+
+    id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    name = models.CharField(max_length=250)
+    keywords = models.JSONField(default=list)
+    entities = models.JSONField(
+        default=list, blank=True
+    )  # entity codes watched, every entity when empty
+    last_page_id = models.BigIntegerField(
+        default=0
+    )  # checkpoint: highest RDS page id evaluated
+    last_run_date = models.DateTimeField(null=True, blank=True)
+    created_date = models.DateTimeField(default=timezone.now)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["is_active", "last_page_id"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.id} | {self.user} | {self.name}"
+
+
 class UserInbox(models.Model):
     id = models.AutoField(primary_key=True)
     sending_user = models.ForeignKey(
@@ -271,7 +772,12 @@ class UserInbox(models.Model):
     message_date = models.DateField()
     message_text = models.TextField()
     mark_as_read = models.BooleanField(default=False)
-    entity_doc_ref = models.ForeignKey(EntityDocument, on_delete=models.CASCADE)
+    entity_doc_ref = models.ForeignKey(
+        EntityDocument, on_delete=models.CASCADE, null=True, blank=True
+    )
+    export_job = models.ForeignKey(
+        ExportJob, on_delete=models.SET_NULL, null=True, blank=True
+    )  # completed export the message links to
 
 
 class Client(models.Model):
@@ -1,3 +1,224 @@
+"""
+UOSE Tests:
+This script contains the tests of the UOSE application in the UtilisWeb
+project.
+
+The search backend conformance tests run the same searches on every backend
+of SEARCH_BACKENDS, over fixture pages loaded by the RDS loader, and check
+the pages each one finds against the pages known to match: phrases and
+AND/OR/NOT/NEAR expressions, keyset pagination, hit results and the scoping
+of the pages by file url.
+
+Version History:
+- 1.0.0 (2026-10-18): Initial version of the tests.
+
+Change Log:
+- 2026-10-18: Added the search backend conformance tests.
+"""
+
+import os
+import pickle
+import shutil
+import datetime
+import tempfile
+
+from django.core.management import call_command
 from django.test import TestCase
 
-# Create your tests here.
+from .models import (
+    Country,
+    Entity,
+    EntityDocument,
+    EntityType,
+    ProvinceState,
+    RDSTextModel,
+)
+from .uose_ingest import documents_by_url, prepare_pickle_file, replace_documents
+from .uose_query import QuerySyntaxError
+from .uose_search import decode_cursor
+from .uose_search_backends import SEARCH_BACKENDS, SQLiteFTS5SearchBackend
+
+# {url: {page number: page text}} of the fixture documents, as in the
+# analytics pickle files
+FIXTURE_PAGES = {
+    "http://files/a.pdf": {
+        1: "The applicant proposes a rate base of 100 million dollars for the test year.",
+        2: "The deferral account balance is cleared over two years.",
+        3: "Capital expenditure forecasts are reviewed by the board.",
+    },
+    "http://files/b.pdf": {
+        1: "Distribution rates increase while transmission rates stay flat.",
+        2: "Interrogatory responses on the load forecast were filed late.",
+        3: "The base rate is unchanged from last year.",
+    },
+    "http://files/c.pdf": {
+        1: "Settlement proposal for distribution capital spending.",
+        2: "The rate of return on the equity base is discussed.",
+    },
+}
+
+# keywords searched and the (url, page number) of the pages they match
+EXPECTED_PAGES = {
+    "rate base": {("http://files/a.pdf", 1)},
+    '"load forecast"': {("http://files/b.pdf", 2)},
+    "capital AND expenditure": {("http://files/a.pdf", 3)},
+    "settlement OR interrogatory": {
+        ("http://files/b.pdf", 2),
+        ("http://files/c.pdf", 1),
+    },
+    "distribution NOT transmission": {("http://files/c.pdf", 1)},
+    "rate NEAR/3 base": {("http://files/a.pdf", 1), ("http://files/b.pdf", 3)},
+    "zebra": set(),
+}
+
+
+class SearchBackendConformanceTest(TestCase):
+    """Runs the conformance searches on every search backend."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fixture_dir = tempfile.mkdtemp()
+
+        EntityType.objects.create(
+            entity_type="REG", entity_type_description="Regulator"
+        )
+        country = Country.objects.create(
+            country="CA", country_name="Canada", country_iso_code="CA"
+        )
+        province = ProvinceState.objects.create(
+            province_state="ON",
+            province_state_name="Ontario",
+            province_state_iso_code="ON",
+            country=country,
+        )
+        for code in ["OEB", "HYD"]:
+            Entity.objects.create(
+                entity=code,
+                entity_name=code,
+                entity_type_id="REG",
+                entity_country=country,
+                entity_province_state=province,
+                entity_link="http://entities/",
+            )
+
+        # the HYD document is filed under the url of an OEB document
+        for entity, url, title in [
+            ("OEB", "http://files/a.pdf", "Exhibit A"),
+            ("OEB", "http://files/b.pdf", "Exhibit B"),
+            ("OEB", "http://files/c.pdf", "Exhibit C"),
+            ("HYD", "http://files/a.pdf", "Exhibit A filed again"),
+        ]:
+            EntityDocument.objects.create(
+                entity_id=entity,
+                link="http://entities/",
+                case_number=f"EB-2024-{entity}",
+                filename_description=title,
+                file_url=url,
+                document_type="Evidence",
+                issued_by_entity_date=datetime.date(2024, 1, 15),
+                received_by_entity_date=datetime.date(2024, 1, 15),
+                submitter_id=entity,
+                applicant_id=entity,
+                status="Filed",
+            )
+
+        path = os.path.join(cls.fixture_dir, "pages.pickle")
+        with open(path, "wb") as t_file:
+            pickle.dump(FIXTURE_PAGES, t_file)
+        documents, _, _ = prepare_pickle_file(path, {})
+        replace_documents(documents, documents_by_url(), loader="bulk")
+
+        cls.fts5_path = os.path.join(cls.fixture_dir, "fts5.sqlite3")
+        call_command("rds_fts5_index", path=cls.fts5_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.fixture_dir, ignore_errors=True)
+
+    def backends(self):
+        for name, backend_class in SEARCH_BACKENDS.items():
+            if backend_class is SQLiteFTS5SearchBackend:
+                yield name, backend_class(self.fts5_path)
+            else:
+                yield name, backend_class()
+
+    def page_keys(self, page_ids) -> set:
+        return set(
+            RDSTextModel.objects.filter(id__in=list(page_ids)).values_list(
+                "url", "page_number"
+            )
+        )
+
+    def test_expected_pages(self):
+        documents = EntityDocument.objects.filter(entity="OEB")
+        for name, backend in self.backends():
+            for keyword, expected in EXPECTED_PAGES.items():
+                with self.subTest(backend=name, keyword=keyword):
+                    hits, total = backend.ranked_hits(documents, [keyword], 25)
+                    self.assertEqual(self.page_keys(page for page, _ in hits), expected)
+                    self.assertEqual(total, len(expected))
+                    rows = backend.keyword_search(documents, [keyword])
+                    self.assertEqual({(row[0], row[1]) for row in rows}, expected)
+
+    def test_keywords_are_ored(self):
+        documents = EntityDocument.objects.filter(entity="OEB")
+        expected = EXPECTED_PAGES["rate base"] | EXPECTED_PAGES['"load forecast"']
+        for name, backend in self.backends():
+            with self.subTest(backend=name):
+                hits, total = backend.ranked_hits(
+                    documents, ["rate base", "load forecast"], 25
+                )
+                self.assertEqual(self.page_keys(page for page, _ in hits), expected)
+                self.assertEqual(total, len(expected))
+
+    def test_ranked_search_pages_through_ranked_hits(self):
+        documents = EntityDocument.objects.filter(entity="OEB")
+        keywords = ["rate OR distribution OR capital"]
+        for name, backend in self.backends():
+            with self.subTest(backend=name):
+                hits, total = backend.ranked_hits(documents, keywords, 25)
+                paged, after = [], None
+                while True:
+                    results, count, cursor = backend.ranked_search(
+                        documents, keywords, after=after, limit=2
+                    )
+                    self.assertEqual(count, total)
+                    paged += [result["id"] for result in results]
+                    if cursor is None:
+                        break
+                    after = decode_cursor(cursor)
+                self.assertEqual(paged, [page_id for page_id, _ in hits])
+
+    def test_hit_results_keep_hit_order(self):
+        documents = EntityDocument.objects.filter(entity="OEB")
+        for name, backend in self.backends():
+            with self.subTest(backend=name):
+                hits, _ = backend.ranked_hits(documents, ["rate NEAR/3 base"], 25)
+                results = backend.hit_results(
+                    list(reversed(hits)), ["rate NEAR/3 base"]
+                )
+                self.assertEqual(
+                    [result["id"] for result in results],
+                    [page_id for page_id, _ in reversed(hits)],
+                )
+
+    def test_pages_are_scoped_by_file_url(self):
+        # the pages are linked to the OEB document of their url
+        documents = EntityDocument.objects.filter(entity="HYD")
+        for name, backend in self.backends():
+            with self.subTest(backend=name):
+                hits, total = backend.ranked_hits(documents, ["rate base"], 25)
+                self.assertEqual(
+                    self.page_keys(page for page, _ in hits),
+                    EXPECTED_PAGES["rate base"],
+                )
+                hits, total = backend.ranked_hits(documents, ['"load forecast"'], 25)
+                self.assertEqual(total, 0)
+
+    def test_invalid_expression(self):
+        documents = EntityDocument.objects.all()
+        for name, backend in self.backends():
+            with self.subTest(backend=name):
+                with self.assertRaises(QuerySyntaxError):
+                    backend.ranked_hits(documents, ["(rate"], 25)
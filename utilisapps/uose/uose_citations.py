@@ -0,0 +1,217 @@
+"""
+UOSE Citations:
+This script contains the docket citation index of the UOSE application in the
+UtilisWeb project. Docket and case numbers cited in the page text, e.g.
+EB-2022-0200, are extracted by the loader worker processes while the pages
+are prepared, and saved with the pages, one DocketCitation per page and
+cited docket. The rds_citation_index command extracts them from the pages
+loaded before the index existed, and only scans new pages afterwards.
+
+The documents a document cites and the documents citing its docket are then
+lookups on the indexes of the citation table, whatever the size of the page
+text.
+
+Version History:
+- 1.0.0 (2026-10-18): Initial version of the docket citation index.
+
+Change Log:
+- 2026-10-18: Created the uose_citations.py file.
+- 2026-10-18: Listed the dockets cited by the pages of the document's file
+  url.
+- 2026-10-18: Set the citing document of the citations of the pages linked
+  after they were loaded.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import Count, Max, Min, Sum
+
+from .models import DocketCitation, EntityDocument
+
+# prefix, filing year and sequence number; dashes may be any unicode dash,
+# with spaces around them as left by the pdf text extraction
+DOCKET_PATTERN = re.compile(
+    r"\b([A-Z]{2,4})\s?[-‐‑‒–—]\s?((?:19|20)\d{2})\s?[-‐‑‒–—]\s?(\d{4})\b"
+)
+
+# documents listed per lookup on the document detail page
+CITATIONS_LIMIT = 25
+
+# citations saved per query
+CITATION_BATCH_SIZE = 5000
+
+# sets the document of the citations of pages linked after they were loaded
+_LINK_CITATIONS_SQL = """
+    UPDATE uose_docketcitation AS c
+    SET citing_document_id = p.document_id
+    FROM uose_rdstextmodel AS p
+    WHERE p.id = c.page_id
+    AND p.url = ANY(%s)
+    AND c.citing_document_id IS DISTINCT FROM p.document_id
+"""
+
+
+def extract_dockets(text: str) -> dict:
+    """
+    Finds the docket numbers cited in a page text.
+
+    Args:
+        text (str): page text
+
+    Returns:
+        dict: {docket number: mentions}, docket numbers normalized to
+            PREFIX-YYYY-NNNN
+    """
+    dockets = {}
+    for prefix, year, number in DOCKET_PATTERN.findall(text or ""):
+        docket = f"{prefix}-{year}-{number}"
+        dockets[docket] = dockets.get(docket, 0) + 1
+    return dockets
+
+
+def extract_page_citations(rows: list) -> list:
+    """
+    Extracts the docket citations of a batch of pages. Runs in the worker
+    processes of rds_citation_index.
+
+    Args:
+        rows (list): (page id, document id, page text) of the pages
+
+    Returns:
+        list: (page id, document id, docket number, mentions) citations
+    """
+    return [
+        (page_id, document_id, docket, mentions)
+        for page_id, document_id, page_text in rows
+        for docket, mentions in extract_dockets(page_text).items()
+    ]
+
+
+def save_citations(citations: list):
+    """
+    Saves extracted citations; citations already indexed are left as they
+    are, so a range of pages can be indexed again.
+
+    Args:
+        citations (list): (page id, document id, docket number, mentions)
+    """
+    DocketCitation.objects.bulk_create(
+        [
+            DocketCitation(
+                page_id=page_id,
+                citing_document_id=document_id,
+                cited_case_number=docket,
+                mentions=mentions,
+            )
+            for page_id, document_id, docket, mentions in citations
+        ],
+        batch_size=CITATION_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def save_loaded_citations(loaded_pages: list, page_dockets: dict):
+    """
+    Saves the citations of pages just loaded, with the dockets extracted by
+    the loader workers, once the pages have their ids.
+
+    Args:
+        loaded_pages (list): (page id, url, page number, document id) of the
+            loaded pages
+        page_dockets (dict): {(url, page number): {docket number: mentions}}
+            of the loaded pages citing dockets
+    """
+    save_citations(
+        [
+            (page_id, document_id, docket, mentions)
+            for page_id, url, page_number, document_id in loaded_pages
+            for docket, mentions in page_dockets.get((url, page_number), {}).items()
+        ]
+    )
+
+
+def link_citations(urls: list) -> int:
+    """
+    Sets the citing document of the citations of the pages of the given
+    urls to the document their page is linked to, once link_documents has
+    linked the pages.
+
+    Args:
+        urls (list): file urls of the relinked pages
+
+    Returns:
+        int: number of citations linked
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(_LINK_CITATIONS_SQL, [urls])
+        return cursor.rowcount
+
+
+def citation_checkpoint() -> int:
+    """
+    Returns the id of the last page with indexed citations, where an
+    incremental rds_citation_index run resumes. Pages loaded by rds_migration
+    have their citations indexed on load.
+
+    Returns:
+        int: highest page id in the citation index, 0 when it is empty
+    """
+    return DocketCitation.objects.aggregate(last=Max("page_id"))["last"] or 0
+
+
+def document_cites(document: EntityDocument, limit=CITATIONS_LIMIT) -> list:
+    """
+    Returns the dockets cited by the pages of a document, other than its own.
+
+    Args:
+        document (EntityDocument): citing document
+        limit (int, optional): number of dockets returned
+
+    Returns:
+        list: {"cited_case_number", "pages", "mentions", "first_page"} of the
+            dockets most mentioned first
+    """
+    return list(
+        DocketCitation.objects.filter(page__url=document.file_url)
+        .exclude(cited_case_number=document.case_number)
+        .values("cited_case_number")
+        .annotate(
+            pages=Count("id"),
+            mentions=Sum("mentions"),
+            first_page=Min("page__page_number"),
+        )
+        .order_by("-mentions", "cited_case_number")[:limit]
+    )
+
+
+def document_cited_by(document: EntityDocument, limit=CITATIONS_LIMIT) -> list:
+    """
+    Returns the documents of other dockets citing the docket of a document.
+
+    Args:
+        document (EntityDocument): document whose docket is cited
+        limit (int, optional): number of documents returned
+
+    Returns:
+        list: {"citing_document_id", "citing_document__filename_description",
+            "citing_document__case_number",
+            "citing_document__issued_by_entity_date", "pages", "mentions"} of
+            the citing documents, newest first
+    """
+    return list(
+        DocketCitation.objects.filter(
+            cited_case_number=document.case_number, citing_document__isnull=False
+        )
+        .exclude(citing_document__case_number=document.case_number)
+        .values(
+            "citing_document_id",
+            "citing_document__filename_description",
+            "citing_document__case_number",
+            "citing_document__issued_by_entity_date",
+        )
+        .annotate(pages=Count("id"), mentions=Sum("mentions"))
+        .order_by("-citing_document__issued_by_entity_date", "-citing_document_id")[
+            :limit
+        ]
+    )
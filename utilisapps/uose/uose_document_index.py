@@ -0,0 +1,289 @@
+"""
+UOSE Document Index:
+This script contains the document search index of the UOSE application in
+the UtilisWeb project: one row per document holding the search vectors of
+all its RDS pages merged, refreshed by the ingestion commands, and the
+document ranking built on it.
+
+Documents are ranked on the merged vectors with a relaxed query (see
+uose_query.relaxed_tsquery), and only the pages of the best documents are
+then searched, to list the pages matching the exact query.
+
+Version History:
+- 1.0.0 (2026-10-18): Initial version of the document search index.
+
+Change Log:
+- 2026-10-18: Created the uose_document_index.py file.
+- 2026-10-18: Collapsed the near-duplicate documents of the ranking.
+- 2026-10-18: Merged the text vectors of the pages from the page store.
+- 2026-10-18: Indexed every document with the pages of its file url.
+"""
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import FloatField, Max
+from django.db.models.functions import Cast
+from django.contrib.postgres.search import SearchRank
+
+from .models import EntityDocument
+from .uose_duplicates import collapse_duplicate_documents
+from .uose_execution import search_slot, single_flight
+from .uose_query import is_expression, parse_query, relaxed_tsquery
+from .uose_search import (
+    SEARCH_CONFIG,
+    build_search_query,
+    clean_keywords,
+    matching_pages,
+    page_vector,
+)
+from .uose_search_cache import record_cache_lookup, search_cache_key
+
+DOCUMENTS_PER_PAGE = 25
+
+# matching page numbers listed per document
+PAGES_PER_DOCUMENT = 10
+
+DOCUMENT_CACHE_SECONDS = getattr(settings, "UOSE_SEARCH_CACHE_SECONDS", 600)
+
+# sqlstate raised when a merged vector is over the 1MB tsvector limit
+_PROGRAM_LIMIT_EXCEEDED = "54000"
+
+# the text vectors (weight D) of the pages are merged in page order after
+# the weighted title; {page_vector} is stripped of its positions for
+# documents too large to keep them
+_REFRESH_SQL = """
+    INSERT INTO uose_documentsearchindex (document_id, search_vector, page_count, updated_date)
+    SELECT
+        d.id,
+        setweight(to_tsvector('pg_catalog.english', coalesce(d.filename_description, '')), 'A')
+        || uose_tsvector_agg({page_vector} ORDER BY p.page_number, p.id),
+        COUNT(*),
+        NOW()
+    FROM uose_entitydocument AS d
+    JOIN uose_rdstextmodel AS p ON p.url = d.file_url
+    JOIN uose_pagecontent AS c ON c.content_hash = p.content_id
+    WHERE d.id = ANY(%s)
+    GROUP BY d.id
+    ON CONFLICT (document_id) DO UPDATE
+    SET search_vector = EXCLUDED.search_vector,
+        page_count = EXCLUDED.page_count,
+        updated_date = EXCLUDED.updated_date
+"""
+
+_PAGE_VECTOR = "c.search_vector"
+_STRIPPED_PAGE_VECTOR = "strip(c.search_vector)"
+
+_PRUNE_SQL = """
+    DELETE FROM uose_documentsearchindex AS i
+    WHERE i.document_id = ANY(%s)
+    AND NOT EXISTS (
+        SELECT 1
+        FROM uose_entitydocument AS d
+        JOIN uose_rdstextmodel AS p ON p.url = d.file_url
+        WHERE d.id = i.document_id
+    )
+"""
+
+# the distance operators of the normalized query are replaced by AND, since
+# positions are not kept across page boundaries of large documents
+_RANK_SQL = """
+    WITH q AS (
+        SELECT regexp_replace(({query})::text, '<(-|[0-9]+)>', '&', 'g')::tsquery AS query
+    )
+    SELECT i.document_id, ts_rank_cd(i.search_vector, q.query) AS rank
+    FROM uose_documentsearchindex AS i, q
+    WHERE i.search_vector @@ q.query
+    AND i.document_id IN ({documents})
+    ORDER BY rank DESC, i.document_id DESC
+    LIMIT %s
+"""
+
+
+def _is_too_long(ex: Exception) -> bool:
+    cause = ex.__cause__
+    return _PROGRAM_LIMIT_EXCEEDED in (
+        getattr(cause, "sqlstate", None),
+        getattr(cause, "pgcode", None),
+    )
+
+
+def refresh_document_index(document_ids):
+    """
+    Rebuilds the document index rows of the given documents from their
+    pages, and removes the rows of documents left without pages. Documents
+    whose merged vector is over the tsvector size limit are indexed without
+    the positions of their pages.
+
+    Args:
+        document_ids (iterable): ids of the documents whose pages changed
+    """
+    ids = sorted({doc_id for doc_id in document_ids if doc_id is not None})
+    if len(ids) == 0:
+        return
+
+    with connection.cursor() as cursor:
+        try:
+            with transaction.atomic():
+                cursor.execute(_REFRESH_SQL.format(page_vector=_PAGE_VECTOR), [ids])
+        except DatabaseError as ex:
+            if not _is_too_long(ex):
+                raise
+            for doc_id in ids:
+                try:
+                    with transaction.atomic():
+                        cursor.execute(
+                            _REFRESH_SQL.format(page_vector=_PAGE_VECTOR), [[doc_id]]
+                        )
+                except DatabaseError as ex:
+                    if not _is_too_long(ex):
+                        raise
+                    cursor.execute(
+                        _REFRESH_SQL.format(page_vector=_STRIPPED_PAGE_VECTOR),
+                        [[doc_id]],
+                    )
+        cursor.execute(_PRUNE_SQL, [ids])
+
+
+def _document_query(keywords: list):
+    # ORs the relaxed query of every keyword; None if one matches documents
+    # without any of its phrases
+    parts, params = [], []
+    for kw in keywords:
+        if is_expression(kw):
+            text = relaxed_tsquery(parse_query(kw))
+            if text is None:
+                return None, None
+            parts.append("to_tsquery(%s::regconfig, %s)")
+        else:
+            text = kw
+            parts.append("phraseto_tsquery(%s::regconfig, %s)")
+        params += [SEARCH_CONFIG, text]
+    return " || ".join(parts), params
+
+
+def _ranked_document_ids(documents, keywords: list, limit: int) -> list:
+    query_sql, query_params = _document_query(keywords)
+    if query_sql is None:
+        # nothing to look up in the index, rank on the pages
+        query = build_search_query(keywords)
+        ranks = dict(
+            matching_pages(documents, query)
+            .values("url")
+            .annotate(
+                rank=Max(
+                    Cast(
+                        SearchRank(page_vector(), query, cover_density=True),
+                        FloatField(),
+                    )
+                )
+            )
+            .values_list("url", "rank")
+        )
+        ranked = sorted(
+            (
+                (doc_id, ranks[url])
+                for doc_id, url in documents.filter(
+                    file_url__in=list(ranks)
+                ).values_list("id", "file_url")
+            ),
+            key=lambda document: (-document[1], -document[0]),
+        )
+        return ranked[:limit]
+
+    documents_sql, documents_params = documents.values("id").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _RANK_SQL.format(query=query_sql, documents=documents_sql),
+            query_params + list(documents_params) + [limit],
+        )
+        return cursor.fetchall()
+
+
+def _search_documents(documents, keywords: list, limit: int) -> list:
+    # twice the documents are ranked, as the relaxed query may match
+    # documents without a page matching the exact query
+    ranked = _ranked_document_ids(documents, keywords, limit * 2)
+    ranked, duplicates = collapse_duplicate_documents(ranked)
+    ranks = dict(ranked)
+
+    # drill into the pages of the ranked documents only
+    query = build_search_query(keywords)
+    ranked_documents = EntityDocument.objects.filter(id__in=ranks)
+    url_pages = {}
+    for url, page_number in (
+        matching_pages(ranked_documents, query)
+        .annotate(rank=SearchRank(page_vector(), query, cover_density=True))
+        .order_by("url", "-rank", "page_number")
+        .values_list("url", "page_number")
+    ):
+        url_pages.setdefault(url, []).append(page_number)
+    pages = {
+        doc_id: url_pages[url]
+        for doc_id, url in ranked_documents.values_list("id", "file_url")
+        if url in url_pages
+    }
+
+    info = {
+        doc["id"]: doc
+        for doc in EntityDocument.objects.filter(id__in=pages).values(
+            "id",
+            "entity_id",
+            "case_number",
+            "filename_description",
+            "document_type",
+            "issued_by_entity_date",
+            "search_index__page_count",
+        )
+    }
+    results = []
+    for doc_id, _ in ranked:
+        if doc_id in pages and len(results) < limit:
+            results.append(
+                {
+                    **info[doc_id],
+                    "rank": ranks[doc_id],
+                    "duplicates": duplicates.get(doc_id, 0),
+                    "matching_pages": len(pages[doc_id]),
+                    "pages": sorted(pages[doc_id][:PAGES_PER_DOCUMENT]),
+                }
+            )
+    return results
+
+
+def document_search(
+    documents, kw_list: list, fingerprint: str, limit=DOCUMENTS_PER_PAGE
+) -> list:
+    """
+    Returns the documents best matching a search, with their matching pages,
+    from the cache when the same search ran within DOCUMENT_CACHE_SECONDS in
+    the current search generation.
+
+    Args:
+        documents (QuerySet): EntityDocument queryset of the documents to search
+        kw_list (list): keywords to search for
+        fingerprint (str): search_fingerprint of the search
+        limit (int, optional): number of documents returned
+
+    Returns:
+        list: best documents first, each a dict of the document fields with
+            its rank, number of near-duplicate documents collapsed into it,
+            number of matching pages and the numbers of its best matching
+            pages
+
+    Raises:
+        SearchBusy: if no search slot freed up in time
+        SearchTimeout: if the search ran longer than its statement_timeout
+    """
+    keywords = clean_keywords(kw_list)
+    if len(keywords) == 0:
+        return []
+
+    def compute():
+        with search_slot():
+            return _search_documents(documents, keywords, limit)
+
+    results, outcome = single_flight(
+        search_cache_key("documents", fingerprint), compute, DOCUMENT_CACHE_SECONDS
+    )
+    record_cache_lookup("documents", outcome)
+    return results
@@ -0,0 +1,217 @@
+"""
+UOSE Execution:
+This script contains the execution layer of the expensive searches of the
+UOSE application in the UtilisWeb project:
+
+- identical searches running at the same time share one execution
+  (single flight), the others wait for its cached result; across the web
+  workers this needs a shared cache backend, which check_shared_cache
+  enforces;
+- at most SEARCH_MAX_CONCURRENT searches scan the page text at once, across
+  every web worker, using Postgres advisory locks as slots; other searches
+  queue for up to SEARCH_QUEUE_SECONDS;
+- every search runs with a statement_timeout, so a runaway search cannot
+  hold the database from the interactive pages.
+
+Version History:
+- 1.0.0 (2026-10-18): Initial version of the search execution layer.
+
+Change Log:
+- 2026-10-18: Created the uose_execution.py file.
+- 2026-10-18: Rejected the cache backends local to each process.
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.db import OperationalError, connection, transaction
+
+SEARCH_MAX_CONCURRENT = getattr(settings, "UOSE_SEARCH_MAX_CONCURRENT", 4)
+SEARCH_QUEUE_SECONDS = getattr(settings, "UOSE_SEARCH_QUEUE_SECONDS", 10)
+SEARCH_STATEMENT_TIMEOUT_MS = getattr(
+    settings, "UOSE_SEARCH_STATEMENT_TIMEOUT_MS", 15000
+)
+
+# first key of the advisory locks used as search slots
+_SLOT_LOCK_CLASS = 21871
+
+# sqlstate of a statement cancelled by statement_timeout
+_QUERY_CANCELED = "57014"
+
+# cache backends local to each process: the web workers would neither share
+# their cached searches nor wait for each other's identical searches
+_PER_PROCESS_CACHES = [
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+]
+
+# searches computed by this process, by cache key
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+class SearchBusy(Exception):
+    """Raised when no search slot frees up within SEARCH_QUEUE_SECONDS."""
+
+
+class SearchTimeout(Exception):
+    """Raised when a search runs longer than its statement_timeout."""
+
+
+def _is_query_canceled(ex: Exception) -> bool:
+    cause = ex.__cause__
+    return _QUERY_CANCELED in (
+        getattr(cause, "sqlstate", None),
+        getattr(cause, "pgcode", None),
+    )
+
+
+def _acquire_slot(cursor, max_concurrent: int) -> bool:
+    for slot in range(max_concurrent):
+        cursor.execute(
+            "SELECT pg_try_advisory_xact_lock(%s, %s)", [_SLOT_LOCK_CLASS, slot]
+        )
+        if cursor.fetchone()[0]:
+            return True
+    return False
+
+
+@contextmanager
+def search_slot(
+    timeout_ms=SEARCH_STATEMENT_TIMEOUT_MS,
+    max_concurrent=SEARCH_MAX_CONCURRENT,
+    queue_seconds=SEARCH_QUEUE_SECONDS,
+):
+    """
+    Runs the queries of the block in a transaction holding one of the
+    max_concurrent search slots, with a statement_timeout. Waits for a slot
+    to free up for up to queue_seconds; the slot and the timeout are released
+    with the transaction.
+
+    Args:
+        timeout_ms (int, optional): statement_timeout of the queries
+        max_concurrent (int, optional): searches allowed to run at once
+        queue_seconds (float, optional): time to wait for a slot
+
+    Raises:
+        SearchBusy: if no slot frees up in time
+        SearchTimeout: if a query of the block is cancelled by the timeout
+    """
+    deadline = time.monotonic() + queue_seconds
+    delay = 0.05
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT set_config('statement_timeout', %s, true)",
+                    [str(int(timeout_ms))],
+                )
+                while not _acquire_slot(cursor, max_concurrent):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise SearchBusy(
+                            "The search service is busy. Please try again in a moment."
+                        )
+                    time.sleep(min(delay, remaining))
+                    delay = min(delay * 2, 1.0)
+            yield
+    except OperationalError as ex:
+        if _is_query_canceled(ex):
+            raise SearchTimeout(
+                "The search took too long. Please narrow the date range or the keywords."
+            ) from ex
+        raise
+
+
+def check_shared_cache(app_configs, **kwargs) -> list:
+    """
+    System check rejecting a default cache local to each process, e.g. the
+    LocMemCache Django uses when CACHES is not configured. Registered by the
+    uose app config, so manage.py commands, migrate included, fail with it.
+
+    Args:
+        app_configs (list): apps checked, unused
+        **kwargs: check options, unused
+
+    Returns:
+        list: the checks.Error of a per-process cache backend, if any
+    """
+    backend = settings.CACHES.get("default", {}).get("BACKEND")
+    if backend not in _PER_PROCESS_CACHES:
+        return []
+    return [
+        checks.Error(
+            f"The default cache backend {backend} is local to each process.",
+            hint="Configure a cache shared by every web worker in CACHES, e.g. "
+            "django.core.cache.backends.db.DatabaseCache, so identical "
+            "searches run once and the search cache and its counters are "
+            "site-wide.",
+            id="uose.E001",
+        )
+    ]
+
+
+def single_flight(key: str, compute, seconds: int):
+    """
+    Returns the cached value of key, computing it once when it is missing:
+    callers asking for the same key while it is computed wait for it instead
+    of computing it again. Threads of a process wait on an event, other
+    processes poll the cache while a marker key is set.
+
+    Args:
+        key (str): cache key of the value
+        compute (callable): computes the value
+        seconds (int): time the value is cached
+
+    Returns:
+        Tuple[object, str]: value and where it came from: "hits" when it was
+            cached, "coalesced" when another caller computed it, "misses"
+            when it was computed
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value, "hits"
+
+    with _in_flight_lock:
+        event = _in_flight.get(key)
+        leader = event is None
+        if leader:
+            event = _in_flight[key] = threading.Event()
+
+    if not leader:
+        # another thread of this process is computing the same search
+        event.wait(SEARCH_QUEUE_SECONDS + SEARCH_STATEMENT_TIMEOUT_MS / 1000)
+        value = cache.get(key)
+        if value is not None:
+            return value, "coalesced"
+        return compute(), "misses"
+
+    marker = f"{key}:in_flight"
+    marker_seconds = int(SEARCH_QUEUE_SECONDS + SEARCH_STATEMENT_TIMEOUT_MS / 1000)
+    try:
+        # another process is computing the same search: wait for its result
+        # while its marker is set, for up to SEARCH_QUEUE_SECONDS
+        holding = cache.add(marker, 1, marker_seconds)
+        deadline = time.monotonic() + SEARCH_QUEUE_SECONDS
+        while not holding and time.monotonic() < deadline:
+            time.sleep(0.1)
+            value = cache.get(key)
+            if value is not None:
+                return value, "coalesced"
+            holding = cache.add(marker, 1, marker_seconds)
+
+        try:
+            value = compute()
+            cache.set(key, value, seconds)
+            return value, "misses"
+        finally:
+            if holding:
+                cache.delete(marker)
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
+        event.set()
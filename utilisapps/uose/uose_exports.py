@@ -0,0 +1,287 @@
+"""
+UOSE Exports:
+This script contains the background export job queue for the UOSE application
+in the UtilisWeb project. Jobs are queued by the views and generated by the
+export_worker management command, outside of the web workers.
+
+Version History:
+- 1.0.0 (2026-10-18): Initial version of the export job queue.
+
+Change Log:
+- 2026-10-18: Created the uose_exports.py file.
+- 2026-10-18: Requeued or failed the running jobs of workers that died,
+  counting the attempts of every job.
+- 2026-10-18: Swept the running jobs by their heartbeat, refreshed with their
+  progress, and finished a job only while its attempt still owns it.
+"""
+
+import os
+import pathlib
+import datetime
+import traceback
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ExportJob, UserInbox, UserInboxMessageType
+from .uose_helpers import (
+    document_report_rows,
+    search_report_rows,
+    write_csv,
+    write_excel,
+)
+
+# reports are written here and served by the download view
+EXPORT_DIR = pathlib.Path(
+    getattr(
+        settings,
+        "UOSE_EXPORT_DIR",
+        pathlib.Path(__file__).parent.absolute() / "exports",
+    )
+)
+
+# document reports up to this many rows are streamed in the request
+EXPORT_SYNC_MAX_ROWS = getattr(settings, "UOSE_EXPORT_SYNC_MAX_ROWS", 5000)
+
+# running jobs without a heartbeat for longer are considered abandoned by a
+# dead worker
+EXPORT_STALE_SECONDS = getattr(settings, "UOSE_EXPORT_STALE_SECONDS", 3600)
+
+# abandoned jobs are requeued until they have been claimed this many times
+EXPORT_MAX_ATTEMPTS = getattr(settings, "UOSE_EXPORT_MAX_ATTEMPTS", 3)
+
+EXPORT_MESSAGE_TYPE = "EXPT"
+
+
+class ExportAbandoned(Exception):
+    """Raised when the attempt running a job no longer owns it: the job was
+    requeued or failed by a sweep while it ran."""
+
+
+def queue_export(user, report_type: str, export_format: str, parameters: dict):
+    """
+    Queues a report export for the export worker.
+
+    Args:
+        user (User): user requesting the export; notified when it completes
+        report_type (str): "DOCS" or "SRCH"
+        export_format (str): "xlsx" or "csv"
+        parameters (dict): arguments of the report row generator
+
+    Returns:
+        ExportJob: the queued job
+    """
+    return ExportJob.objects.create(
+        user=user,
+        report_type=report_type,
+        export_format=export_format,
+        parameters=parameters,
+    )
+
+
+def claim_jobs(limit: int) -> list:
+    """
+    Marks up to limit queued jobs as running and returns their ids. Rows are
+    locked with SKIP LOCKED so several workers never claim the same job.
+
+    Args:
+        limit (int): maximum number of jobs to claim
+
+    Returns:
+        list: ids of the claimed jobs, oldest first
+    """
+    with transaction.atomic():
+        job_ids = list(
+            ExportJob.objects.select_for_update(skip_locked=True)
+            .filter(status="QUED")
+            .order_by("created_date")
+            .values_list("id", flat=True)[:limit]
+        )
+        ExportJob.objects.filter(id__in=job_ids).update(
+            status="RUNG",
+            started_date=timezone.now(),
+            heartbeat_date=timezone.now(),
+            attempts=F("attempts") + 1,
+        )
+    return job_ids
+
+
+def requeue_stale_jobs(
+    running_ids, stale_seconds=EXPORT_STALE_SECONDS, max_attempts=EXPORT_MAX_ATTEMPTS
+):
+    """
+    Sweeps the running jobs without a heartbeat for more than stale_seconds,
+    other than the jobs of the calling worker: their worker died or was
+    killed, and nothing else would move them out of RUNG. A live job beats
+    every time it reports its progress. Jobs claimed fewer than max_attempts
+    times are queued again; the others fail and their user is notified.
+
+    Args:
+        running_ids (iterable): ids of the jobs the calling worker is running
+        stale_seconds (int, optional): age of the last heartbeat of a running
+            job after which it is abandoned
+        max_attempts (int, optional): claims of a job before it fails
+
+    Returns:
+        Tuple[list, list]: ids of the requeued jobs and of the failed jobs
+    """
+    cutoff = timezone.now() - datetime.timedelta(seconds=stale_seconds)
+    with transaction.atomic():
+        stale = list(
+            ExportJob.objects.select_for_update(skip_locked=True)
+            .filter(status="RUNG", heartbeat_date__lt=cutoff)
+            .exclude(id__in=list(running_ids))
+        )
+        requeued = [job.id for job in stale if job.attempts < max_attempts]
+        ExportJob.objects.filter(id__in=requeued).update(
+            status="QUED", started_date=None, heartbeat_date=None, rows_written=0
+        )
+        failed = [job for job in stale if job.attempts >= max_attempts]
+        for job in failed:
+            job.status = "FAIL"
+            job.error_text = f"Abandoned by its worker {job.attempts} times, the last time without a heartbeat for {stale_seconds} seconds."
+            job.completed_date = timezone.now()
+            job.save(update_fields=["status", "error_text", "completed_date"])
+            notify_user(job)
+    return requeued, [job.id for job in failed]
+
+
+def export_file_path(job: ExportJob) -> pathlib.Path:
+    """
+    Returns the location of the file generated for a job.
+
+    Args:
+        job (ExportJob): export job
+
+    Returns:
+        pathlib.Path: path of the report file
+    """
+    return EXPORT_DIR / job.file_name
+
+
+def _report_rows(job: ExportJob):
+    params = job.parameters
+    if job.report_type == "DOCS":
+        return document_report_rows(
+            params.get("entity_code"),
+            params.get("docket"),
+            params.get("date_from"),
+            params.get("date_to"),
+        )
+    if job.report_type == "SRCH":
+        return search_report_rows(
+            params.get("entity_code"),
+            params.get("kw_list", []),
+            params.get("date_from"),
+            params.get("date_to"),
+        )
+    raise ValueError(f"Unsupported report type {job.report_type}")
+
+
+def run_export_job(job_id: int) -> str:
+    """
+    Generates the report of a claimed job, records its progress and notifies
+    the requesting user through their inbox. Runs in the worker processes.
+
+    The progress updates and the final update only match the job while it is
+    still running the attempt claimed here; once a sweep requeued or failed
+    it, this attempt stops, removes its own file and notifies nobody. Each
+    attempt writes its own file, so it never overwrites the file of the
+    attempt that replaced it.
+
+    Args:
+        job_id (int): id of a job claimed by claim_jobs
+
+    Returns:
+        str: final status of the job, or "abandoned"
+    """
+    job = ExportJob.objects.get(id=job_id)
+    job.file_name = f"utilis_report_{job.id}_{job.attempts}.{job.export_format}"
+    path = export_file_path(job)
+    owned = ExportJob.objects.filter(id=job.id, status="RUNG", attempts=job.attempts)
+
+    def progress(rows):
+        if not owned.update(rows_written=rows, heartbeat_date=timezone.now()):
+            raise ExportAbandoned(f"Export {job.id} attempt {job.attempts}")
+
+    try:
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        headers, rows = _report_rows(job)
+        if job.export_format == "csv":
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                job.rows_written = write_csv(f, headers, rows, progress)
+        else:
+            job.rows_written = write_excel(str(path), headers, rows, progress)
+        job.status = "DONE"
+    except ExportAbandoned:
+        job.status = None
+    except Exception:
+        job.status = "FAIL"
+        job.error_text = traceback.format_exc()
+
+    job.completed_date = timezone.now()
+    finished = job.status is not None and owned.update(
+        status=job.status,
+        file_name=job.file_name,
+        rows_written=job.rows_written,
+        error_text=job.error_text,
+        completed_date=job.completed_date,
+    )
+    if not finished or job.status == "FAIL":
+        if path.exists():
+            path.unlink()
+    if not finished:
+        return "abandoned"
+    notify_user(job)
+    return job.status
+
+
+def notify_user(job: ExportJob):
+    """
+    Sends the outcome of an export job to the requesting user's inbox, with a
+    download link when the export completed.
+
+    Args:
+        job (ExportJob): finished export job
+    """
+    msg_type, _ = UserInboxMessageType.objects.get_or_create(
+        message_type=EXPORT_MESSAGE_TYPE,
+        defaults={"message_type_description": "Report Export"},
+    )
+    if job.status == "DONE":
+        text = f"Your {job.get_report_type_display()} export is ready ({job.rows_written} rows)."
+    else:
+        text = f"Your {job.get_report_type_display()} export failed. Please try again or contact support."
+
+    UserInbox.objects.create(
+        sending_user=job.user,
+        receiving_user=job.user,
+        message_type=msg_type,
+        message_date=datetime.datetime.now(),
+        message_text=text,
+        mark_as_read=False,
+        export_job=job if job.status == "DONE" else None,
+    )
+
+
+def purge_expired_jobs(retention_days: int) -> int:
+    """
+    Deletes finished jobs older than the retention period along with their
+    report files.
+
+    Args:
+        retention_days (int): number of days a finished export is kept
+
+    Returns:
+        int: number of jobs deleted
+    """
+    cutoff = timezone.now() - datetime.timedelta(days=retention_days)
+    expired = ExportJob.objects.filter(
+        status__in=["DONE", "FAIL"], completed_date__lt=cutoff
+    )
+    for job in expired:
+        if job.file_name and export_file_path(job).exists():
+            export_file_path(job).unlink()
+    return expired.delete()[1].get("uose.ExportJob", 0)
@@ -0,0 +1,126 @@
+"""
+UOSE Facets:
+This script contains the search facets of the UOSE application in the
+UtilisWeb project: the number of matching pages and documents by entity,
+docket, document type and filing year, computed with a single grouped query
+and cached by search fingerprint.
+
+Version History:
+- 1.0.0 (2026-10-18): Initial version of the search facets.
+
+Change Log:
+- 2026-10-18: Created the uose_facets.py file.
+- 2026-10-18: Keyed the cached facets on the search generation.
+- 2026-10-18: Computed the facets in a search slot, once per concurrent
+  search.
+- 2026-10-18: Counted the matching pages for every searched document filed
+  under their url.
+"""
+
+from django.conf import settings
+from django.db import connection
+
+from .uose_search import build_search_query, clean_keywords, matching_pages
+from .uose_execution import search_slot, single_flight
+from .uose_search_cache import record_cache_lookup, search_cache_key
+
+# facet name and label, in display order
+FACETS = [
+    ("entity", "Entity"),
+    ("case_number", "Docket"),
+    ("document_type", "Document Type"),
+    ("year", "Filing Year"),
+]
+
+# values shown per facet, by number of matching pages
+FACET_LIMIT = 10
+
+FACET_CACHE_SECONDS = getattr(settings, "UOSE_FACET_CACHE_SECONDS", 600)
+
+# every facet in one scan of the matching pages; GROUPING() tells which
+# grouping set a row belongs to
+_FACET_SQL = """
+    SELECT
+        GROUPING(d.entity_id) = 0 AS by_entity,
+        GROUPING(d.case_number) = 0 AS by_case_number,
+        GROUPING(d.document_type) = 0 AS by_document_type,
+        d.entity_id,
+        d.case_number,
+        d.document_type,
+        EXTRACT(YEAR FROM d.issued_by_entity_date)::integer AS year,
+        COUNT(*) AS pages,
+        COUNT(DISTINCT d.id) AS documents
+    FROM ({matches}) AS m
+    JOIN uose_entitydocument AS d ON d.file_url = m.url
+    WHERE d.id IN ({documents})
+    GROUP BY GROUPING SETS (
+        (d.entity_id),
+        (d.case_number),
+        (d.document_type),
+        (EXTRACT(YEAR FROM d.issued_by_entity_date)::integer)
+    )
+"""
+
+
+def _compute_facets(documents, keywords: list) -> dict:
+    query = build_search_query(keywords)
+    matches_sql, params = (
+        matching_pages(documents, query).values("url").query.sql_with_params()
+    )
+    documents_sql, documents_params = documents.values("id").query.sql_with_params()
+
+    facets = {name: [] for name, _ in FACETS}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _FACET_SQL.format(matches=matches_sql, documents=documents_sql),
+            list(params) + list(documents_params),
+        )
+        for row in cursor.fetchall():
+            by_entity, by_case_number, by_document_type = row[:3]
+            entity, case_number, document_type, year, pages, docs = row[3:]
+            if by_entity:
+                facets["entity"].append((entity, pages, docs))
+            elif by_case_number:
+                facets["case_number"].append((case_number, pages, docs))
+            elif by_document_type:
+                facets["document_type"].append((document_type, pages, docs))
+            else:
+                facets["year"].append((year, pages, docs))
+
+    for name, values in facets.items():
+        if name == "year":
+            values.sort(key=lambda value: value[0], reverse=True)
+        else:
+            values.sort(key=lambda value: (-value[1], value[0]))
+        facets[name] = values[:FACET_LIMIT]
+    return facets
+
+
+def search_facets(documents, kw_list: list, fingerprint: str) -> list:
+    """
+    Returns the facets of a search, from the cache when the same search ran
+    within FACET_CACHE_SECONDS in the current search generation.
+
+    Args:
+        documents (QuerySet): EntityDocument queryset of the documents searched
+        kw_list (list): keywords searched for
+        fingerprint (str): search_fingerprint of the search
+
+    Returns:
+        list: (label, [(value, pages, documents)]) of every facet, in display
+            order; the years are listed newest first, other values by number
+            of pages
+    """
+    keywords = clean_keywords(kw_list)
+    if len(keywords) == 0:
+        return []
+
+    def compute():
+        with search_slot():
+            return _compute_facets(documents, keywords)
+
+    facets, outcome = single_flight(
+        search_cache_key("facets", fingerprint), compute, FACET_CACHE_SECONDS
+    )
+    record_cache_lookup("facets", outcome)
+    return [(label, facets[name]) for name, label in FACETS]
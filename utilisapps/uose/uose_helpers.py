@@ -1,192 +1,235 @@
-import os
-import pathlib
+import csv
 import datetime
-import uuid
-import pandas as pd
-import traceback
-
-from .models import EntityType, Entity, EntityDocument, EntityDocumentMeta, RDSTextModel
-from django.contrib.postgres.search import SearchQuery
-
-
-def generate_excel_report(
+import tempfile
+
+import xlsxwriter
+
+from django.http import FileResponse, StreamingHttpResponse
+
+from .models import EntityDocument
+from .uose_search_backends import get_search_backend
+
+# rows fetched per round trip from the server side cursor
+EXPORT_CHUNK_SIZE = 2000
+
+DOCUMENT_REPORT_COLUMNS = [
+    ("id", "id"),
+    ("entity_id", "Entity"),
+    ("link", "Link"),
+    ("case_number", "Case Number / Docket"),
+    ("filename_description", "File Description"),
+    ("file_url", "File URL"),
+    ("document_type", "Document Type"),
+    ("issued_by_entity_date", "Issued By Entity Date"),
+    ("received_by_entity_date", "Received By Entity Date"),
+    ("submitter_id", "Submitted Id"),
+    ("applicant_id", "Applicant Id"),
+    ("status", "Status"),
+]
+
+SEARCH_REPORT_COLUMNS = [
+    "url",
+    "Page Number",
+    "Keyword",
+    "Count of Keyword",
+    "Page Text",
+]
+
+EXPORT_CONTENT_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+}
+
+
+def document_report_rows(
     entity_code: str, docket: str, date_from: datetime, date_to: datetime
 ):
     """
-    Generates an Excel report based on the provided entity code, start date, and end date.
+    Streams the rows of the document report for an entity or a docket.
 
     Args:
         entity_code (str): The code of the entity for which the report is generated.
+        docket (str): The docket / case number, used when no entity code is given.
         date_from (datetime): The start date for filtering the documents.
         date_to (datetime): The end date for filtering the documents.
 
     Returns:
-        Tuple[int, str]: A tuple containing the status code and the path to the generated Excel report.
-            - If the report is generated successfully, the status code is 0 and the path is returned.
-            - If an error occurs during the generation process, the status code is -1 and None is returned.
-    """
-    dir = pathlib.Path(__file__).parent.absolute()
+        Tuple[list, Iterator]: the report headers and a generator of report rows.
 
-    # get documents from db
-    if entity_code != None:
+    Raises:
+        ValueError: If neither an entity code nor a docket is provided.
+    """
+    if entity_code is not None:
         documents = EntityDocument.objects.filter(
             entity=entity_code,
             issued_by_entity_date__gte=date_from,
             issued_by_entity_date__lte=date_to,
-        ).all()
-    elif docket != None:
+        )
+    elif docket is not None:
         documents = EntityDocument.objects.filter(
             case_number=docket,
             issued_by_entity_date__gte=date_from,
             issued_by_entity_date__lte=date_to,
-        ).all()
+        )
     else:
-        return (
-            -1,
-            "Unsupported query type. Please provide either entity code or docket number.",
+        raise ValueError(
+            "Unsupported query type. Please provide either entity code or docket number."
         )
 
-    try:
-        # conver to list of lists
-        data = [
-            [
-                doc["id"],
-                doc["entity_id"],
-                doc["link"],
-                doc["case_number"],
-                doc["filename_description"],
-                doc["file_url"],
-                doc["document_type"],
-                doc["issued_by_entity_date"],
-                doc["received_by_entity_date"],
-                doc["submitter_id"],
-                doc["applicant_id"],
-                doc["status"],
-            ]
-            for doc in list(documents.values())
-        ]
-        # create dataframe
-        df = pd.DataFrame(
-            data,
-            columns=[
-                "id",
-                "Entity",
-                "Link",
-                "Case Number / Docket",
-                "File Description",
-                "File URL",
-                "Document Type",
-                "Issued By Entity Date",
-                "Received By Entity Date",
-                "Submitted Id",
-                "Applicant Id",
-                "Status",
-            ],
-        )
-        # save to temporary file location
-        uid = uuid.uuid4()
-        df.to_excel(
-            os.path.join(str(dir), "temp", f"utilis_report_{uid}.xlsx"), index=False
-        )
-        return 0, os.path.join(dir, "temp", f"utilis_report_{uid}.xlsx")
-    except Exception as e:
-        print(traceback.format_exc())
-        return -1, e
+    fields = [field for field, _ in DOCUMENT_REPORT_COLUMNS]
+    rows = (
+        documents.order_by("id")
+        .values_list(*fields)
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    return [header for _, header in DOCUMENT_REPORT_COLUMNS], rows
 
 
-def generate_excel_search_results(
-    entity_code: str, kw_list: [], date_from: datetime, date_to: datetime
+def search_report_rows(
+    entity_code: str, kw_list: list, date_from: datetime, date_to: datetime
 ):
     """
-    Generates an Excel report based on the provided entity code, start date, and end date.
+    Streams the keyword hit rows of the search report for an entity.
 
     Args:
         entity_code (str): The code of the entity for which the report is generated.
+        kw_list (list): The keywords searched for.
         date_from (datetime): The start date for filtering the documents.
         date_to (datetime): The end date for filtering the documents.
 
     Returns:
-        Tuple[int, str]: A tuple containing the status code and the path to the generated Excel report.
-            - If the report is generated successfully, the status code is 0 and the path is returned.
-            - If an error occurs during the generation process, the status code is -1 and None is returned.
+        Tuple[list, Iterator]: the report headers and a generator of report rows.
+
+    Raises:
+        ValueError: If no entity code is provided.
     """
-    dir = pathlib.Path(__file__).parent.absolute()
+    if entity_code is None:
+        raise ValueError(
+            "Unsupported query type. Please provide either entity code or docket number."
+        )
 
-    # get documents from db
-    if entity_code != None:
-        documents = EntityDocument.objects.filter(
-            entity=entity_code,
-            issued_by_entity_date__gte=date_from,
-            issued_by_entity_date__lte=date_to,
-        ).all()
+    documents = EntityDocument.objects.filter(
+        entity=entity_code,
+        issued_by_entity_date__gte=date_from,
+        issued_by_entity_date__lte=date_to,
+    )
+    return SEARCH_REPORT_COLUMNS, get_search_backend().keyword_search(
+        documents, kw_list, chunk_size=EXPORT_CHUNK_SIZE
+    )
 
-    else:
-        return (
-            -1,
-            "Unsupported query type. Please provide either entity code or docket number.",
-        )
 
-    document_urls = (
-        EntityDocument.objects.filter(
-            entity=entity_code,
-            issued_by_entity_date__gte=date_from,
-            issued_by_entity_date__lte=date_to,
-            # case_number__in=docket_list,
-            # document_type__in=document_list,
-        )
-        .only("file_url")
-        .values_list("file_url", flat=True)
+def report_filename() -> str:
+    """
+    Returns the download file name of a report, without extension.
+
+    Returns:
+        str: utilis_report_<timestamp>
+    """
+    return f"utilis_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+
+class _Echo:
+    """File like object handing each csv line straight back to the writer."""
+
+    def write(self, value):
+        return value
+
+
+def write_excel(output, headers: list, rows, progress=None) -> int:
+    """
+    Writes report rows to an Excel workbook in xlsxwriter constant memory
+    mode, so only the current row is held in memory.
+
+    Args:
+        output (file): binary file object or path the workbook is written to
+        headers (list): column headers
+        rows (Iterator): report rows
+        progress (callable, optional): called with the number of rows written
+            every EXPORT_CHUNK_SIZE rows
+
+    Returns:
+        int: number of rows written
+    """
+    workbook = xlsxwriter.Workbook(
+        output,
+        {
+            "constant_memory": True,
+            "strings_to_urls": False,
+            "default_date_format": "yyyy-mm-dd",
+        },
     )
-    search_results = []
-
-    for kw in kw_list:
-        # search each document for the keyword
-        if kw != "":
-            search_engine_results = RDSTextModel.objects.filter(
-                url__in=list(document_urls),
-                page_text__search=SearchQuery(kw, search_type="phrase"),
-            ).all()
-            if search_engine_results is not None:
-                # print(search_engine_results)
-                search_results.extend(list(search_engine_results.values()))
-
-    try:
-        # convert to list of lists
-
-        data = []
-        if len(search_results) > 0:
-            for result in search_results:
-                for kw in kw_list:
-                    if kw != "":
-                        data.append(
-                            [
-                                result["url"],
-                                result["page_number"],
-                                kw,
-                                result["page_text"].lower().count(kw.lower()),
-                                result["page_text"],
-                            ]
-                        )
-
-        # create dataframe
-        df = pd.DataFrame(
-            data,
-            columns=[
-                "url",
-                "Page Number",
-                "Keyword",
-                "Count of Keyword",
-                "Page Text",
-            ],
-        )
-        # save to temporary file location
-        uid = uuid.uuid4()
-        df.to_excel(
-            os.path.join(str(dir), "temp", f"utilis_report_{uid}.xlsx"),
-            index=False,
-            engine="xlsxwriter",
+    worksheet = workbook.add_worksheet()
+    worksheet.write_row(0, 0, headers)
+    row_count = 0
+    for row_count, row in enumerate(rows, start=1):
+        worksheet.write_row(row_count, 0, row)
+        if progress is not None and row_count % EXPORT_CHUNK_SIZE == 0:
+            progress(row_count)
+    workbook.close()
+    return row_count
+
+
+def write_csv(output, headers: list, rows, progress=None) -> int:
+    """
+    Writes report rows to a CSV file.
+
+    Args:
+        output (file): text file object the rows are written to
+        headers (list): column headers
+        rows (Iterator): report rows
+        progress (callable, optional): called with the number of rows written
+            every EXPORT_CHUNK_SIZE rows
+
+    Returns:
+        int: number of rows written
+    """
+    writer = csv.writer(output)
+    writer.writerow(headers)
+    row_count = 0
+    for row_count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if progress is not None and row_count % EXPORT_CHUNK_SIZE == 0:
+            progress(row_count)
+    return row_count
+
+
+def _with_headers(headers: list, rows):
+    yield headers
+    yield from rows
+
+
+def export_response(export_format: str, filename: str, headers: list, rows):
+    """
+    Builds the download response of a report.
+
+    CSV is streamed row by row as it is read from the database. Excel is
+    written in constant memory mode to an anonymous temporary file, which is
+    streamed back and removed by the operating system once it is closed.
+
+    Args:
+        export_format (str): "csv" or "xlsx"
+        filename (str): download file name, without extension
+        headers (list): column headers
+        rows (Iterator): report rows
+
+    Returns:
+        django.http.StreamingHttpResponse: the streamed report
+    """
+    if export_format == "csv":
+        writer = csv.writer(_Echo())
+        lines = (writer.writerow(row) for row in _with_headers(headers, rows))
+        response = StreamingHttpResponse(
+            lines, content_type=EXPORT_CONTENT_TYPES["csv"]
         )
-        return 0, os.path.join(dir, "temp", f"utilis_report_{uid}.xlsx")
-    except Exception as e:
-        print(traceback.format_exc())
-        return -1, e
+        response["Content-Disposition"] = f"attachment; filename={filename}.csv"
+        return response
+
+    output = tempfile.TemporaryFile()
+    write_excel(output, headers, rows)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f"{filename}.xlsx",
+        content_type=EXPORT_CONTENT_TYPES["xlsx"],
+    )
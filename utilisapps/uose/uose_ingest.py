@@ -0,0 +1,361 @@
+"""
+UOSE Ingest:
+This script contains the incremental loading of the RDS page text for the
+UOSE application in the UtilisWeb project. Each url is hashed when it is
+read, unchanged documents are skipped and changed documents have their pages
+replaced in a single transaction.
+
+Version History:
+- 1.0.0 (2026-10-18): Initial version of the incremental loader.
+
+Change Log:
+- 2026-10-18: Created the uose_ingest.py file.
+- 2026-10-18: Bumped the search generation when documents are replaced.
+- 2026-10-18: Refreshed the document search index of replaced documents.
+- 2026-10-18: Extracted the docket citations of the pages in the workers and
+  saved them with the pages.
+- 2026-10-18: Computed the MinHash signatures of the pages in the workers,
+  and found the near-duplicate pages and documents of the loaded documents.
+- 2026-10-18: Stored the page text in the content addressed page store; text
+  already stored is not written or indexed again.
+- 2026-10-18: Expired the related document terms of the loaded documents.
+- 2026-10-18: Refreshed the document search index of every document filed
+  under a loaded url.
+- 2026-10-18: Only marked the existing EntityDocumentMeta rows of the loaded
+  documents as loaded to analytics.
+- 2026-10-18: Linked the pages loaded before their document once the
+  document is migrated.
+"""
+
+import pickle
+import hashlib
+import datetime
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import EntityDocument, EntityDocumentMeta, RDSDocumentLoad, RDSTextModel
+from .uose_citations import (
+    extract_dockets,
+    link_citations,
+    save_loaded_citations,
+)
+from .uose_document_index import refresh_document_index
+from .uose_page_store import (
+    page_content_hash,
+    prune_page_contents,
+    store_page_contents,
+)
+from .uose_duplicates import (
+    minhash_signature,
+    refresh_document_signatures,
+    save_loaded_signatures,
+    signature_bytes,
+)
+from .uose_related import expire_document_terms
+from .uose_search_cache import bump_search_generation
+from .uose_text import normalize_page_text
+
+
+# urls linked per transaction by link_documents
+LINK_BATCH_SIZE = 1000
+
+# links the pages of the urls to the oldest document filed under them, and
+# returns the url and previous document of each page whose link changed;
+# setting the title fires the trigger, which computes the title vector
+_LINK_PAGES_SQL = """
+    UPDATE uose_rdstextmodel AS r
+    SET document_id = d.id, document_title = d.filename_description
+    FROM (
+        SELECT DISTINCT ON (file_url) file_url, id, filename_description
+        FROM uose_entitydocument
+        WHERE file_url = ANY(%s)
+        ORDER BY file_url, id
+    ) AS d, uose_rdstextmodel AS p
+    WHERE r.url = d.file_url
+    AND p.id = r.id
+    AND (
+        r.document_id IS DISTINCT FROM d.id
+        OR r.document_title IS DISTINCT FROM d.filename_description
+    )
+    RETURNING r.url, p.document_id
+"""
+
+_LINK_LOADS_SQL = """
+    UPDATE uose_rdsdocumentload AS l
+    SET document_id = d.id
+    FROM (
+        SELECT DISTINCT ON (file_url) file_url, id
+        FROM uose_entitydocument
+        WHERE file_url = ANY(%s)
+        ORDER BY file_url, id
+    ) AS d
+    WHERE l.url = d.file_url
+    AND l.document_id IS DISTINCT FROM d.id
+"""
+
+
+def content_hash(pages: dict) -> str:
+    """
+    Hashes the raw text of a document, page by page in page number order.
+
+    Args:
+        pages (dict): {page_number: page_text} of a document
+
+    Returns:
+        str: hex sha256 digest
+    """
+    digest = hashlib.sha256()
+    for page_number in sorted(pages, key=int):
+        digest.update(f"{int(page_number)}\x1f".encode())
+        digest.update(pages[page_number].encode("utf-8", "surrogatepass"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+def loaded_hashes() -> dict:
+    """
+    Returns the content hash of every url already loaded.
+
+    Returns:
+        dict: {url: content_hash}
+    """
+    return dict(RDSDocumentLoad.objects.values_list("url", "content_hash"))
+
+
+def prepare_pickle_file(path: str, known_hashes: dict) -> tuple:
+    """
+    Unpickles an analytics file, skips the documents whose content hash is
+    unchanged, normalizes the text of the others, extracts the dockets their
+    pages cite and computes the MinHash signatures of their pages. Runs in
+    the loader worker processes.
+
+    Args:
+        path (str): path of the pickle file, a {url: {page_number: text}} dict
+        known_hashes (dict): {url: content_hash} from loaded_hashes
+
+    Returns:
+        Tuple[list, int, list]: (url, content_hash, [(page_number, page_text,
+            {docket number: mentions}, signature bytes)]) documents to load, the number of unchanged documents, and the
+            urls that could not be processed, with their error
+    """
+    with open(path, "rb") as t_file:
+        rds_db = pickle.load(t_file)
+
+    documents = []
+    unchanged = 0
+    errors = []
+    for url, text in rds_db.items():
+        try:
+            digest = content_hash(text)
+            if known_hashes.get(url) == digest:
+                unchanged += 1
+                continue
+            pages = []
+            for p_number, p_text in text.items():
+                p_text = normalize_page_text(p_text)
+                pages.append(
+                    (
+                        int(p_number),
+                        p_text,
+                        extract_dockets(p_text),
+                        signature_bytes(minhash_signature(p_text)),
+                    )
+                )
+            documents.append((url, digest, pages))
+        except Exception as ex:
+            errors.append((url, repr(ex)))
+    return documents, unchanged, errors
+
+
+def documents_by_url() -> dict:
+    """
+    Maps file urls to documents, so pages are linked on insert and carry
+    the document title weighted in their search vector. The oldest document
+    filed under a url wins.
+
+    Returns:
+        dict: {file_url: (document id, filename description)}
+    """
+    documents = {}
+    for file_url, doc_id, title in EntityDocument.objects.order_by("-id").values_list(
+        "file_url", "id", "filename_description"
+    ):
+        documents[file_url] = (doc_id, title)
+    return documents
+
+
+def _copy_pages(rows: list):
+    columns = "url, document_id, document_title, page_number, content_id"
+    with connection.cursor() as cursor:
+        with cursor.copy(
+            f"COPY {RDSTextModel._meta.db_table} ({columns}) FROM STDIN"
+        ) as copy:
+            for row in rows:
+                copy.write_row(row)
+
+
+def _bulk_create_pages(rows: list):
+    RDSTextModel.objects.bulk_create(
+        [
+            RDSTextModel(
+                url=url,
+                document_id=document_id,
+                document_title=document_title,
+                page_number=page_number,
+                content_id=content_hash,
+            )
+            for url, document_id, document_title, page_number, content_hash in rows
+        ]
+    )
+
+
+def replace_documents(documents: list, linked: dict, loader: str = "copy"):
+    """
+    Replaces the pages of the given documents and records their load, in a
+    single transaction: readers see either the previous or the new pages of
+    a document, never a mix. Only the page texts new to the page store are
+    written and indexed, and the texts no page uses anymore are deleted.
+    Loaded documents are marked in EntityDocumentMeta, the dockets cited by
+    their pages are indexed, the near-duplicates of their pages and
+    documents are found, their document search index rows are rebuilt, their
+    related document terms are expired and cached searches are invalidated.
+
+    Args:
+        documents (list): (url, content_hash, [(page_number, page_text,
+            dockets, signature)]) from prepare_pickle_file
+        linked (dict): {file_url: (document id, title)} from documents_by_url
+        loader (str): "copy" for COPY FROM STDIN or "bulk" for bulk_create
+    """
+    urls = [url for url, _, _ in documents]
+    contents = {}
+    rows = []
+    for url, _, pages in documents:
+        for page_number, page_text, _, _ in pages:
+            content_hash = page_content_hash(page_text)
+            contents[content_hash] = page_text
+            rows.append((url, *linked.get(url, (None, "")), page_number, content_hash))
+    page_dockets = {
+        (url, page_number): dockets
+        for url, _, pages in documents
+        for page_number, _, dockets, _ in pages
+        if len(dockets) > 0
+    }
+    page_signatures = {
+        (url, page_number): signature
+        for url, _, pages in documents
+        for page_number, _, _, signature in pages
+        if signature is not None
+    }
+    loads = [
+        RDSDocumentLoad(
+            url=url,
+            document_id=linked.get(url, (None, ""))[0],
+            content_hash=digest,
+            page_count=len(pages),
+            loaded_date=timezone.now(),
+        )
+        for url, digest, pages in documents
+    ]
+
+    with transaction.atomic():
+        previous = set(
+            RDSTextModel.objects.filter(url__in=urls).values_list(
+                "content_id", flat=True
+            )
+        )
+        RDSTextModel.objects.filter(url__in=urls).delete()
+        store_page_contents(contents, loader)
+        if loader == "copy":
+            _copy_pages(rows)
+        else:
+            _bulk_create_pages(rows)
+        prune_page_contents(previous - set(contents))
+        loaded_pages = list(
+            RDSTextModel.objects.filter(url__in=urls).values_list(
+                "id", "url", "page_number", "document_id"
+            )
+        )
+        save_loaded_citations(loaded_pages, page_dockets)
+        save_loaded_signatures(loaded_pages, page_signatures)
+        RDSDocumentLoad.objects.bulk_create(
+            loads,
+            update_conflicts=True,
+            unique_fields=["url"],
+            update_fields=["document", "content_hash", "page_count", "loaded_date"],
+        )
+        # every document filed under a loaded url is marked and indexed
+        loaded_ids = list(
+            EntityDocument.objects.filter(file_url__in=urls).values_list(
+                "id", flat=True
+            )
+        )
+        mark_loaded_to_analytics(loaded_ids)
+        document_ids = [linked[url][0] for url, _, _ in documents if url in linked]
+        refresh_document_index(loaded_ids)
+        refresh_document_signatures(document_ids)
+        expire_document_terms(document_ids)
+        # cached searches are stale once the new pages commit
+        bump_search_generation()
+
+
+def link_documents(urls: list) -> int:
+    """
+    Links the pages and the load of the given urls to the oldest document
+    filed under each url, in a single transaction, for the pages loaded
+    before their document was migrated or whose document was deleted. Pages
+    already linked to that document are left as they are, so linking again
+    is a no-op. The citations of the relinked pages follow them, and the
+    documents of the relinked urls are marked, indexed, signed and have
+    their related document terms expired as when their pages are loaded.
+
+    Args:
+        urls (list): file urls of the documents, at most LINK_BATCH_SIZE
+
+    Returns:
+        int: number of pages linked
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(_LINK_PAGES_SQL, [urls])
+            relinked = cursor.fetchall()
+            cursor.execute(_LINK_LOADS_SQL, [urls])
+        if len(relinked) == 0:
+            return 0
+
+        linked_urls = sorted({url for url, _ in relinked})
+        link_citations(linked_urls)
+        documents = EntityDocument.objects.filter(file_url__in=linked_urls)
+        loaded_ids = list(documents.values_list("id", flat=True))
+        mark_loaded_to_analytics(loaded_ids)
+        refresh_document_index(loaded_ids)
+        # the documents the pages were linked to before lose their signature
+        document_ids = set(
+            RDSTextModel.objects.filter(url__in=linked_urls).values_list(
+                "document_id", flat=True
+            )
+        )
+        document_ids |= {doc_id for _, doc_id in relinked}
+        refresh_document_signatures(document_ids)
+        expire_document_terms(document_ids)
+        # cached searches are stale once the new links commit
+        bump_search_generation()
+    return len(relinked)
+
+
+def mark_loaded_to_analytics(document_ids: list) -> int:
+    """
+    Sets is_loaded_to_analytics and the analytics scrape date of the loaded
+    documents. Only existing EntityDocumentMeta rows are updated: their
+    content type and size come from the document scrape, which the loader
+    does not know.
+
+    Args:
+        document_ids (list): ids of the loaded documents
+
+    Returns:
+        int: number of EntityDocumentMeta rows updated
+    """
+    return EntityDocumentMeta.objects.filter(doc_id__in=document_ids).update(
+        is_loaded_to_analytics=True, analytics_scrape_date=datetime.date.today()
+    )
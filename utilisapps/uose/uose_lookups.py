@@ -0,0 +1,239 @@
+"""
+UOSE Lookups:
+This script contains the docket and document type lookup tables of the UOSE
+application in the UtilisWeb project: their refresh after documents are
+loaded, and the typeahead matching used by the search form pickers.
+
+Version History:
+- 1.0.0 (2026-10-18): Initial version of the lookup tables.
+
+Change Log:
+- 2026-10-18: Created the uose_lookups.py file.
+- 2026-10-18: Added the trigram indexed fuzzy lookups of dockets, document
+  descriptions and entities.
+"""
+
+from django.contrib.postgres.search import TrigramSimilarity, TrigramWordSimilarity
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import DocketLookup, DocumentTypeLookup, Entity, EntityDocument
+
+# suggestions returned per typeahead request
+LOOKUP_LIMIT = 20
+
+# suggestions returned per category of the quick search
+QUICK_SEARCH_LIMIT = 5
+
+# fuzzy matches use the pg_trgm % and %> operators, served by the trigram GIN
+# indexes; their thresholds are the pg_trgm.similarity_threshold (0.3) and
+# pg_trgm.word_similarity_threshold (0.6) settings
+
+_REFRESH_DOCKETS_SQL = """
+    INSERT INTO uose_docketlookup (case_number, document_count, latest_issued_date)
+    SELECT case_number, COUNT(*), MAX(issued_by_entity_date)
+    FROM uose_entitydocument
+    GROUP BY case_number
+    ON CONFLICT (case_number) DO UPDATE
+    SET document_count = EXCLUDED.document_count,
+        latest_issued_date = EXCLUDED.latest_issued_date
+    WHERE uose_docketlookup.document_count IS DISTINCT FROM EXCLUDED.document_count
+    OR uose_docketlookup.latest_issued_date IS DISTINCT FROM EXCLUDED.latest_issued_date
+"""
+
+_PRUNE_DOCKETS_SQL = """
+    DELETE FROM uose_docketlookup AS l
+    WHERE NOT EXISTS (
+        SELECT 1 FROM uose_entitydocument AS d WHERE d.case_number = l.case_number
+    )
+"""
+
+_REFRESH_DOCUMENT_TYPES_SQL = """
+    INSERT INTO uose_documenttypelookup (document_type, document_count)
+    SELECT document_type, COUNT(*)
+    FROM uose_entitydocument
+    GROUP BY document_type
+    ON CONFLICT (document_type) DO UPDATE
+    SET document_count = EXCLUDED.document_count
+    WHERE uose_documenttypelookup.document_count IS DISTINCT FROM EXCLUDED.document_count
+"""
+
+_PRUNE_DOCUMENT_TYPES_SQL = """
+    DELETE FROM uose_documenttypelookup AS l
+    WHERE NOT EXISTS (
+        SELECT 1 FROM uose_entitydocument AS d WHERE d.document_type = l.document_type
+    )
+"""
+
+
+def refresh_lookups():
+    """
+    Brings the docket and document type lookup tables in line with
+    EntityDocument, in one transaction. Only changed rows are written, so
+    readers are never blocked. Run after documents are loaded.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        for sql in [
+            _REFRESH_DOCKETS_SQL,
+            _PRUNE_DOCKETS_SQL,
+            _REFRESH_DOCUMENT_TYPES_SQL,
+            _PRUNE_DOCUMENT_TYPES_SQL,
+        ]:
+            cursor.execute(sql)
+
+
+def _typeahead(queryset, field: str, term: str, default_order: str) -> list:
+    term = (term or "").strip()
+    if term == "":
+        return list(
+            queryset.order_by(default_order).values_list(field, flat=True)[
+                :LOOKUP_LIMIT
+            ]
+        )
+
+    # prefix matches first, served by the index on the upper cased value
+    values = list(
+        queryset.filter(**{f"{field}__istartswith": term})
+        .order_by(default_order)
+        .values_list(field, flat=True)[:LOOKUP_LIMIT]
+    )
+    if len(values) < LOOKUP_LIMIT:
+        # then close spellings, e.g. a mistyped docket number
+        values += list(
+            queryset.filter(**{f"{field}__trigram_similar": term})
+            .annotate(similarity=TrigramSimilarity(field, term))
+            .exclude(**{f"{field}__in": values})
+            .order_by("-similarity", default_order)
+            .values_list(field, flat=True)[: LOOKUP_LIMIT - len(values)]
+        )
+    return values
+
+
+def docket_suggestions(term: str) -> list:
+    """
+    Returns the dockets matching a typeahead term: the dockets starting with
+    the term, newest first, followed by the closest trigram matches.
+
+    Args:
+        term (str): text typed in the docket picker
+
+    Returns:
+        list: matching case numbers, at most LOOKUP_LIMIT
+    """
+    return _typeahead(DocketLookup.objects.all(), "case_number", term, "-case_number")
+
+
+def document_type_suggestions(term: str) -> list:
+    """
+    Returns the document types matching a typeahead term: the types starting
+    with the term, followed by the closest trigram matches.
+
+    Args:
+        term (str): text typed in the document type picker
+
+    Returns:
+        list: matching document types, at most LOOKUP_LIMIT
+    """
+    return _typeahead(
+        DocumentTypeLookup.objects.all(), "document_type", term, "document_type"
+    )
+
+
+def fuzzy_dockets(term: str, limit=QUICK_SEARCH_LIMIT) -> list:
+    """
+    Returns the dockets closest to a possibly misspelled docket number.
+
+    Args:
+        term (str): docket number as typed, e.g. "EB-2023-0143"
+        limit (int, optional): number of suggestions
+
+    Returns:
+        list: {case_number, document_count, latest_issued_date, similarity}
+            of the closest dockets, best match first
+    """
+    term = (term or "").strip()
+    if term == "":
+        return []
+    return list(
+        DocketLookup.objects.filter(
+            Q(case_number__istartswith=term) | Q(case_number__trigram_similar=term)
+        )
+        .annotate(similarity=TrigramSimilarity("case_number", term))
+        .order_by("-similarity", "-case_number")
+        .values("case_number", "document_count", "latest_issued_date", "similarity")[
+            :limit
+        ]
+    )
+
+
+def fuzzy_documents(term: str, limit=QUICK_SEARCH_LIMIT) -> list:
+    """
+    Returns the documents whose description contains words close to a
+    description fragment.
+
+    Args:
+        term (str): description fragment as typed
+        limit (int, optional): number of suggestions
+
+    Returns:
+        list: {id, case_number, filename_description, issued_by_entity_date,
+            similarity} of the closest documents, best match first
+    """
+    term = (term or "").strip()
+    if term == "":
+        return []
+    return list(
+        EntityDocument.objects.filter(filename_description__trigram_word_similar=term)
+        .annotate(similarity=TrigramWordSimilarity(term, "filename_description"))
+        .order_by("-similarity", "-issued_by_entity_date")
+        .values(
+            "id",
+            "case_number",
+            "filename_description",
+            "issued_by_entity_date",
+            "similarity",
+        )[:limit]
+    )
+
+
+def fuzzy_entities(term: str, limit=QUICK_SEARCH_LIMIT) -> list:
+    """
+    Returns the entities whose code matches or whose name is close to a term.
+
+    Args:
+        term (str): entity code or name as typed
+        limit (int, optional): number of suggestions
+
+    Returns:
+        list: {entity, entity_name, similarity} of the closest entities, best
+            match first
+    """
+    term = (term or "").strip()
+    if term == "":
+        return []
+    return list(
+        Entity.objects.filter(
+            Q(entity__iexact=term) | Q(entity_name__trigram_word_similar=term)
+        )
+        .annotate(similarity=TrigramWordSimilarity(term, "entity_name"))
+        .order_by("-similarity", "entity_name")
+        .values("entity", "entity_name", "similarity")[:limit]
+    )
+
+
+def quick_search(term: str) -> dict:
+    """
+    Runs the fuzzy lookups of the global quick search box.
+
+    Args:
+        term (str): text typed in the quick search box
+
+    Returns:
+        dict: {"dockets": [...], "documents": [...], "entities": [...]}
+            from fuzzy_dockets, fuzzy_documents and fuzzy_entities
+    """
+    return {
+        "dockets": fuzzy_dockets(term),
+        "documents": fuzzy_documents(term),
+        "entities": fuzzy_entities(term),
+    }
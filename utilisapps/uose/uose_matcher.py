@@ -0,0 +1,94 @@
+"""
+UOSE Matcher:
+This script contains the keyword matcher used to count the keywords of a
+search on the page text of the UOSE application in the UtilisWeb project.
+
+The page is case folded once and every keyword is then counted with the C
+substring search of str, instead of lowercasing the page again for every
+keyword.
+
+Version History:
+- 1.0.0 (2026-10-18): Initial version of the keyword matcher.
+
+Change Log:
+- 2026-10-18: Created the uose_matcher.py file.
+"""
+
+
+def _is_word_char(text: str, i: int) -> bool:
+    return 0 <= i < len(text) and (text[i].isalnum() or text[i] == "_")
+
+
+class KeywordMatcher:
+    """Counts the occurrences of a set of keywords in a text.
+
+    Counts follow str.count: the occurrences of each keyword are counted
+    without overlapping each other, while different keywords may overlap,
+    e.g. "rate" and "rate base" are both counted in "rate base".
+
+    Args:
+        keywords (list): keywords to count
+        case_sensitive (bool, optional): match the exact case; by default the
+            keywords and the text are case folded
+        whole_words (bool, optional): only count occurrences that are not
+            part of a longer word
+    """
+
+    def __init__(self, keywords: list, case_sensitive=False, whole_words=False):
+        self.keywords = list(keywords)
+        self.case_sensitive = case_sensitive
+        self.whole_words = whole_words
+        self._patterns = [self._fold(kw) for kw in self.keywords]
+
+    def _fold(self, text: str) -> str:
+        return text if self.case_sensitive else text.casefold()
+
+    def _count_words(self, text: str, pattern: str) -> int:
+        # occurrences are found by str.find; only the characters around each
+        # occurrence are checked in python
+        count = 0
+        start = 0
+        while True:
+            i = text.find(pattern, start)
+            if i < 0:
+                return count
+            end = i + len(pattern)
+            if _is_word_char(text, i - 1) or _is_word_char(text, end):
+                start = i + 1
+            else:
+                count += 1
+                start = end
+
+    def count(self, text: str) -> list:
+        """
+        Counts every keyword in the text, folding the text only once.
+
+        Args:
+            text (str): text to search, e.g. the text of a page
+
+        Returns:
+            list: the count of each keyword, in keyword order
+        """
+        text = self._fold(text or "")
+        if self.whole_words:
+            return [
+                self._count_words(text, pattern) if pattern else 0
+                for pattern in self._patterns
+            ]
+        return [text.count(pattern) if pattern else 0 for pattern in self._patterns]
+
+    def hits(self, text: str) -> list:
+        """
+        Counts the keywords and keeps the ones found.
+
+        Args:
+            text (str): text to search
+
+        Returns:
+            list: (keyword, count) of every keyword found, in keyword order
+        """
+        return [
+            (kw, count)
+            for kw, count in zip(self.keywords, self.count(text))
+            if count > 0
+        ]
@@ -0,0 +1,215 @@
+"""
+UOSE Page Store:
+This script contains the content addressed page text store of the UOSE
+application in the UtilisWeb project. The text of the RDS pages is stored
+once per distinct text in PageContent, keyed by its sha256, and the pages
+reference it: cover letters, boilerplate and exhibits filed again are stored
+and indexed once, and loading a page whose text is already stored skips its
+text search indexing.
+
+Version History:
+- 1.0.0 (2026-10-18): Initial version of the page store.
+
+Change Log:
+- 2026-10-18: Created the uose_page_store.py file.
+- 2026-10-18: Locked the stored texts against the prune of a concurrent load,
+  and pruned only the texts no concurrent load is reusing.
+"""
+
+import hashlib
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import PageContent
+
+# texts saved per query by the bulk loader
+CONTENT_BATCH_SIZE = 2000
+
+# new texts are copied to a staging table first, as COPY cannot skip the
+# texts stored by a concurrent load
+_STAGE_SQL = """
+    CREATE TEMPORARY TABLE IF NOT EXISTS uose_pagecontent_load (
+        content_hash varchar(64),
+        page_text text
+    ) ON COMMIT DELETE ROWS
+"""
+
+_MERGE_SQL = """
+    INSERT INTO uose_pagecontent (content_hash, page_text, created_date)
+    SELECT content_hash, page_text, %s
+    FROM uose_pagecontent_load
+    ON CONFLICT (content_hash) DO NOTHING
+"""
+
+# texts already stored are share locked until the pages referencing them
+# commit, so a concurrent load cannot prune them in between
+_LOCK_STORED_SQL = """
+    SELECT content_hash
+    FROM uose_pagecontent
+    WHERE content_hash = ANY(%s)
+    FOR KEY SHARE
+"""
+
+# texts reused by a concurrent load are skipped, not waited for; the prune
+# runs in its own statement, so it sees the pages committed before the lock
+_LOCK_PRUNED_SQL = """
+    SELECT content_hash
+    FROM uose_pagecontent
+    WHERE content_hash = ANY(%s)
+    FOR UPDATE SKIP LOCKED
+"""
+
+_PRUNE_SQL = """
+    DELETE FROM uose_pagecontent AS c
+    WHERE c.content_hash = ANY(%s)
+    AND NOT EXISTS (SELECT 1 FROM uose_rdstextmodel AS p WHERE p.content_id = c.content_hash)
+"""
+
+# texts of pages deleted with their document, outside of replace_documents
+_PRUNE_UNREFERENCED_SQL = """
+    DELETE FROM uose_pagecontent AS c
+    WHERE NOT EXISTS (SELECT 1 FROM uose_rdstextmodel AS p WHERE p.content_id = c.content_hash)
+"""
+
+_STATS_SQL = """
+    SELECT
+        (SELECT COUNT(*) FROM uose_rdstextmodel),
+        (SELECT COUNT(*) FROM uose_pagecontent),
+        pg_total_relation_size('uose_pagecontent'),
+        pg_relation_size('uose_pagecontent_vector')
+"""
+
+
+def page_content_hash(page_text: str) -> str:
+    """
+    Hashes a normalized page text, like the migration to the page store.
+
+    Args:
+        page_text (str): normalized page text
+
+    Returns:
+        str: hex sha256 digest of the utf-8 text
+    """
+    return hashlib.sha256(page_text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def _copy_contents(contents: list):
+    # the staged rows only last until the end of the transaction
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(_STAGE_SQL)
+        cursor.execute("TRUNCATE uose_pagecontent_load")
+        with cursor.copy(
+            "COPY uose_pagecontent_load (content_hash, page_text) FROM STDIN"
+        ) as copy:
+            for row in contents:
+                copy.write_row(row)
+        cursor.execute(_MERGE_SQL, [timezone.now()])
+
+
+def _bulk_create_contents(contents: list):
+    PageContent.objects.bulk_create(
+        [
+            PageContent(content_hash=content_hash, page_text=page_text)
+            for content_hash, page_text in contents
+        ],
+        batch_size=CONTENT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def store_page_contents(contents: dict, loader: str = "copy") -> int:
+    """
+    Stores the texts not in the page store yet; texts already stored are
+    neither written nor indexed again. Must run in the transaction writing
+    the pages: the texts already stored are locked until it commits, so a
+    concurrent load cannot prune them before the pages reference them, and
+    texts a concurrent load stores first are skipped.
+
+    Args:
+        contents (dict): {content_hash: page_text} of the pages to load
+        loader (str): "copy" for COPY FROM STDIN or "bulk" for bulk_create
+
+    Returns:
+        int: number of texts new to the store
+    """
+    if len(contents) == 0:
+        return 0
+    added = None
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(_LOCK_STORED_SQL, [list(contents)])
+            stored = {row[0] for row in cursor.fetchall()}
+        new = [
+            (content_hash, page_text)
+            for content_hash, page_text in contents.items()
+            if content_hash not in stored
+        ]
+        if added is None:
+            added = len(new)
+        if len(new) == 0:
+            return added
+        # the texts skipped as stored by a concurrent load are locked by the
+        # next pass, which stores them again if they were pruned in between
+        if loader == "copy":
+            _copy_contents(new)
+        else:
+            _bulk_create_contents(new)
+
+
+def prune_page_contents(content_hashes) -> int:
+    """
+    Deletes the given texts when no page references them anymore, e.g. the
+    previous text of reloaded pages. Texts locked by a concurrent load
+    storing pages with them are left in place; prune_unreferenced_contents
+    deletes them if that load does not use them in the end.
+
+    Args:
+        content_hashes (iterable): hashes of the texts pages stopped using
+
+    Returns:
+        int: number of texts deleted
+    """
+    hashes = sorted(set(content_hashes))
+    if len(hashes) == 0:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(_LOCK_PRUNED_SQL, [hashes])
+        locked = [row[0] for row in cursor.fetchall()]
+        if len(locked) == 0:
+            return 0
+        cursor.execute(_PRUNE_SQL, [locked])
+        return cursor.rowcount
+
+
+def prune_unreferenced_contents() -> int:
+    """
+    Deletes every text no page references anymore.
+
+    Returns:
+        int: number of texts deleted
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(_PRUNE_UNREFERENCED_SQL)
+        return cursor.rowcount
+
+
+def page_store_stats() -> dict:
+    """
+    Returns the size of the page store.
+
+    Returns:
+        dict: {"pages", "contents", "shared_pages", "store_bytes",
+            "index_bytes"}; shared pages reference a text stored for another
+            page, once the unreferenced texts are pruned
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(_STATS_SQL)
+        pages, contents, store_bytes, index_bytes = cursor.fetchone()
+    return {
+        "pages": pages,
+        "contents": contents,
+        "shared_pages": pages - contents,
+        "store_bytes": store_bytes,
+        "index_bytes": index_bytes,
+    }
@@ -0,0 +1,349 @@
+"""
+UOSE Query:
+This script contains the keyword query parser of the UOSE application in the
+UtilisWeb project. A keyword may be a boolean expression, compiled into a
+single tsquery matched on the indexed search vectors:
+
+- words next to each other form a phrase, e.g. rate base;
+- "quoted phrases" may contain the operator words;
+- AND, OR and NOT combine phrases, AND binding tighter than OR; phrases or
+  groups next to each other are ANDed;
+- a NEAR/n b matches a and b at most n words apart, in either order, using
+  the <N> distance operator of tsquery;
+- parentheses group expressions.
+
+The same syntax tree compiles into the MATCH expression of the SQLite FTS5
+search backend.
+
+Operators are upper case, so lower case "and", "or", "not" and "near" are
+searched as words.
+
+Version History:
+- 1.0.0 (2026-10-18): Initial version of the query parser.
+
+Change Log:
+- 2026-10-18: Created the uose_query.py file.
+- 2026-10-18: Added the relaxed tsquery of the document search index.
+- 2026-10-18: Added the FTS5 MATCH expression of the SQLite search backend.
+"""
+
+import re
+
+# largest distance of a NEAR/n operator
+NEAR_MAX_DISTANCE = 10
+
+_TOKEN_PATTERN = re.compile(
+    r'\s*(?:(?P<quoted>"[^"]*"?)|(?P<open>\()|(?P<close>\))'
+    r"|(?P<near>NEAR/\d+)(?=[\s()\"]|$)|(?P<op>AND|OR|NOT)(?=[\s()\"]|$)"
+    r'|(?P<word>[^\s()"]+))'
+)
+
+
+class QuerySyntaxError(ValueError):
+    """Raised when a keyword expression cannot be parsed."""
+
+
+def _tokenize(text: str) -> list:
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN_PATTERN.match(text, position)
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "quoted":
+            if len(value) < 2 or not value.endswith('"'):
+                raise QuerySyntaxError(f"Unclosed quote in: {text}")
+            value = value[1:-1].strip()
+            if value == "":
+                raise QuerySyntaxError(f"Empty quoted phrase in: {text}")
+        elif kind == "near":
+            value = int(value.split("/")[1])
+            if not 0 < value <= NEAR_MAX_DISTANCE:
+                raise QuerySyntaxError(
+                    f"NEAR distance must be between 1 and {NEAR_MAX_DISTANCE}."
+                )
+        tokens.append((kind, value))
+        position = match.end()
+    return tokens
+
+
+def is_expression(keyword: str) -> bool:
+    """
+    Tells whether a keyword uses the query syntax, or is a plain phrase.
+
+    Args:
+        keyword (str): keyword as entered
+
+    Returns:
+        bool: True if the keyword contains operators, quotes or parentheses
+    """
+    return any(kind != "word" for kind, _ in _tokenize(keyword))
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.position = 0
+
+    def _peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return (None, None)
+
+    def _next(self):
+        token = self._peek()
+        self.position += 1
+        return token
+
+    def _error(self, message: str):
+        raise QuerySyntaxError(f"{message} in: {self.text}")
+
+    def parse(self):
+        if len(self.tokens) == 0:
+            self._error("Empty query")
+        node = self._or()
+        if self.position < len(self.tokens):
+            self._error("Unexpected )")
+        return node
+
+    def _or(self):
+        nodes = [self._and()]
+        while self._peek() == ("op", "OR"):
+            self._next()
+            nodes.append(self._and())
+        return nodes[0] if len(nodes) == 1 else ("or", nodes)
+
+    def _and(self):
+        nodes = [self._not()]
+        while True:
+            kind, value = self._peek()
+            if kind == "op" and value == "AND":
+                self._next()
+            elif kind in ("word", "quoted", "open") or (kind, value) == ("op", "NOT"):
+                pass  # implicit AND
+            else:
+                break
+            nodes.append(self._not())
+        return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+    def _not(self):
+        if self._peek() == ("op", "NOT"):
+            self._next()
+            return ("not", self._not())
+        return self._near()
+
+    def _near(self):
+        node = self._primary()
+        while self._peek()[0] == "near":
+            _, distance = self._next()
+            node = ("near", distance, node, self._primary())
+        return node
+
+    def _primary(self):
+        kind, value = self._next()
+        if kind == "word":
+            # consecutive words form a phrase
+            words = [value]
+            while self._peek()[0] == "word":
+                words.append(self._next()[1])
+            return ("term", " ".join(words))
+        if kind == "quoted":
+            return ("term", " ".join(value.split()))
+        if kind == "open":
+            node = self._or()
+            if self._next()[0] != "close":
+                self._error("Missing )")
+            return node
+        if kind is None:
+            self._error("Incomplete query")
+        self._error(f"Unexpected {f'NEAR/{value}' if kind == 'near' else value}")
+
+
+def parse_query(text: str):
+    """
+    Parses a keyword expression.
+
+    Args:
+        text (str): keyword expression, e.g. deferral NEAR/5 account AND NOT gas
+
+    Returns:
+        tuple: syntax tree of ("term", phrase), ("and", [nodes]),
+            ("or", [nodes]), ("not", node) and ("near", distance, node, node)
+
+    Raises:
+        QuerySyntaxError: if the expression is not valid
+    """
+    return _Parser(text).parse()
+
+
+def _has_not(node) -> bool:
+    if node[0] == "term":
+        return False
+    if node[0] == "not":
+        return True
+    if node[0] == "near":
+        return _has_not(node[2]) or _has_not(node[3])
+    return any(_has_not(child) for child in node[1])
+
+
+def _quote(phrase: str) -> str:
+    # a quoted operand is normalized by to_tsquery; several words become a
+    # phrase
+    return "'" + phrase.lower().replace("\\", "\\\\").replace("'", "''") + "'"
+
+
+def compile_tsquery(node) -> str:
+    """
+    Compiles a syntax tree into the text of a tsquery, to be normalized by
+    to_tsquery with the search configuration.
+
+    Args:
+        node (tuple): syntax tree from parse_query
+
+    Returns:
+        str: tsquery text
+
+    Raises:
+        QuerySyntaxError: if NOT is used inside a NEAR operand
+    """
+    kind = node[0]
+    if kind == "term":
+        return _quote(node[1])
+    if kind == "not":
+        return f"!({compile_tsquery(node[1])})"
+    if kind == "near":
+        _, distance, left, right = node
+        if _has_not(left) or _has_not(right):
+            raise QuerySyntaxError("NOT cannot be used inside a NEAR operand.")
+        left, right = compile_tsquery(left), compile_tsquery(right)
+        # within distance words, in either order
+        return (
+            "("
+            + " | ".join(
+                f"({first}) <{d}> ({second})"
+                for first, second in [(left, right), (right, left)]
+                for d in range(1, distance + 1)
+            )
+            + ")"
+        )
+    operator = " & " if kind == "and" else " | "
+    return "(" + operator.join(compile_tsquery(child) for child in node[1]) + ")"
+
+
+def relaxed_tsquery(node):
+    """
+    Compiles a syntax tree into the text of a looser tsquery, matching at
+    least every document with a page matching the expression, e.g. to search
+    a merged document vector first: NEAR becomes AND, and NOT is left out,
+    since a page without a phrase may belong to a document containing it.
+    The distance operators of the phrases are relaxed once normalized.
+
+    Args:
+        node (tuple): syntax tree from parse_query
+
+    Returns:
+        str: tsquery text, None when the expression also matches documents
+            without any of its phrases, e.g. NOT gas
+    """
+    kind = node[0]
+    if kind == "term":
+        return _quote(node[1])
+    if kind == "not":
+        return None
+    if kind == "near":
+        children, operator = [node[2], node[3]], " & "
+    else:
+        children, operator = node[1], " & " if kind == "and" else " | "
+
+    parts = [relaxed_tsquery(child) for child in children]
+    if operator == " | " and None in parts:
+        return None
+    parts = [part for part in parts if part is not None]
+    if len(parts) == 0:
+        return None
+    return "(" + operator.join(parts) + ")"
+
+
+def positive_terms(node) -> list:
+    """
+    Returns the phrases a matching page contains, i.e. the phrases of the
+    expression not under a NOT, used to count the keywords on a page.
+
+    Args:
+        node (tuple): syntax tree from parse_query
+
+    Returns:
+        list: phrases, in expression order
+    """
+    kind = node[0]
+    if kind == "term":
+        return [node[1]]
+    if kind == "not":
+        return []
+    if kind == "near":
+        return positive_terms(node[2]) + positive_terms(node[3])
+    return [term for child in node[1] for term in positive_terms(child)]
+
+
+def _fts5_phrase(phrase: str) -> str:
+    # an FTS5 string is tokenized like the text; several words are a phrase
+    return '"' + phrase.replace('"', '""') + '"'
+
+
+def _fts5_near_phrases(node) -> list:
+    # FTS5 NEAR only takes phrases; an operand ORing phrases is expanded
+    if node[0] == "term":
+        return [node[1]]
+    if node[0] == "or":
+        return [phrase for child in node[1] for phrase in _fts5_near_phrases(child)]
+    raise QuerySyntaxError("Only phrases and OR can be used inside a NEAR operand.")
+
+
+def compile_fts5(node) -> str:
+    """
+    Compiles a syntax tree into an SQLite FTS5 MATCH expression, matching
+    the same pages as compile_tsquery but for the stop words, which FTS5
+    keeps in phrases.
+
+    Args:
+        node (tuple): syntax tree from parse_query
+
+    Returns:
+        str: FTS5 query text
+
+    Raises:
+        QuerySyntaxError: if NOT has no phrase to exclude from, as FTS5 NOT
+            is binary, or a NEAR operand is not a phrase or an OR of phrases
+    """
+    kind = node[0]
+    if kind == "term":
+        return _fts5_phrase(node[1])
+    if kind == "not":
+        raise QuerySyntaxError("NOT needs a phrase to exclude from, e.g. rate NOT gas.")
+    if kind == "near":
+        _, distance, left, right = node
+        # a tsquery <d> is d words apart, NEAR counts the words in between;
+        # NEAR matches either order
+        return (
+            "("
+            + " OR ".join(
+                f"NEAR({_fts5_phrase(first)} {_fts5_phrase(second)}, {distance - 1})"
+                for first in _fts5_near_phrases(left)
+                for second in _fts5_near_phrases(right)
+            )
+            + ")"
+        )
+    if kind == "or":
+        return "(" + " OR ".join(compile_fts5(child) for child in node[1]) + ")"
+
+    # the negated operands of an AND are excluded from the others
+    included = [child for child in node[1] if child[0] != "not"]
+    excluded = [child[1] for child in node[1] if child[0] == "not"]
+    if len(included) == 0:
+        raise QuerySyntaxError("NOT needs a phrase to exclude from, e.g. rate NOT gas.")
+    query = "(" + " AND ".join(compile_fts5(child) for child in included) + ")"
+    for child in excluded:
+        query = f"({query} NOT {compile_fts5(child)})"
+    return query
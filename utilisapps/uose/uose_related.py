@@ -0,0 +1,358 @@
+"""
+UOSE Related:
+This script contains the related documents engine of the UOSE application in
+the UtilisWeb project: the filings of other dockets, and other utilities,
+most similar to a document, by cosine similarity of TF-IDF vectors of their
+page text. Everything is computed offline by the rds_related_documents
+command, with NumPy only:
+
+- the words of the pages of a document are counted by worker processes and
+  hashed into TERM_SPACE terms, so no vocabulary is kept; the counts are
+  stored in DocumentTerms;
+- the document frequency of every term is counted over the stored counts,
+  and every document weighted with a sublinear TF-IDF, pruned to its
+  VECTOR_TERMS heaviest terms and normalized;
+- the vectors are inverted into term postings, so the similarity of a
+  document with every other is the sum of the postings of its own terms;
+- the RELATED_LIMIT most similar documents of other dockets are stored in
+  RelatedDocument, ranked.
+
+New or reloaded documents are scored against the whole corpus and merged
+into the stored lists of the documents they are similar to; the other scores
+keep the document frequencies of their run until the next full rebuild.
+
+Version History:
+- 1.0.0 (2026-10-18): Initial version of the related documents engine.
+
+Change Log:
+- 2026-10-18: Created the uose_related.py file.
+"""
+
+import re
+import zlib
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+
+from .models import DocumentTerms, EntityDocument, RelatedDocument
+
+# hashed term space; collisions of rare words barely move the similarities
+TERM_SPACE = 1 << 20
+
+# documents stored per document
+RELATED_LIMIT = getattr(settings, "UOSE_RELATED_DOCUMENTS", 10)
+
+# lowest similarity worth listing
+MIN_SIMILARITY = getattr(settings, "UOSE_RELATED_MIN_SIMILARITY", 0.1)
+
+# terms kept per document vector, by weight
+VECTOR_TERMS = 400
+
+# terms in a larger share of the documents are ignored, like stop words, once
+# the corpus has MIN_CORPUS documents
+MAX_DOCUMENT_SHARE = 0.5
+MIN_CORPUS = 20
+
+# rows saved per query
+RELATED_BATCH_SIZE = 2000
+
+# words of 3 letters or more; numbers and page furniture are left out
+_WORD_PATTERN = re.compile(r"[a-z]{3,}")
+
+
+def document_terms(page_texts: list):
+    """
+    Counts the hashed words of the pages of a document.
+
+    Args:
+        page_texts (list): normalized page texts of the document
+
+    Returns:
+        Tuple[numpy.ndarray, numpy.ndarray, int]: sorted int32 term hashes,
+            int32 count of every term and number of words
+    """
+    words = Counter()
+    for text in page_texts:
+        words.update(_WORD_PATTERN.findall((text or "").lower()))
+    hashes = np.fromiter(
+        (zlib.crc32(word.encode()) & (TERM_SPACE - 1) for word in words),
+        dtype=np.int32,
+        count=len(words),
+    )
+    counts = np.fromiter(words.values(), dtype=np.int32, count=len(words))
+    # words sharing a hash share its count
+    terms, position = np.unique(hashes, return_inverse=True)
+    return (
+        terms,
+        np.bincount(position, weights=counts, minlength=len(terms)).astype(np.int32),
+        int(counts.sum()),
+    )
+
+
+def extract_document_terms(rows: list) -> list:
+    """
+    Counts the terms of a batch of documents. Runs in the worker processes of
+    rds_related_documents.
+
+    Args:
+        rows (list): (document id, [page texts]) of the documents
+
+    Returns:
+        list: (document id, terms bytes, counts bytes, word count) of the
+            documents with words
+    """
+    extracted = []
+    for document_id, page_texts in rows:
+        terms, counts, word_count = document_terms(page_texts)
+        if word_count > 0:
+            extracted.append(
+                (
+                    document_id,
+                    terms.astype("<i4").tobytes(),
+                    counts.astype("<i4").tobytes(),
+                    word_count,
+                )
+            )
+    return extracted
+
+
+def save_document_terms(extracted: list):
+    """
+    Saves the counted terms of documents, replacing their previous counts.
+
+    Args:
+        extracted (list): (document id, terms bytes, counts bytes, word count)
+    """
+    DocumentTerms.objects.filter(
+        document_id__in=[document_id for document_id, _, _, _ in extracted]
+    ).delete()
+    DocumentTerms.objects.bulk_create(
+        [
+            DocumentTerms(
+                document_id=document_id,
+                terms=terms,
+                counts=counts,
+                word_count=word_count,
+            )
+            for document_id, terms, counts, word_count in extracted
+        ],
+        batch_size=RELATED_BATCH_SIZE,
+    )
+
+
+def expire_document_terms(document_ids):
+    """
+    Deletes the term counts of documents whose pages changed, so the next
+    rds_related_documents run counts and scores them again.
+
+    Args:
+        document_ids (iterable): ids of the documents whose pages changed
+    """
+    ids = [doc_id for doc_id in document_ids if doc_id is not None]
+    if len(ids) > 0:
+        DocumentTerms.objects.filter(document_id__in=ids).delete()
+
+
+def pending_documents():
+    """
+    Returns the documents with linked pages whose terms are not counted yet.
+
+    Returns:
+        QuerySet: ids of the documents, in id order
+    """
+    return (
+        EntityDocument.objects.filter(pages__isnull=False, terms__isnull=True)
+        .values_list("id", flat=True)
+        .distinct()
+        .order_by("id")
+    )
+
+
+def _from_bytes(value) -> np.ndarray:
+    return np.frombuffer(bytes(value), dtype="<i4")
+
+
+def _stored_terms():
+    return DocumentTerms.objects.values_list("document_id", "terms", "counts").iterator(
+        chunk_size=RELATED_BATCH_SIZE
+    )
+
+
+class _Corpus:
+    # pruned TF-IDF vectors of every counted document, by row, and their
+    # postings by term
+
+    def __init__(self):
+        frequencies = np.zeros(TERM_SPACE, dtype=np.int64)
+        size = 0
+        for _, terms, _ in _stored_terms():
+            frequencies[_from_bytes(terms)] += 1
+            size += 1
+        idf = np.log((1 + size) / (1 + frequencies)) + 1
+        if size >= MIN_CORPUS:
+            idf[frequencies > MAX_DOCUMENT_SHARE * size] = 0
+
+        ids, indptr, indices, weights = [], [0], [], []
+        for document_id, terms, counts in _stored_terms():
+            terms = _from_bytes(terms)
+            vector = (1 + np.log(_from_bytes(counts))) * idf[terms]
+            keep = np.flatnonzero(vector > 0)
+            if len(keep) > VECTOR_TERMS:
+                keep = keep[
+                    np.argpartition(vector[keep], -VECTOR_TERMS)[-VECTOR_TERMS:]
+                ]
+            norm = np.linalg.norm(vector[keep])
+            if norm == 0:
+                continue
+            ids.append(document_id)
+            indices.append(terms[keep])
+            weights.append(vector[keep] / norm)
+            indptr.append(indptr[-1] + len(keep))
+
+        self.ids = np.array(ids, dtype=np.int64)
+        self.row = {document_id: row for row, document_id in enumerate(ids)}
+        self.indptr = np.array(indptr, dtype=np.int64)
+        self.indices = np.concatenate(indices) if ids else np.zeros(0, np.int32)
+        self.weights = np.concatenate(weights) if ids else np.zeros(0)
+
+        # documents of the same docket are never related; documents without
+        # a docket each get their own
+        dockets = dict(
+            EntityDocument.objects.filter(id__in=ids).values_list("id", "case_number")
+        )
+        self.dockets = np.array(
+            [dockets.get(document_id) or f"#{document_id}" for document_id in ids]
+        )
+
+        order = np.argsort(self.indices, kind="stable")
+        rows = np.repeat(np.arange(len(ids)), np.diff(self.indptr))
+        self.posting_rows = rows[order]
+        self.posting_weights = self.weights[order]
+        self.term_ptr = np.searchsorted(self.indices[order], np.arange(TERM_SPACE + 1))
+
+    def similarities(self, row: int) -> np.ndarray:
+        # cosine similarity of a document with every document, its own docket
+        # left out
+        terms = self.indices[self.indptr[row] : self.indptr[row + 1]]
+        weights = self.weights[self.indptr[row] : self.indptr[row + 1]]
+        starts = self.term_ptr[terms]
+        lengths = self.term_ptr[terms + 1] - starts
+        postings = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + (
+            np.arange(lengths.sum())
+        )
+        scores = np.bincount(
+            self.posting_rows[postings],
+            weights=self.posting_weights[postings] * np.repeat(weights, lengths),
+            minlength=len(self.ids),
+        )
+        scores[self.dockets == self.dockets[row]] = 0
+        return scores
+
+
+def _top(scores: np.ndarray, limit: int) -> np.ndarray:
+    # rows of the best scores at or above MIN_SIMILARITY, best first
+    rows = np.flatnonzero(scores >= MIN_SIMILARITY)
+    if len(rows) > limit:
+        rows = rows[np.argpartition(scores[rows], -limit)[-limit:]]
+    return rows[np.argsort(-scores[rows], kind="stable")]
+
+
+def _save_lists(lists: dict):
+    RelatedDocument.objects.filter(document_id__in=list(lists)).delete()
+    RelatedDocument.objects.bulk_create(
+        [
+            RelatedDocument(
+                document_id=document_id,
+                related_document_id=related_id,
+                rank=rank,
+                score=score,
+            )
+            for document_id, related in lists.items()
+            for rank, (related_id, score) in enumerate(related, 1)
+        ],
+        batch_size=RELATED_BATCH_SIZE,
+    )
+
+
+def refresh_related_documents(document_ids=None) -> int:
+    """
+    Scores documents against every counted document and stores their most
+    similar documents of other dockets. The lists of the documents they are
+    now among the most similar of are updated too.
+
+    Args:
+        document_ids (iterable, optional): ids of the new or reloaded
+            documents; every document is scored again when None
+
+    Returns:
+        int: number of document lists saved
+    """
+    corpus = _Corpus()
+    if document_ids is None:
+        refreshed = set(corpus.row)
+        RelatedDocument.objects.all().delete()
+    else:
+        refreshed = set(document_ids) & set(corpus.row)
+    if len(refreshed) == 0:
+        return 0
+
+    stored = {}
+    if document_ids is not None:
+        for document_id, related_id, score in (
+            RelatedDocument.objects.exclude(document_id__in=refreshed)
+            .order_by("document_id", "rank")
+            .values_list("document_id", "related_document_id", "score")
+        ):
+            stored.setdefault(document_id, []).append((related_id, score))
+    # score a refreshed document must beat to enter the list of a document
+    floor = np.zeros(len(corpus.ids))
+    for document_id, related in stored.items():
+        if len(related) >= RELATED_LIMIT and document_id in corpus.row:
+            floor[corpus.row[document_id]] = related[-1][1]
+    refreshed_rows = [corpus.row[document_id] for document_id in refreshed]
+
+    lists, merged = {}, {}
+    for document_id in sorted(refreshed):
+        scores = corpus.similarities(corpus.row[document_id])
+        top = _top(scores, RELATED_LIMIT)
+        lists[document_id] = [(int(corpus.ids[row]), float(scores[row])) for row in top]
+        if document_ids is None:
+            continue
+        # the scores are symmetric: the refreshed document may enter the
+        # lists of the documents it is similar to
+        scores[refreshed_rows] = 0
+        for row in np.flatnonzero((scores >= MIN_SIMILARITY) & (scores > floor)):
+            merged.setdefault(int(corpus.ids[row]), []).append(
+                (document_id, float(scores[row]))
+            )
+
+    for document_id, candidates in merged.items():
+        kept = [
+            (related_id, score)
+            for related_id, score in stored.get(document_id, [])
+            if related_id not in refreshed
+        ]
+        lists[document_id] = sorted(
+            kept + candidates, key=lambda related: (-related[1], related[0])
+        )[:RELATED_LIMIT]
+    _save_lists(lists)
+    return len(lists)
+
+
+def document_related(document: EntityDocument) -> list:
+    """
+    Returns the stored documents of other dockets most similar to a document.
+
+    Args:
+        document (EntityDocument): document of the detail page
+
+    Returns:
+        list: RelatedDocument rows with their related_document, most similar
+            first
+    """
+    return list(
+        RelatedDocument.objects.filter(document=document)
+        .select_related("related_document")
+        .order_by("rank")
+    )
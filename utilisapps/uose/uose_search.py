@@ -0,0 +1,477 @@
+"""
+UOSE Search:
+This script contains the keyword search layer for the UOSE application in the
+UtilisWeb project.
+
+Version History:
+- 1.0.0 (2026-10-18): Initial version of the search layer.
+
+Change Log:
+- 2026-10-18: Combined all keyword phrases into a single tsquery round trip.
+- 2026-10-18: Scoped pages to documents with a subquery on the document link.
+- 2026-10-18: Added ranked, keyset paginated results with headline snippets.
+- 2026-10-18: Streamed the keyword hit table from a server side cursor.
+- 2026-10-18: Matched and ranked on the indexed search_vector column.
+- 2026-10-18: Counted the keywords with a KeywordMatcher instead of a
+  lowercase and replace expression per keyword.
+- 2026-10-18: Split out the ranked hit ids and their result loading, for the
+  search result cache.
+- 2026-10-18: Compiled AND/OR/NOT/NEAR keyword expressions into the tsquery.
+- 2026-10-18: Matched the page text in the content addressed page store, and
+  the document title on the page.
+- 2026-10-18: Shared the keyword counts and result display with the search
+  backends.
+- 2026-10-18: Scoped pages to documents by file url again: the document link
+  only names the first document filed under a url.
+"""
+
+import json
+import hashlib
+import operator
+from functools import reduce
+
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    SearchVectorField,
+)
+from django.db.models import F, FloatField, Func, Q
+from django.db.models.functions import Cast
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import PageContent, RDSTextModel
+from .uose_matcher import KeywordMatcher
+from .uose_query import (
+    QuerySyntaxError,
+    compile_tsquery,
+    is_expression,
+    parse_query,
+    positive_terms,
+)
+
+RESULTS_PER_PAGE = 25
+
+# text search configuration of the search_vector column
+SEARCH_CONFIG = "english"
+
+# text of a page, read from the page store
+PAGE_TEXT = F("content__page_text")
+
+# highlight markers used by ts_headline; swapped for <b> tags once the
+# snippet has been html escaped
+_HL_START = "[[hl]]"
+_HL_STOP = "[[/hl]]"
+
+
+def clean_keywords(kw_list: list) -> list:
+    """
+    Normalizes the keyword list sent by the search form.
+
+    Args:
+        kw_list (list): raw keywords, usually the split "|" separated form value
+
+    Returns:
+        list: stripped, non empty keywords in the order they were entered,
+            without duplicates (case insensitive)
+    """
+    keywords = []
+    seen = set()
+    for kw in kw_list or []:
+        kw = (kw or "").strip()
+        if kw != "" and kw.lower() not in seen:
+            seen.add(kw.lower())
+            keywords.append(kw)
+    return keywords
+
+
+def _keyword_query(keyword: str):
+    if is_expression(keyword):
+        return SearchQuery(
+            compile_tsquery(parse_query(keyword)),
+            search_type="raw",
+            config=SEARCH_CONFIG,
+        )
+    return SearchQuery(keyword, search_type="phrase", config=SEARCH_CONFIG)
+
+
+def build_search_query(keywords: list):
+    """
+    ORs the query of every keyword into a single tsquery. A plain keyword is
+    a phrase; a keyword using AND, OR, NOT, NEAR/n, quotes or parentheses is
+    compiled by uose_query.
+
+    Args:
+        keywords (list): cleaned keywords
+
+    Returns:
+        SearchQuery: combined query, None if there are no keywords
+
+    Raises:
+        QuerySyntaxError: if a keyword expression is not valid
+    """
+    if len(keywords) == 0:
+        return None
+    return reduce(operator.or_, [_keyword_query(kw) for kw in keywords])
+
+
+def match_terms(keywords: list) -> list:
+    """
+    Returns the phrases counted on a matching page: the plain keywords and
+    the phrases of the keyword expressions that are not negated.
+
+    Args:
+        keywords (list): cleaned keywords
+
+    Returns:
+        list: phrases without duplicates (case insensitive), in keyword order
+    """
+    terms = []
+    for kw in keywords:
+        terms += positive_terms(parse_query(kw)) if is_expression(kw) else [kw]
+    return clean_keywords(terms)
+
+
+def _normalize_keyword(keyword: str) -> str:
+    try:
+        if is_expression(keyword):
+            return compile_tsquery(parse_query(keyword))
+    except QuerySyntaxError:
+        pass
+    return " ".join(keyword.lower().split())
+
+
+def search_fingerprint(
+    entity_code: str, kw_list: list, date_from: str, date_to: str
+) -> str:
+    """
+    Fingerprints a search, so searches differing only by keyword order, case
+    or spacing share cached results.
+
+    Args:
+        entity_code (str): entity searched
+        kw_list (list): keywords searched for
+        date_from (str): start of the issued date range
+        date_to (str): end of the issued date range
+
+    Returns:
+        str: hex sha256 digest of the normalized search
+    """
+    keywords = sorted({_normalize_keyword(kw) for kw in clean_keywords(kw_list)})
+    normalized = json.dumps(
+        [(entity_code or "").strip().upper(), keywords, date_from, date_to]
+    )
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+class _PageVector(Func):
+    # title (weight A) followed by the text (weight D) of a page
+    template = "(%(expressions)s)"
+    arg_joiner = " || "
+    output_field = SearchVectorField()
+
+
+def page_vector():
+    """
+    Returns the search vector of a page, its document title followed by its
+    text, to rank pages.
+
+    Returns:
+        Func: tsvector expression on RDSTextModel
+    """
+    return _PageVector(F("title_vector"), F("content__search_vector"))
+
+
+def page_match(query) -> Q:
+    """
+    Returns the filter of the pages matching a search query: pages whose
+    text, searched once per distinct text in the page store, or whose
+    document title matches it.
+
+    Args:
+        query (SearchQuery): query built by build_search_query
+
+    Returns:
+        Q: filter on RDSTextModel
+    """
+    return Q(
+        content__in=PageContent.objects.filter(search_vector=query).values(
+            "content_hash"
+        )
+    ) | Q(title_vector=query)
+
+
+def matching_pages(documents, query):
+    """
+    Returns the pages of the given documents matching a search query. Pages
+    are scoped by file url, so every document filed under the url of a page
+    finds it, not only the document the page is linked to.
+
+    Args:
+        documents (QuerySet): EntityDocument queryset of the documents to search
+        query (SearchQuery): query built by build_search_query
+
+    Returns:
+        QuerySet: matching RDSTextModel pages
+    """
+    return RDSTextModel.objects.filter(url__in=documents.values("file_url")).filter(
+        page_match(query)
+    )
+
+
+def keyword_hits(matcher: KeywordMatcher, page_text: str) -> list:
+    """
+    Counts the keywords on a matching page.
+
+    Args:
+        matcher (KeywordMatcher): matcher of the search keywords
+        page_text (str): text of the page
+
+    Returns:
+        list: (keyword, count) for every keyword found on the page
+    """
+    hits = matcher.hits(page_text)
+    # matched on a stemmed form only; list every keyword with its count
+    if len(hits) == 0:
+        hits = [(kw, 0) for kw in matcher.keywords]
+    return hits
+
+
+def keyword_search(documents, kw_list: list, chunk_size=2000):
+    """
+    Searches the pages of the given documents for any of the keywords and
+    streams the keyword hit table.
+
+    All keywords are sent in one query and counted on each matching page by a
+    KeywordMatcher, which folds the page text once. Pages are read from a
+    server side cursor, chunk_size rows at a time.
+
+    Args:
+        documents (QuerySet): EntityDocument queryset of the documents to search
+        kw_list (list): keywords to search for
+        chunk_size (int, optional): rows fetched per round trip
+
+    Yields:
+        list: one [url, page_number, keyword, count, page_text] row per
+            keyword found on a matching page
+    """
+    keywords = clean_keywords(kw_list)
+    query = build_search_query(keywords)
+    if query is None:
+        return
+
+    matcher = KeywordMatcher(match_terms(keywords))
+    pages = (
+        matching_pages(documents, query)
+        .order_by("url", "page_number")
+        .values("url", "page_number", page_text=PAGE_TEXT)
+    )
+
+    for page in pages.iterator(chunk_size=chunk_size):
+        for kw, count in keyword_hits(matcher, page["page_text"]):
+            yield [page["url"], page["page_number"], kw, count, page["page_text"]]
+
+
+def format_headline(headline: str) -> str:
+    """
+    Escapes a ts_headline snippet and turns its markers into bold tags.
+
+    Args:
+        headline (str): snippet returned by SearchHeadline
+
+    Returns:
+        str: html safe snippet
+    """
+    return mark_safe(
+        escape(headline or "").replace(_HL_START, "<b>").replace(_HL_STOP, "</b>")
+    )
+
+
+def encode_cursor(rank: float, page_id: int) -> str:
+    """
+    Encodes the keyset position of the last result of a page.
+
+    Args:
+        rank (float): rank of the last result
+        page_id (int): id of the last result
+
+    Returns:
+        str: cursor passed back as the "after" query parameter
+    """
+    return f"{rank!r}:{page_id}"
+
+
+def decode_cursor(cursor: str):
+    """
+    Decodes a cursor created by encode_cursor.
+
+    Args:
+        cursor (str): "after" query parameter
+
+    Returns:
+        tuple: (rank, page_id), None if the cursor is missing or invalid
+    """
+    try:
+        rank, page_id = cursor.split(":")
+        return float(rank), int(page_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _ranked(matches, query):
+    # ts_rank_cd returns a real; cast so the cursor round trips exactly
+    return matches.annotate(
+        rank=Cast(
+            SearchRank(page_vector(), query, cover_density=True),
+            FloatField(),
+        )
+    )
+
+
+def _with_headline(pages, query):
+    return pages.annotate(
+        headline=SearchHeadline(
+            PAGE_TEXT,
+            query,
+            config=SEARCH_CONFIG,
+            start_sel=_HL_START,
+            stop_sel=_HL_STOP,
+            max_fragments=3,
+        ),
+    )
+
+
+def display_result(page: dict, matcher: KeywordMatcher) -> dict:
+    """
+    Prepares a page loaded with its headline and text for the results page.
+
+    Args:
+        page (dict): page with its "headline" and "page_text"
+        matcher (KeywordMatcher): matcher of the search keywords
+
+    Returns:
+        dict: the page with its formatted headline and its "keywords" hits,
+            without its text
+    """
+    page["headline"] = format_headline(page["headline"])
+    # only the pages displayed are counted; the text is not kept
+    page["keywords"] = keyword_hits(matcher, page.pop("page_text"))
+    return page
+
+
+def ranked_search(documents, kw_list: list, after=None, limit=RESULTS_PER_PAGE):
+    """
+    Returns one page of search results ranked by ts_rank_cd.
+
+    Only the displayed pages are read, to count their keywords, and only a
+    headline snippet is kept for each; the full page text is loaded on
+    demand, so memory is bounded by the page size whatever the number of
+    hits.
+
+    Args:
+        documents (QuerySet): EntityDocument queryset of the documents to search
+        kw_list (list): keywords to search for
+        after (tuple, optional): (rank, page_id) cursor of the previous page
+        limit (int, optional): number of results per page
+
+    Returns:
+        Tuple[list, int, str]: results, total number of matching pages and the
+            cursor of the next page (None on the last page)
+    """
+    keywords = clean_keywords(kw_list)
+    query = build_search_query(keywords)
+    if query is None:
+        return [], 0, None
+
+    matches = matching_pages(documents, query)
+    total = matches.count()
+
+    pages = _ranked(matches, query)
+    if after is not None:
+        rank, page_id = after
+        pages = pages.filter(Q(rank__lt=rank) | Q(rank=rank, id__lt=page_id))
+
+    pages = _with_headline(pages.order_by("-rank", "-id"), query).values(
+        "id",
+        "url",
+        "document_id",
+        "page_number",
+        "rank",
+        "headline",
+        page_text=PAGE_TEXT,
+    )[: limit + 1]
+
+    matcher = KeywordMatcher(match_terms(keywords))
+    results = [display_result(page, matcher) for page in pages]
+
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        next_cursor = encode_cursor(results[-1]["rank"], results[-1]["id"])
+    return results, total, next_cursor
+
+
+def ranked_hits(documents, kw_list: list, max_hits: int):
+    """
+    Returns the ids and ranks of the best matching pages, without reading
+    their text, e.g. to cache the hits of a search.
+
+    Args:
+        documents (QuerySet): EntityDocument queryset of the documents to search
+        kw_list (list): keywords to search for
+        max_hits (int): number of hits returned at most
+
+    Returns:
+        Tuple[list, int]: (page_id, rank) of the hits in ranked_search order
+            and the total number of matching pages
+    """
+    keywords = clean_keywords(kw_list)
+    query = build_search_query(keywords)
+    if query is None:
+        return [], 0
+
+    matches = matching_pages(documents, query)
+    hits = list(
+        _ranked(matches, query)
+        .order_by("-rank", "-id")
+        .values_list("id", "rank")[:max_hits]
+    )
+    # the count is only run when the hits were cut off
+    total = len(hits) if len(hits) < max_hits else matches.count()
+    return hits, total
+
+
+def hit_results(hits: list, kw_list: list) -> list:
+    """
+    Loads the search results of ranked hits: headline snippet and keyword
+    counts, as returned by ranked_search.
+
+    Args:
+        hits (list): (page_id, rank) of the pages to display, in order
+        kw_list (list): keywords searched for
+
+    Returns:
+        list: results in hit order; pages deleted since are left out
+    """
+    keywords = clean_keywords(kw_list)
+    query = build_search_query(keywords)
+    if query is None or len(hits) == 0:
+        return []
+
+    ranks = dict(hits)
+    pages = _with_headline(RDSTextModel.objects.filter(id__in=ranks), query).values(
+        "id",
+        "url",
+        "document_id",
+        "page_number",
+        "headline",
+        page_text=PAGE_TEXT,
+    )
+
+    matcher = KeywordMatcher(match_terms(keywords))
+    results = {}
+    for page in pages:
+        page["rank"] = ranks[page["id"]]
+        results[page["id"]] = display_result(page, matcher)
+    return [results[page_id] for page_id, _ in hits if page_id in results]
@@ -0,0 +1,463 @@
+"""
+UOSE Search Backends:
+This script contains the search backends of the UOSE application in the
+UtilisWeb project: the page search behind the results page and the search
+reports, ranked hits, keyset paginated results, hit results and the keyword
+hit table, behind one interface. The backend is chosen with the
+UOSE_SEARCH_BACKEND setting:
+
+- "postgres", the default: the full text search of uose_search on the
+  indexed search vectors of the database;
+- "sqlite_fts5": an SQLite FTS5 sidecar index of the pages, in the
+  UOSE_FTS5_PATH file, built and kept up to date by the rds_fts5_index
+  command. It needs no text search in the database, e.g. for local
+  development and the offline analysis laptops, and moves the search read
+  path off the database. Pages are ranked with bm25, the title weighted
+  like the A weight of the Postgres ranking, and phrases keep their stop
+  words.
+
+The conformance of the backends is checked by the tests over fixture pages of
+known hits; the benchmark_search_backends command compares their latency.
+
+Version History:
+- 1.0.0 (2026-10-18): Initial version of the search backends.
+
+Change Log:
+- 2026-10-18: Created the uose_search_backends.py file.
+- 2026-10-18: Scoped the FTS5 search by file url, like the Postgres backend.
+- 2026-10-18: Moved the conformance checks of the backends to the tests.
+"""
+
+import os
+import sqlite3
+from contextlib import closing
+
+from django.conf import settings
+
+from .uose_matcher import KeywordMatcher
+from .uose_query import compile_fts5, is_expression, parse_query
+from .uose_search import (
+    RESULTS_PER_PAGE,
+    build_search_query,
+    clean_keywords,
+    display_result,
+    encode_cursor,
+    hit_results,
+    keyword_hits,
+    keyword_search,
+    match_terms,
+    ranked_hits,
+    ranked_search,
+)
+
+SEARCH_BACKEND = getattr(settings, "UOSE_SEARCH_BACKEND", "postgres")
+
+FTS5_PATH = getattr(
+    settings,
+    "UOSE_FTS5_PATH",
+    os.path.join(settings.BASE_DIR, "uose_search_fts5.sqlite3"),
+)
+
+# bm25 weights of the title and text columns
+FTS5_WEIGHTS = (10.0, 1.0)
+
+# rows read per round trip
+FTS5_CHUNK_SIZE = 2000
+
+# highlight markers of the snippets, formatted by uose_search.format_headline
+_HL_START = "[[hl]]"
+_HL_STOP = "[[/hl]]"
+
+_FTS5_SCHEMA_SQL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS uose_pages USING fts5(
+        title,
+        page_text,
+        document_id UNINDEXED,
+        url UNINDEXED,
+        page_number UNINDEXED,
+        tokenize = 'porter unicode61'
+    )
+"""
+
+# file urls of the documents searched, filled per search
+_SCOPE_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS uose_scope (url TEXT PRIMARY KEY)
+"""
+
+_MATCH_SQL = f"""
+    SELECT rowid AS id, -bm25(uose_pages, {FTS5_WEIGHTS[0]}, {FTS5_WEIGHTS[1]}) AS rank
+    FROM uose_pages
+    WHERE uose_pages MATCH ?
+    AND url IN (SELECT url FROM temp.uose_scope)
+"""
+
+_COUNT_SQL = """
+    SELECT COUNT(*)
+    FROM uose_pages
+    WHERE uose_pages MATCH ?
+    AND url IN (SELECT url FROM temp.uose_scope)
+"""
+
+_RESULTS_SQL = f"""
+    SELECT rowid, url, document_id, page_number,
+        snippet(uose_pages, 1, '{_HL_START}', '{_HL_STOP}', ' ... ', 32), page_text
+    FROM uose_pages
+    WHERE uose_pages MATCH ?
+    AND rowid IN ({{ids}})
+"""
+
+_KEYWORD_ROWS_SQL = """
+    SELECT url, page_number, page_text
+    FROM uose_pages
+    WHERE uose_pages MATCH ?
+    AND url IN (SELECT url FROM temp.uose_scope)
+    ORDER BY url, page_number
+"""
+
+
+class SearchBackend:
+    """Search Backend:  The page search of the results page and the search
+    reports. Keywords are the raw keyword list of the search form; every
+    method raises QuerySyntaxError for an invalid keyword expression."""
+
+    name = None
+
+    def ranked_hits(self, documents, kw_list: list, max_hits: int):
+        """
+        Returns the ids and ranks of the best matching pages.
+
+        Args:
+            documents (QuerySet): EntityDocument queryset of the documents to
+                search
+            kw_list (list): keywords to search for
+            max_hits (int): number of hits returned at most
+
+        Returns:
+            Tuple[list, int]: (page_id, rank) of the hits, best first, and the
+                total number of matching pages
+        """
+        raise NotImplementedError
+
+    def ranked_search(
+        self, documents, kw_list: list, after=None, limit=RESULTS_PER_PAGE
+    ):
+        """
+        Returns one page of ranked results, keyset paginated.
+
+        Args:
+            documents (QuerySet): EntityDocument queryset of the documents to
+                search
+            kw_list (list): keywords to search for
+            after (tuple, optional): (rank, page_id) cursor of the previous page
+            limit (int, optional): number of results per page
+
+        Returns:
+            Tuple[list, int, str]: results, total number of matching pages and
+                the cursor of the next page (None on the last page)
+        """
+        raise NotImplementedError
+
+    def hit_results(self, hits: list, kw_list: list) -> list:
+        """
+        Loads the results of ranked hits, with their headline and keywords.
+
+        Args:
+            hits (list): (page_id, rank) of the pages to display, in order
+            kw_list (list): keywords searched for
+
+        Returns:
+            list: results in hit order, without the pages no longer indexed
+        """
+        raise NotImplementedError
+
+    def keyword_search(self, documents, kw_list: list, chunk_size=2000):
+        """
+        Streams the keyword hit table of the matching pages.
+
+        Args:
+            documents (QuerySet): EntityDocument queryset of the documents to
+                search
+            kw_list (list): keywords to search for
+            chunk_size (int, optional): rows fetched per round trip
+
+        Yields:
+            list: one [url, page_number, keyword, count, page_text] row per
+                keyword found on a matching page
+        """
+        raise NotImplementedError
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Postgres Search Backend:  The full text search of uose_search."""
+
+    name = "postgres"
+
+    def ranked_hits(self, documents, kw_list: list, max_hits: int):
+        return ranked_hits(documents, kw_list, max_hits)
+
+    def ranked_search(
+        self, documents, kw_list: list, after=None, limit=RESULTS_PER_PAGE
+    ):
+        return ranked_search(documents, kw_list, after=after, limit=limit)
+
+    def hit_results(self, hits: list, kw_list: list) -> list:
+        return hit_results(hits, kw_list)
+
+    def keyword_search(self, documents, kw_list: list, chunk_size=2000):
+        return keyword_search(documents, kw_list, chunk_size=chunk_size)
+
+
+def fts5_match(keywords: list) -> str:
+    """
+    ORs the FTS5 query of every keyword into the MATCH expression of the
+    pages, matched on their text or on their document title, like
+    uose_search.page_match.
+
+    Args:
+        keywords (list): cleaned keywords
+
+    Returns:
+        str: FTS5 MATCH expression, None if there are no keywords
+
+    Raises:
+        QuerySyntaxError: if a keyword expression is not valid
+    """
+    if len(keywords) == 0:
+        return None
+    query = " OR ".join(
+        compile_fts5(parse_query(kw) if is_expression(kw) else ("term", kw))
+        for kw in keywords
+    )
+    return f"page_text : ({query}) OR title : ({query})"
+
+
+class SQLiteFTS5SearchBackend(SearchBackend):
+    """SQLite FTS5 Search Backend:  The search of the pages in an SQLite FTS5
+    sidecar index, built by the rds_fts5_index command.
+
+    Args:
+        path (str, optional): file of the index, FTS5_PATH by default
+    """
+
+    name = "sqlite_fts5"
+
+    def __init__(self, path=None):
+        self.path = path or FTS5_PATH
+
+    def connect(self):
+        """
+        Opens the index; the caller closes the connection.
+
+        Returns:
+            sqlite3.Connection: connection to the index file
+        """
+        return sqlite3.connect(self.path)
+
+    def _scope(self, connection, documents):
+        connection.execute(_SCOPE_SQL)
+        connection.execute("DELETE FROM temp.uose_scope")
+        connection.executemany(
+            "INSERT OR IGNORE INTO temp.uose_scope (url) VALUES (?)",
+            ((url,) for url in documents.values_list("file_url", flat=True)),
+        )
+
+    def _match(self, kw_list: list):
+        keywords = clean_keywords(kw_list)
+        # same validation, and errors, as the Postgres backend
+        build_search_query(keywords)
+        return keywords, fts5_match(keywords)
+
+    def _ranked(self, connection, match: str, after, limit: int) -> list:
+        sql = f"SELECT id, rank FROM ({_MATCH_SQL})"
+        params = [match]
+        if after is not None:
+            sql += " WHERE rank < ? OR (rank = ? AND id < ?)"
+            params += [after[0], after[0], after[1]]
+        sql += " ORDER BY rank DESC, id DESC LIMIT ?"
+        return connection.execute(sql, params + [limit]).fetchall()
+
+    def _results(self, connection, match: str, hits: list, keywords: list) -> list:
+        ranks = dict(hits)
+        matcher = KeywordMatcher(match_terms(keywords))
+        results = {}
+        for (
+            page_id,
+            url,
+            doc_id,
+            page_number,
+            headline,
+            page_text,
+        ) in connection.execute(
+            _RESULTS_SQL.format(ids=", ".join("?" * len(ranks))),
+            [match] + list(ranks),
+        ):
+            page = {
+                "id": page_id,
+                "url": url,
+                "document_id": doc_id,
+                "page_number": page_number,
+                "rank": ranks[page_id],
+                "headline": headline,
+                "page_text": page_text,
+            }
+            results[page_id] = display_result(page, matcher)
+        return [results[page_id] for page_id, _ in hits if page_id in results]
+
+    def ranked_hits(self, documents, kw_list: list, max_hits: int):
+        keywords, match = self._match(kw_list)
+        if match is None:
+            return [], 0
+        with closing(self.connect()) as connection:
+            self._scope(connection, documents)
+            hits = self._ranked(connection, match, None, max_hits)
+            # the count is only run when the hits were cut off
+            total = len(hits)
+            if total >= max_hits:
+                total = connection.execute(_COUNT_SQL, [match]).fetchone()[0]
+        return hits, total
+
+    def ranked_search(
+        self, documents, kw_list: list, after=None, limit=RESULTS_PER_PAGE
+    ):
+        keywords, match = self._match(kw_list)
+        if match is None:
+            return [], 0, None
+        with closing(self.connect()) as connection:
+            self._scope(connection, documents)
+            total = connection.execute(_COUNT_SQL, [match]).fetchone()[0]
+            hits = self._ranked(connection, match, after, limit + 1)
+            results = self._results(connection, match, hits[:limit], keywords)
+
+        next_cursor = None
+        if len(hits) > limit:
+            page_id, rank = hits[limit - 1]
+            next_cursor = encode_cursor(rank, page_id)
+        return results, total, next_cursor
+
+    def hit_results(self, hits: list, kw_list: list) -> list:
+        keywords, match = self._match(kw_list)
+        if match is None or len(hits) == 0:
+            return []
+        with closing(self.connect()) as connection:
+            return self._results(connection, match, hits, keywords)
+
+    def keyword_search(self, documents, kw_list: list, chunk_size=FTS5_CHUNK_SIZE):
+        keywords, match = self._match(kw_list)
+        if match is None:
+            return
+        matcher = KeywordMatcher(match_terms(keywords))
+        with closing(self.connect()) as connection:
+            self._scope(connection, documents)
+            cursor = connection.execute(_KEYWORD_ROWS_SQL, [match])
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if len(rows) == 0:
+                    break
+                for url, page_number, page_text in rows:
+                    for kw, count in keyword_hits(matcher, page_text):
+                        yield [url, page_number, kw, count, page_text]
+
+    def create_index(self):
+        """
+        Creates the index tables when missing.
+        """
+        with closing(self.connect()) as connection:
+            connection.execute(_FTS5_SCHEMA_SQL)
+
+    def drop_index(self):
+        """
+        Drops the index, e.g. to rebuild it.
+        """
+        with closing(self.connect()) as connection:
+            connection.execute("DROP TABLE IF EXISTS uose_pages")
+
+    def indexed_pages(self, low: int, high: int) -> dict:
+        """
+        Returns the pages of an id range in the index.
+
+        Args:
+            low (int): first page id of the range
+            high (int): page id after the range
+
+        Returns:
+            dict: {page id: (document id, title)}
+        """
+        with closing(self.connect()) as connection:
+            return {
+                page_id: (doc_id, title)
+                for page_id, doc_id, title in connection.execute(
+                    "SELECT rowid, document_id, title FROM uose_pages"
+                    " WHERE rowid >= ? AND rowid < ?",
+                    [low, high],
+                )
+            }
+
+    def last_page_id(self) -> int:
+        """
+        Returns the highest page id in the index.
+
+        Returns:
+            int: highest page id, 0 when the index is empty
+        """
+        with closing(self.connect()) as connection:
+            return (
+                connection.execute("SELECT MAX(rowid) FROM uose_pages").fetchone()[0]
+                or 0
+            )
+
+    def index_pages(self, pages: list, removed: list):
+        """
+        Removes pages from the index and adds or replaces others, in one
+        transaction.
+
+        Args:
+            pages (list): (page id, document id, title, url, page number,
+                page text) of the pages to index
+            removed (list): ids of the pages to remove
+        """
+        with closing(self.connect()) as connection, connection:
+            connection.executemany(
+                "DELETE FROM uose_pages WHERE rowid = ?",
+                [(page_id,) for page_id in removed] + [(page[0],) for page in pages],
+            )
+            connection.executemany(
+                "INSERT INTO uose_pages"
+                " (rowid, document_id, title, url, page_number, page_text)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                pages,
+            )
+
+    def optimize(self):
+        """
+        Merges the segments of the index, after a build.
+        """
+        with closing(self.connect()) as connection, connection:
+            connection.execute(
+                "INSERT INTO uose_pages (uose_pages) VALUES ('optimize')"
+            )
+
+
+SEARCH_BACKENDS = {
+    PostgresSearchBackend.name: PostgresSearchBackend,
+    SQLiteFTS5SearchBackend.name: SQLiteFTS5SearchBackend,
+}
+
+
+def get_search_backend(name=None) -> SearchBackend:
+    """
+    Returns a search backend.
+
+    Args:
+        name (str, optional): one of SEARCH_BACKENDS, the UOSE_SEARCH_BACKEND
+            setting by default
+
+    Returns:
+        SearchBackend: the backend
+
+    Raises:
+        ValueError: if the backend is unknown
+    """
+    name = name or SEARCH_BACKEND
+    if name not in SEARCH_BACKENDS:
+        raise ValueError(f"Unknown search backend: {name}")
+    return SEARCH_BACKENDS[name]()
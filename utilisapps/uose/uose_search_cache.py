@@ -0,0 +1,210 @@
+"""
+UOSE Search Cache:
+This script contains the search result cache of the UOSE application in the
+UtilisWeb project. The ranked hit ids and the number of matching pages of a
+search are cached under its fingerprint, so repeated searches skip the full
+text scan and only load the page of results displayed.
+
+Cache keys include the search generation, bumped by every RDS ingestion, so
+results cached before pages were loaded, linked or reindexed are never served
+after it.
+
+The cached searches and the lookup counters live in the default cache, shared
+by every web worker (see check_shared_cache), so the hit rates reported to the
+staff are those of the site, not of the worker serving the request.
+
+Version History:
+- 1.0.0 (2026-10-18): Initial version of the search result cache.
+
+Change Log:
+- 2026-10-18: Created the uose_search_cache.py file.
+- 2026-10-18: Computed missing entries once per concurrent search, in a
+  search slot, and counted the coalesced lookups.
+- 2026-10-18: Counted the keyword trend lookups.
+- 2026-10-18: Collapsed the near-duplicate pages of the cached hits.
+- 2026-10-18: Searched with the configured search backend, cached per backend.
+- 2026-10-18: Reported the cache backend holding the site-wide counters.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from .models import SearchGeneration
+from .uose_duplicates import collapse_duplicate_hits
+from .uose_execution import search_slot, single_flight
+from .uose_search import RESULTS_PER_PAGE, encode_cursor
+from .uose_search_backends import get_search_backend
+
+SEARCH_CACHE_SECONDS = getattr(settings, "UOSE_SEARCH_CACHE_SECONDS", 600)
+
+# ranked hits cached per search; later pages are searched directly
+SEARCH_CACHE_MAX_HITS = getattr(settings, "UOSE_SEARCH_CACHE_MAX_HITS", 1000)
+
+# cached kinds reported by search_cache_stats
+CACHE_KINDS = ["results", "facets", "documents", "trends"]
+
+# outcomes of a cache lookup: found, computed by a concurrent identical
+# search, or computed
+CACHE_OUTCOMES = ["hits", "coalesced", "misses"]
+
+
+def search_generation() -> int:
+    """
+    Returns the current search generation.
+
+    Returns:
+        int: generation, 0 before the first ingestion
+    """
+    generation = SearchGeneration.objects.values_list("generation", flat=True).first()
+    return generation or 0
+
+
+def bump_search_generation():
+    """
+    Invalidates every cached search. Called by the RDS ingestion once pages
+    are loaded, linked or reindexed; inside a transaction the new generation
+    is only seen once it commits.
+    """
+    updated = SearchGeneration.objects.filter(id=1).update(
+        generation=F("generation") + 1, updated_date=timezone.now()
+    )
+    if updated == 0:
+        SearchGeneration.objects.create(id=1, generation=1)
+
+
+def search_cache_key(kind: str, fingerprint: str, generation=None) -> str:
+    """
+    Returns the cache key of a search.
+
+    Args:
+        kind (str): what is cached, one of CACHE_KINDS
+        fingerprint (str): search_fingerprint of the search
+        generation (int, optional): search generation, read when not given
+
+    Returns:
+        str: cache key
+    """
+    if generation is None:
+        generation = search_generation()
+    return f"uose:{kind}:{generation}:{fingerprint}"
+
+
+def record_cache_lookup(kind: str, outcome: str):
+    """
+    Counts the outcome of a cache lookup in the shared cache, for every web
+    worker. Backends without an atomic incr, like the database cache, may
+    lose a count when two workers record the same outcome at once.
+
+    Args:
+        kind (str): what was looked up, one of CACHE_KINDS
+        outcome (str): one of CACHE_OUTCOMES, as returned by single_flight
+    """
+    key = f"uose:cache_stats:{kind}:{outcome}"
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # evicted between add and incr
+            cache.set(key, 1, None)
+
+
+def search_cache_stats() -> dict:
+    """
+    Returns the outcome counts of the search cache lookups of every web
+    worker, and the cache backend holding them.
+
+    Returns:
+        dict: {"generation": int, "backend": str, kind: {"hits",
+            "coalesced", "misses", "hit_rate"}}; coalesced searches count as
+            hits in the hit rate
+    """
+    stats = {
+        "generation": search_generation(),
+        "backend": settings.CACHES["default"]["BACKEND"],
+    }
+    for kind in CACHE_KINDS:
+        counts = {
+            outcome: cache.get(f"uose:cache_stats:{kind}:{outcome}", 0)
+            for outcome in CACHE_OUTCOMES
+        }
+        lookups = sum(counts.values())
+        counts["hit_rate"] = (
+            round((lookups - counts["misses"]) / lookups, 4) if lookups else None
+        )
+        stats[kind] = counts
+    return stats
+
+
+def _position_after(hits: list, after) -> int:
+    rank, page_id = after
+    for i, (hit_id, hit_rank) in enumerate(hits):
+        if hit_rank < rank or (hit_rank == rank and hit_id < page_id):
+            return i
+    return len(hits)
+
+
+def cached_search(
+    documents, kw_list: list, fingerprint: str, after=None, limit=RESULTS_PER_PAGE
+):
+    """
+    Returns one page of search results like ranked_search, from the cached
+    hits of the search when it ran within SEARCH_CACHE_SECONDS in the current
+    generation, with the configured search backend. Hits are computed in a search slot, once for identical
+    searches running at the same time, and the near-duplicates of a page
+    among them are collapsed into it; pages past the cached hits are not
+    collapsed.
+
+    Args:
+        documents (QuerySet): EntityDocument queryset of the documents to search
+        kw_list (list): keywords to search for
+        fingerprint (str): search_fingerprint of the search
+        after (tuple, optional): (rank, page_id) cursor of the previous page
+        limit (int, optional): number of results per page
+
+    Returns:
+        Tuple[list, int, str]: results, with the number of "duplicates"
+            collapsed into each, total number of matching pages without the
+            collapsed duplicates and the cursor of the next page (None on
+            the last page)
+
+    Raises:
+        SearchBusy: if no search slot freed up in time
+        SearchTimeout: if the search ran longer than its statement_timeout
+    """
+    backend = get_search_backend()
+
+    def compute():
+        with search_slot():
+            hits, total = backend.ranked_hits(documents, kw_list, SEARCH_CACHE_MAX_HITS)
+            kept, duplicates = collapse_duplicate_hits(hits)
+        return {
+            "hits": kept,
+            "total": total - sum(duplicates.values()),
+            "duplicates": duplicates,
+        }
+
+    cached, outcome = single_flight(
+        search_cache_key("results", f"{backend.name}:{fingerprint}"),
+        compute,
+        SEARCH_CACHE_SECONDS,
+    )
+    record_cache_lookup("results", outcome)
+
+    hits = cached["hits"]
+    start = 0 if after is None else _position_after(hits, after)
+    if start == len(hits) and cached["total"] > len(hits):
+        # past the cached hits, e.g. a deep page of a very broad search
+        with search_slot():
+            return backend.ranked_search(documents, kw_list, after=after, limit=limit)
+
+    page_hits = hits[start : start + limit]
+    next_cursor = None
+    if len(page_hits) > 0 and start + len(page_hits) < cached["total"]:
+        page_id, rank = page_hits[-1]
+        next_cursor = encode_cursor(rank, page_id)
+    results = backend.hit_results(page_hits, kw_list)
+    for result in results:
+        result["duplicates"] = cached["duplicates"].get(result["id"], 0)
+    return results, cached["total"], next_cursor
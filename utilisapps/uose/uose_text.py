@@ -0,0 +1,82 @@
+"""
+UOSE Text:
+This script contains the text normalization applied to the page text extracted
+from the RDS documents of the UOSE application in the UtilisWeb project.
+
+Version History:
+- 1.0.0 (2026-10-18): Initial version of the text normalization.
+
+Change Log:
+- 2026-10-18: Moved the newline repair out of rds_migration into a single
+  precompiled re.sub pass.
+"""
+
+import re
+
+# line breaks next to these references are kept, e.g. "Exhibit\nA.1."
+NEWLINE_BYPASS_WORDS = [
+    "Appendix",
+    "appendix",
+    "reference",
+    "Reference",
+    "Ref",
+    "ref",
+    "Ref.",
+    "ref.",
+    "Exhibit",
+    "exhibit",
+    "Exhibits",
+    "exhibits",
+]
+
+# text before a line break, the line break, and the next line up to the end of
+# its first sentence. When no sentence ends on the next line, no later start
+# on the same line can match either, so the second branch consumes the rest
+# of the line instead of retrying the match at every character.
+_NEWLINE_PATTERN = re.compile(r"(.+?)([\n\r]+)(.+?[.?!]+)|[^\n]+")
+
+_BYPASS_PATTERN = re.compile(
+    "|".join(
+        re.escape(word) for word in sorted(NEWLINE_BYPASS_WORDS, key=len, reverse=True)
+    )
+)
+
+
+def _join_broken_line(match: re.Match) -> str:
+    before, line_break, after = match.groups()
+    if (
+        before is None
+        or before == " "
+        or _BYPASS_PATTERN.search(before)
+        or _BYPASS_PATTERN.search(after)
+    ):
+        return match.group(0)
+    return before + after
+
+
+def repair_newlines(text: str) -> str:
+    """
+    Joins sentences broken over several lines by the pdf text extraction,
+    unless the break sits next to an appendix, reference or exhibit.
+
+    Args:
+        text (str): page text
+
+    Returns:
+        str: page text with the broken sentences joined
+    """
+    return _NEWLINE_PATTERN.sub(_join_broken_line, text)
+
+
+def normalize_page_text(text: str) -> str:
+    """
+    Normalizes extracted page text before it is stored: removes null bytes,
+    which Postgres text columns reject, and repairs broken lines.
+
+    Args:
+        text (str): extracted page text
+
+    Returns:
+        str: normalized page text
+    """
+    return repair_newlines(text.replace("\x00", ""))
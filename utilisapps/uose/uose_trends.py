@@ -0,0 +1,194 @@
+"""
+UOSE Trends:
+This script contains the keyword trend analytics of the UOSE application in
+the UtilisWeb project: the number of pages and documents matching a term per
+month, quarter or year of their issued date, overall or by entity or docket.
+The buckets are counted with a single grouped query over the indexed search
+vectors and cached per term, in the current search generation.
+
+Version History:
+- 1.0.0 (2026-10-18): Initial version of the keyword trends.
+
+Change Log:
+- 2026-10-18: Created the uose_trends.py file.
+- 2026-10-18: Counted the matching pages for every searched document filed
+  under their url.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.db import connection
+
+from .models import EntityDocument
+from .uose_execution import search_slot, single_flight
+from .uose_search import (
+    build_search_query,
+    clean_keywords,
+    matching_pages,
+    search_fingerprint,
+)
+from .uose_search_cache import record_cache_lookup, search_cache_key
+
+# bucket name and its length in months
+TREND_BUCKETS = {"month": 1, "quarter": 3, "year": 12}
+
+# grouping name and the document column of its series; "all" is one series
+TREND_GROUPS = {"all": None, "entity": "d.entity_id", "docket": "d.case_number"}
+
+# series charted per grouping, by number of matching pages; the others are
+# summed into TREND_OTHER
+TREND_MAX_SERIES = 10
+TREND_OTHER = "Other"
+
+TREND_CACHE_SECONDS = getattr(settings, "UOSE_TREND_CACHE_SECONDS", 3600)
+
+_TREND_SQL = """
+    SELECT
+        date_trunc(%s, d.issued_by_entity_date)::date AS period,
+        {series} AS series,
+        COUNT(*) AS pages,
+        COUNT(DISTINCT d.id) AS documents
+    FROM ({matches}) AS m
+    JOIN uose_entitydocument AS d ON d.file_url = m.url
+    WHERE d.id IN ({documents})
+    GROUP BY 1, 2
+    ORDER BY 1, 2
+"""
+
+
+def _periods(first: datetime.date, last: datetime.date, months: int) -> list:
+    # every bucket from first to last, so empty buckets chart as zero
+    periods = []
+    period = first
+    while period <= last:
+        periods.append(period)
+        month = period.month - 1 + months
+        period = period.replace(year=period.year + month // 12, month=month % 12 + 1)
+    return periods
+
+
+def _compute_trend(documents, keywords: list, bucket: str, group_by: str) -> dict:
+    query = build_search_query(keywords)
+    matches_sql, params = (
+        matching_pages(documents, query).values("url").query.sql_with_params()
+    )
+    documents_sql, documents_params = documents.values("id").query.sql_with_params()
+    series_column = TREND_GROUPS[group_by] or "NULL::varchar"
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _TREND_SQL.format(
+                series=series_column, matches=matches_sql, documents=documents_sql
+            ),
+            [bucket] + list(params) + list(documents_params),
+        )
+        rows = cursor.fetchall()
+
+    trend = {
+        "bucket": bucket,
+        "group_by": group_by,
+        "periods": [],
+        "series": [],
+        "total_pages": sum(row[2] for row in rows),
+    }
+    if len(rows) == 0:
+        return trend
+
+    # largest series first, the others summed
+    totals = {}
+    for _, name, pages, _ in rows:
+        totals[name] = totals.get(name, 0) + pages
+    names = sorted(totals, key=lambda name: (-totals[name], name or ""))
+    kept = set(names[:TREND_MAX_SERIES])
+    if len(names) > TREND_MAX_SERIES:
+        names = names[:TREND_MAX_SERIES] + [TREND_OTHER]
+
+    periods = _periods(rows[0][0], rows[-1][0], TREND_BUCKETS[bucket])
+    position = {period: i for i, period in enumerate(periods)}
+    series = {
+        name: {
+            "name": name,
+            "pages": [0] * len(periods),
+            "documents": [0] * len(periods),
+        }
+        for name in names
+    }
+    for period, name, pages, docs in rows:
+        values = series[name if name in kept else TREND_OTHER]
+        values["pages"][position[period]] += pages
+        # documents of a period are distinct within a series
+        values["documents"][position[period]] += docs
+
+    if group_by == "all":
+        series[None]["name"] = "All"
+    trend["periods"] = [period.isoformat() for period in periods]
+    trend["series"] = [series[name] for name in names]
+    return trend
+
+
+def keyword_trend(
+    term: str,
+    bucket="month",
+    group_by="all",
+    entity_code=None,
+    date_from=None,
+    date_to=None,
+) -> dict:
+    """
+    Returns the number of pages and documents matching a term per period of
+    their issued date, from the cache when the same trend was computed within
+    TREND_CACHE_SECONDS in the current search generation.
+
+    Args:
+        term (str): keyword or keyword expression
+        bucket (str, optional): period length, one of TREND_BUCKETS
+        group_by (str, optional): series of the trend, one of TREND_GROUPS
+        entity_code (str, optional): entity whose documents are counted,
+            every entity when empty or "*"
+        date_from (str, optional): start of the issued date range
+        date_to (str, optional): end of the issued date range
+
+    Returns:
+        dict: {"term", "bucket", "group_by", "periods": [ISO dates],
+            "series": [{"name", "pages": [int], "documents": [int]}],
+            "total_pages"}; series values are in period order, the largest
+            series first
+
+    Raises:
+        ValueError: if the term is empty or the bucket or grouping is unknown
+        QuerySyntaxError: if the term expression is not valid
+        SearchBusy: if no search slot freed up in time
+        SearchTimeout: if the trend query ran longer than its statement_timeout
+    """
+    keywords = clean_keywords([term])
+    if len(keywords) == 0:
+        raise ValueError("A trend needs a keyword.")
+    if bucket not in TREND_BUCKETS:
+        raise ValueError(f"Unknown trend period: {bucket}")
+    if group_by not in TREND_GROUPS:
+        raise ValueError(f"Unknown trend grouping: {group_by}")
+
+    entity_code = (entity_code or "*").strip().upper()
+    documents = EntityDocument.objects.all()
+    if entity_code != "*":
+        documents = documents.filter(entity=entity_code)
+    if date_from:
+        documents = documents.filter(issued_by_entity_date__gte=date_from)
+    if date_to:
+        documents = documents.filter(issued_by_entity_date__lte=date_to)
+    # parse the expression before looking up the cache
+    build_search_query(keywords)
+
+    def compute():
+        with search_slot():
+            return _compute_trend(documents, keywords, bucket, group_by)
+
+    fingerprint = search_fingerprint(entity_code, keywords, date_from, date_to)
+    trend, outcome = single_flight(
+        search_cache_key("trends", f"{bucket}:{group_by}:{fingerprint}"),
+        compute,
+        TREND_CACHE_SECONDS,
+    )
+    record_cache_lookup("trends", outcome)
+    return {"term": keywords[0], **trend}
@@ -1,6 +1,7 @@
 from django.urls import path
 
 from . import views
+from .dash_apps import dash_keyword_trends
 
 # app_name = "uose"
 
@@ -21,6 +22,40 @@ urlpatterns = [
     ),
     # path("search-engine", views.search_engine, name="search_engine"),
     path("search-engine/", views.search_engine, name="search_engine"),
+    path(
+        "search-engine/page/<int:page_id>",
+        views.search_page_text,
+        name="search_page_text",
+    ),
+    path("search-engine/lookup/dockets", views.docket_lookup, name="docket_lookup"),
+    path(
+        "search-engine/lookup/document-types",
+        views.document_type_lookup,
+        name="document_type_lookup",
+    ),
+    path(
+        "search-engine/saved/<int:search_id>/delete",
+        views.delete_saved_search,
+        name="delete_saved_search",
+    ),
+    path(
+        "search-engine/cache-stats",
+        views.search_cache_status,
+        name="search_cache_status",
+    ),
+    path("search-engine/trends/", views.keyword_trends, name="keyword_trends"),
+    path(
+        "search-engine/trends/data",
+        views.keyword_trend_data,
+        name="keyword_trend_data",
+    ),
+    path("quick-search/", views.quick_search_lookup, name="quick_search"),
+    path("exports/<int:job_id>", views.export_job_status, name="export_job_status"),
+    path(
+        "exports/<int:job_id>/download",
+        views.export_job_download,
+        name="export_job_download",
+    ),
     path("login/", views.login_user, name="login"),
     path("logout/", views.logout_user, name="logout"),
 ]
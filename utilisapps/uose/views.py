@@ -10,14 +10,16 @@ Change Log:
 
 """
 
-from django.http import HttpResponse
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import redirect
 from django.shortcuts import render, get_object_or_404
 from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
-from django.contrib.postgres.search import SearchQuery
+from django.urls import reverse
+from django.utils.http import urlencode
 
 import json
 
@@ -34,8 +36,35 @@ from .models import (
     UserInbox,
     Client,
     ClientEntityDocument,
+    ExportJob,
+    SavedSearch,
 )
-from .uose_helpers import generate_excel_report, generate_excel_search_results
+from .uose_helpers import (
+    document_report_rows,
+    export_response,
+    report_filename,
+)
+from .uose_exports import (
+    EXPORT_SYNC_MAX_ROWS,
+    export_file_path,
+    queue_export,
+)
+from .uose_execution import SearchBusy, SearchTimeout
+from .uose_citations import document_cited_by, document_cites
+from .uose_document_index import document_search
+from .uose_facets import search_facets
+from .uose_query import QuerySyntaxError
+from .uose_related import document_related
+from .uose_lookups import (
+    docket_suggestions,
+    document_type_suggestions,
+    fuzzy_dockets,
+    quick_search,
+)
+from .uose_search import decode_cursor, search_fingerprint
+from .uose_search_cache import cached_search, search_cache_stats
+from .uose_trends import keyword_trend
+from .uose_watches import create_saved_search
 
 import pandas as pd
 from pathlib import Path
@@ -92,6 +121,43 @@ def logout_user(request):
     return redirect("login")
 
 
+def _queue_large_export(request, report_type: str, parameters: dict) -> bool:
+    """
+    Queues a document report for the export worker when it has more rows
+    than can be streamed within the request.
+
+    Args:
+        request (django.http.request): request object
+        report_type (str): report type of the export job
+        parameters (dict): arguments of the report row generator
+
+    Returns:
+        bool: True if the export was queued
+    """
+    if parameters["entity_code"] is not None:
+        documents = EntityDocument.objects.filter(entity=parameters["entity_code"])
+    else:
+        documents = EntityDocument.objects.filter(case_number=parameters["docket"])
+    row_count = documents.filter(
+        issued_by_entity_date__gte=parameters["date_from"],
+        issued_by_entity_date__lte=parameters["date_to"],
+    ).count()
+    if row_count <= EXPORT_SYNC_MAX_ROWS:
+        return False
+
+    job = queue_export(
+        request.user,
+        report_type,
+        "csv" if "csv_download" in request.POST else "xlsx",
+        parameters,
+    )
+    messages.success(
+        request,
+        f"Export {job.id} of {row_count} documents queued. A download link will be sent to your inbox when it is ready.",
+    )
+    return True
+
+
 @login_required
 def index(request):
     """indexview:  This is the index view for the UOSE application.
@@ -147,15 +213,31 @@ def document_viewer(request):
 
     page = request.GET.get("page")
 
-    if request.method == "POST" and "excel_download" in request.POST:
-        rc, file = generate_excel_report(entity_code, None, date_from, date_to)
-        if rc == 0:
-            with open(file, "rb") as f:
-                response = HttpResponse(f, content_type="application/vnd.ms-excel")
-                response["Content-Disposition"] = f"attachment; filename={file}"
-                return response
-        else:
-            messages.error(request, f"Error generating report: {file}")
+    if request.method == "POST" and (
+        "excel_download" in request.POST or "csv_download" in request.POST
+    ):
+        try:
+            headers, rows = document_report_rows(entity_code, None, date_from, date_to)
+            if _queue_large_export(
+                request,
+                "DOCS",
+                {
+                    "entity_code": entity_code,
+                    "docket": None,
+                    "date_from": date_from,
+                    "date_to": date_to,
+                },
+            ):
+                return redirect(request.get_full_path())
+            return export_response(
+                "csv" if "csv_download" in request.POST else "xlsx",
+                report_filename(),
+                headers,
+                rows,
+            )
+        except Exception as ex:
+            messages.error(request, f"Error generating report: {ex}")
+            return redirect(request.get_full_path())
 
     if request.method == "GET":
         # get query parameters
@@ -222,16 +304,32 @@ def docket_viewer(request):
 
     page = request.GET.get("page")
 
-    if request.method == "POST" and "excel_download" in request.POST:
-        # call to generate report, passing None for entity
-        rc, file = generate_excel_report(None, docket, date_from, date_to)
-        if rc == 0:
-            with open(file, "rb") as f:
-                response = HttpResponse(f, content_type="application/vnd.ms-excel")
-                response["Content-Disposition"] = f"attachment; filename={file}"
-                return response
-        else:
-            messages.error(request, f"Error generating report: {file}")
+    if request.method == "POST" and (
+        "excel_download" in request.POST or "csv_download" in request.POST
+    ):
+        try:
+            # generate report, passing None for entity
+            headers, rows = document_report_rows(None, docket, date_from, date_to)
+            if _queue_large_export(
+                request,
+                "DOCS",
+                {
+                    "entity_code": None,
+                    "docket": docket,
+                    "date_from": date_from,
+                    "date_to": date_to,
+                },
+            ):
+                return redirect(request.get_full_path())
+            return export_response(
+                "csv" if "csv_download" in request.POST else "xlsx",
+                report_filename(),
+                headers,
+                rows,
+            )
+        except Exception as ex:
+            messages.error(request, f"Error generating report: {ex}")
+            return redirect(request.get_full_path())
 
     if request.method == "GET":
         # get query parameters
@@ -265,6 +363,16 @@ def docket_viewer(request):
                 ctx["documents"] = records
             else:
                 ctx["documents"] = []
+                # suggest the closest dockets when the docket does not exist
+                ctx["docket_suggestions"] = [
+                    {
+                        "case_number": match["case_number"],
+                        "document_count": match["document_count"],
+                        "url": _docket_url(match["case_number"], date_from, date_to),
+                    }
+                    for match in fuzzy_dockets(docket)
+                    if match["case_number"] != docket
+                ]
 
     return render(request, "uose/docket-viewer.html", ctx)
 
@@ -301,6 +409,13 @@ def document_detail(request, doc_id):
             .order_by("-issued_by_entity_date")
             .all()
         )
+        # dockets cited by the document, and documents citing its docket
+        cites = document_cites(record)
+        for citation in cites:
+            citation["url"] = _docket_url(citation["cited_case_number"])
+        cited_by = document_cited_by(record)
+        # similar filings of other dockets, precomputed by rds_related_documents
+        similar_docs = document_related(record)
         document_notes = UserNotesEntityDocuments.objects.filter(
             document_id=doc_id
         ).all()
@@ -312,7 +427,11 @@ def document_detail(request, doc_id):
         # TODO: get meta data
         meta = None
         # get text data from text db model
-        text_model = RDSTextModel.objects.filter(url=record.file_url).all()
+        text_model = (
+            RDSTextModel.objects.filter(url=record.file_url)
+            .select_related("content")
+            .all()
+        )
         # load to list if text model has data
         if len(text_model) > 0:
             pages = [page.page_text for page in text_model]
@@ -386,6 +505,9 @@ def document_detail(request, doc_id):
                 "is_favorite": is_favorite,
                 "record": record,
                 "related_docs": related_docs,
+                "similar_docs": similar_docs,
+                "cites": cites,
+                "cited_by": cited_by,
                 "document_notes": document_notes,
                 "status": None,
                 "meta": meta,
@@ -406,6 +528,9 @@ def document_detail(request, doc_id):
                 "is_favorite": False,
                 "record": None,
                 "related_docs": None,
+                "similar_docs": None,
+                "cites": None,
+                "cited_by": None,
                 "document_notes": None,
                 "status": None,
                 "meta": None,
@@ -429,24 +554,36 @@ def search_engine(request):
     """
 
     entities = Entity.objects.all().filter(entity_type_id="REG").only("entity")
-    dockets = [
-        docket["case_number"]
-        for docket in EntityDocument.objects.values("case_number")
-        .order_by("-case_number")
-        .distinct()
-    ]
-    document_types = [
-        doc_type["document_type"]
-        for doc_type in EntityDocument.objects.values("document_type").distinct()
-    ]
 
+    # dockets and document types are loaded by the pickers from the
+    # typeahead endpoints
     ctx = {
         "entities": entities,
-        "dockets": dockets,
-        "document_types": document_types,
     }
 
-    if request.method == "POST" and "excel_download" in request.POST:
+    if request.method == "POST" and "watch_search" in request.POST:
+        try:
+            entity_code = request.GET.get("entity").split("|")[0].strip()
+        except:
+            entity_code = "*"
+
+        try:
+            saved = create_saved_search(
+                request.user,
+                request.GET.get("kw_list", "").split("|"),
+                [] if entity_code == "*" else [entity_code],
+            )
+            messages.success(
+                request,
+                f'Saved search "{saved.name}" created. New matching documents will be sent to your inbox.',
+            )
+        except Exception as ex:
+            messages.error(request, f"Error saving search: {ex}")
+        return redirect(request.get_full_path())
+
+    if request.method == "POST" and (
+        "excel_download" in request.POST or "csv_download" in request.POST
+    ):
         try:
             entity_code = request.GET.get("entity").split("|")[0].strip()
         except:
@@ -457,16 +594,27 @@ def search_engine(request):
         # docket_list = request.GET.get("dockets")
         # document_list = request.GET.get("document_types")
         kw_list = request.GET.get("kw_list").split("|")
-        rc, file = generate_excel_search_results(
-            entity_code, kw_list, date_from, date_to
-        )
-        if rc == 0:
-            with open(file, "rb") as f:
-                response = HttpResponse(f, content_type="application/vnd.ms-excel")
-                response["Content-Disposition"] = f"attachment; filename={file}"
-                return response
-        else:
-            messages.error(request, f"Error generating report: {file}")
+        try:
+            # keyword reports scan page text, always generate them in the background
+            job = queue_export(
+                request.user,
+                "SRCH",
+                "csv" if "csv_download" in request.POST else "xlsx",
+                {
+                    "entity_code": entity_code,
+                    "kw_list": kw_list,
+                    "date_from": date_from,
+                    "date_to": date_to,
+                },
+            )
+            messages.success(
+                request,
+                f"Export {job.id} queued. A download link will be sent to your inbox when it is ready.",
+            )
+            return redirect(request.get_full_path())
+        except Exception as ex:
+            messages.error(request, f"Error generating report: {ex}")
+            return redirect(request.get_full_path())
 
     if "kw_search_documents" in request.GET:
         try:
@@ -482,52 +630,411 @@ def search_engine(request):
         # document_list = request.GET.get("document_types")
         kw_list = request.GET.get("kw_list").split("|")
 
-        # get list of documents
-        document_urls = (
-            EntityDocument.objects.filter(
-                entity=entity_code,
-                issued_by_entity_date__gte=date_from,
-                issued_by_entity_date__lte=date_to,
-                # case_number__in=docket_list,
-                # document_type__in=document_list,
-            )
-            .only("file_url")
-            .values_list("file_url", flat=True)
+        # documents in scope, searched as a subquery
+        documents = EntityDocument.objects.filter(
+            entity=entity_code,
+            issued_by_entity_date__gte=date_from,
+            issued_by_entity_date__lte=date_to,
+            # case_number__in=docket_list,
+            # document_type__in=document_list,
         )
-        search_results = []
-
-        for kw in kw_list:
-            # search each document for the keyword
-            if kw != "":
-                search_engine_results = RDSTextModel.objects.filter(
-                    url__in=list(document_urls),
-                    page_text__search=SearchQuery(kw, search_type="phrase"),
-                ).all()
-                if search_engine_results is not None:
-                    # print(search_engine_results)
-                    search_results.extend(list(search_engine_results.values()))
-
-        ctx["search_results"] = []
-        ctx["search_count"] = len(search_results)
-        if len(search_results) > 0:
-            for result in search_results:
-                for kw in kw_list:
-                    if kw != "":
-                        ctx["search_results"].append(
-                            [
-                                result["url"],
-                                result["page_number"],
-                                kw,
-                                result["page_text"].lower().count(kw.lower()),
-                                result["page_text"],
-                            ]
-                        )
+        # same entity, dates and keywords share cached hits and facets
+        fingerprint = search_fingerprint(entity_code, kw_list, date_from, date_to)
+
+        pages_query = request.GET.copy()
+        pages_query.pop("view", None)
+        pages_query.pop("after", None)
+        if request.GET.get("view") == "documents":
+            # best documents first, ranked on the document search index
+            try:
+                ctx["top_documents"] = document_search(documents, kw_list, fingerprint)
+            except (SearchBusy, SearchTimeout, QuerySyntaxError) as ex:
+                messages.error(request, str(ex))
+                return render(request, "uose/search-engine.html", ctx)
+            ctx["pages_query"] = pages_query.urlencode()
+            return render(request, "uose/search-engine-documents.html", ctx)
+
+        documents_query = pages_query.copy()
+        documents_query["view"] = "documents"
+        ctx["documents_query"] = documents_query.urlencode()
+        ctx["trends_query"] = urlencode(
+            {
+                "term": (kw_list[0] if kw_list else "").strip(),
+                "entity": entity_code,
+                "issued_date_from": date_from or "",
+                "issued_date_to": date_to or "",
+            }
+        )
+
+        # one page of ranked results, keyset paginated on the "after" cursor
+        after = decode_cursor(request.GET.get("after"))
+        try:
+            search_results, search_count, next_cursor = cached_search(
+                documents, kw_list, fingerprint, after=after
+            )
+            # hit counts by entity, docket, document type and year
+            ctx["facets"] = search_facets(documents, kw_list, fingerprint)
+        except (SearchBusy, SearchTimeout, QuerySyntaxError) as ex:
+            messages.error(request, str(ex))
+            return render(request, "uose/search-engine.html", ctx)
+
+        ctx["search_results"] = search_results
+        ctx["search_count"] = search_count
+        if next_cursor is not None:
+            next_query = request.GET.copy()
+            next_query["after"] = next_cursor
+            ctx["next_page_query"] = next_query.urlencode()
+        if after is not None:
+            first_query = request.GET.copy()
+            first_query.pop("after")
+            ctx["first_page_query"] = first_query.urlencode()
 
         return render(request, "uose/search-engine-results.html", ctx)
 
     return render(request, "uose/search-engine.html", ctx)
 
 
+@login_required
+def search_page_text(request, page_id):
+    """
+    View function that returns the full text of a search result page, loaded
+    on demand from the search results.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        page_id (int): The ID of the RDS text page.
+
+    Returns:
+        HttpResponse: JSON response with the page url, number and text.
+
+    Raises:
+        Http404: If the page with the specified ID does not exist.
+
+    """
+    page = get_object_or_404(RDSTextModel.objects.select_related("content"), id=page_id)
+
+    return HttpResponse(
+        json.dumps(
+            {
+                "id": page.id,
+                "url": page.url,
+                "document_id": page.document_id,
+                "page_number": page.page_number,
+                "page_text": page.page_text,
+            }
+        ),
+        content_type="application/json",
+    )
+
+
+def _typeahead_response(values: list) -> HttpResponse:
+    # Semantic UI dropdown remote API format
+    return HttpResponse(
+        json.dumps(
+            {
+                "success": True,
+                "results": [{"name": value, "value": value} for value in values],
+            }
+        ),
+        content_type="application/json",
+    )
+
+
+@login_required
+def docket_lookup(request):
+    """
+    View function that returns the dockets matching the text typed in the
+    docket picker of the search form.
+
+    Args:
+        request (HttpRequest): The HTTP request object, with the typed text
+            in the "q" parameter.
+
+    Returns:
+        HttpResponse: JSON response with the matching dockets.
+    """
+    return _typeahead_response(docket_suggestions(request.GET.get("q")))
+
+
+@login_required
+def document_type_lookup(request):
+    """
+    View function that returns the document types matching the text typed in
+    the document type picker of the search form.
+
+    Args:
+        request (HttpRequest): The HTTP request object, with the typed text
+            in the "q" parameter.
+
+    Returns:
+        HttpResponse: JSON response with the matching document types.
+    """
+    return _typeahead_response(document_type_suggestions(request.GET.get("q")))
+
+
+def _docket_url(case_number: str, date_from=None, date_to=None) -> str:
+    return f"{reverse('docket_viewer')}?" + urlencode(
+        {
+            "uose_docket": case_number,
+            "issued_date_from": date_from or "1900-01-01",
+            "issued_date_to": date_to or datetime.now().strftime("%Y-%m-%d"),
+        }
+    )
+
+
+def _entity_url(entity_code: str) -> str:
+    return f"{reverse('document_viewer')}?" + urlencode(
+        {
+            "entity": entity_code,
+            "issued_date_from": "1900-01-01",
+            "issued_date_to": datetime.now().strftime("%Y-%m-%d"),
+        }
+    )
+
+
+@login_required
+def quick_search_lookup(request):
+    """
+    View function that returns the dockets, documents and entities closest to
+    the text typed in the quick search box of the navigation bar, tolerating
+    misspellings.
+
+    Args:
+        request (HttpRequest): The HTTP request object, with the typed text
+            in the "q" parameter.
+
+    Returns:
+        HttpResponse: JSON response in the Semantic UI category search
+            format.
+    """
+    matches = quick_search(request.GET.get("q"))
+    categories = {
+        "dockets": {
+            "name": "Dockets",
+            "results": [
+                {
+                    "title": match["case_number"],
+                    "description": f"{match['document_count']} documents",
+                    "url": _docket_url(match["case_number"]),
+                }
+                for match in matches["dockets"]
+            ],
+        },
+        "documents": {
+            "name": "Documents",
+            "results": [
+                {
+                    "title": match["filename_description"],
+                    "description": f"{match['case_number']} - {match['issued_by_entity_date']}",
+                    "url": reverse("document_detail", args=[match["id"]]),
+                }
+                for match in matches["documents"]
+            ],
+        },
+        "entities": {
+            "name": "Entities",
+            "results": [
+                {
+                    "title": match["entity_name"],
+                    "description": match["entity"],
+                    "url": _entity_url(match["entity"]),
+                }
+                for match in matches["entities"]
+            ],
+        },
+    }
+    return HttpResponse(
+        json.dumps(
+            {
+                "success": True,
+                "results": {
+                    key: category
+                    for key, category in categories.items()
+                    if len(category["results"]) > 0
+                },
+            }
+        ),
+        content_type="application/json",
+    )
+
+
+@login_required
+def delete_saved_search(request, search_id):
+    """
+    View function that deletes a saved search of the user.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        search_id (int): The ID of the saved search.
+
+    Returns:
+        HttpResponse: Redirect to the inbox.
+    """
+    if request.method == "POST":
+        saved = get_object_or_404(SavedSearch, id=search_id, user=request.user)
+        saved.delete()
+        messages.success(request, f'Saved search "{saved.name}" deleted.')
+    return redirect("user_inbox")
+
+
+@staff_member_required
+def search_cache_status(request):
+    """
+    View function that returns the hit and miss counts of the search result
+    and facet caches across every web worker, the cache backend holding them
+    and the current search generation.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: JSON response with the cache statistics.
+    """
+    return HttpResponse(
+        json.dumps(search_cache_stats()), content_type="application/json"
+    )
+
+
+@login_required
+def keyword_trends(request):
+    """
+    View function that renders the keyword trend chart, for the term of the
+    search it was opened from, if any.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: The rendered trend chart page.
+    """
+    entities = Entity.objects.filter(entity_type_id="REG").order_by("entity")
+    entity_code = (request.GET.get("entity") or "*").split("|")[0].strip()
+    initial_arguments = {
+        "trend_term": {"value": request.GET.get("term", "")},
+        "trend_entity": {
+            "options": [{"label": "All Entities", "value": "*"}]
+            + [
+                {
+                    "label": f"{entity.entity} - {entity.entity_name}",
+                    "value": entity.entity,
+                }
+                for entity in entities
+            ],
+            "value": entity_code,
+        },
+        "trend_dates": {
+            "start_date": request.GET.get("issued_date_from") or None,
+            "end_date": request.GET.get("issued_date_to") or None,
+        },
+    }
+    ctx = {"initial_arguments": json.dumps(initial_arguments)}
+    return render(request, "uose/keyword-trends.html", ctx)
+
+
+@login_required
+def keyword_trend_data(request):
+    """
+    View function that returns the number of pages and documents matching a
+    term per month, quarter or year, overall or by entity or docket.
+
+    Args:
+        request (HttpRequest): The HTTP request object, with the term, and
+            optionally the bucket, group_by, entity, issued_date_from and
+            issued_date_to query parameters.
+
+    Returns:
+        HttpResponse: JSON response with the trend, or the error message with
+            status 400, or 503 when the search service is busy.
+    """
+    try:
+        trend = keyword_trend(
+            request.GET.get("term", ""),
+            bucket=request.GET.get("bucket", "month"),
+            group_by=request.GET.get("group_by", "all"),
+            entity_code=request.GET.get("entity"),
+            date_from=request.GET.get("issued_date_from") or None,
+            date_to=request.GET.get("issued_date_to") or None,
+        )
+    except ValueError as ex:
+        # QuerySyntaxError is a ValueError
+        return HttpResponse(
+            json.dumps({"success": False, "message": str(ex)}),
+            content_type="application/json",
+            status=400,
+        )
+    except (SearchBusy, SearchTimeout) as ex:
+        return HttpResponse(
+            json.dumps({"success": False, "message": str(ex)}),
+            content_type="application/json",
+            status=503,
+        )
+    return HttpResponse(
+        json.dumps({"success": True, **trend}), content_type="application/json"
+    )
+
+
+@login_required
+def export_job_status(request, job_id):
+    """
+    View function that returns the progress of one of the user's export jobs,
+    polled by the inbox while the export is running.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        job_id (int): The ID of the export job.
+
+    Returns:
+        HttpResponse: JSON response with the job status and progress.
+
+    Raises:
+        Http404: If the job does not exist or belongs to another user.
+
+    """
+    job = get_object_or_404(ExportJob, id=job_id, user=request.user)
+
+    return HttpResponse(
+        json.dumps(
+            {
+                "id": job.id,
+                "status": job.status,
+                "status_description": job.get_status_display(),
+                "rows_written": job.rows_written,
+                "download_url": (
+                    reverse("export_job_download", args=[job.id])
+                    if job.status == "DONE"
+                    else None
+                ),
+            }
+        ),
+        content_type="application/json",
+    )
+
+
+@login_required
+def export_job_download(request, job_id):
+    """
+    View function that downloads the report generated by an export job.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        job_id (int): The ID of the export job.
+
+    Returns:
+        FileResponse: The generated report.
+
+    Raises:
+        Http404: If the job is not completed, has expired or belongs to
+            another user.
+
+    """
+    job = get_object_or_404(ExportJob, id=job_id, user=request.user, status="DONE")
+    path = export_file_path(job)
+    if not path.exists():
+        raise Http404(f"Export {job_id} has expired")
+
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=job.file_name)
+
+
 @login_required
 def mark_document_as_favorite(request, doc_id):
     """
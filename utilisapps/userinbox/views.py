@@ -11,6 +11,8 @@ from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib.auth import update_session_auth_hash
 
 from uose.models import (
+    ExportJob,
+    SavedSearch,
     UserEntityDocuments,
     UserInbox,
     Client,
@@ -44,6 +46,11 @@ def inbox(request):
     ]
 
     client_groups = Client.objects.all()
+    # recent exports, newest first
+    export_jobs = ExportJob.objects.filter(user=request.user).order_by("-id")
+    export_jobs = export_jobs[:20]
+    # standing keyword watches
+    saved_searches = SavedSearch.objects.filter(user=request.user).order_by("-id")
 
     if "get_client_docs" in request.GET:
         selected_client = request.GET.get("selected_client_group")
@@ -63,6 +70,7 @@ def inbox(request):
                 ).all()
             ]
         else:
+            selected_client = None
             client_group_documents = []
 
     return render(
@@ -74,6 +82,8 @@ def inbox(request):
             "client_groups": client_groups,
             "selected_client_group": selected_client,
             "client_group_documents": client_group_documents,
+            "export_jobs": export_jobs,
+            "saved_searches": saved_searches,
         },
     )
 
@@ -122,6 +122,22 @@ DATABASES = {
     } """
 
 
+# Cache shared by every web worker and management command: the search cache,
+# the coalescing of identical searches and the search cache counters of the
+# UOSE application are only site-wide with a shared backend, and the uose
+# checks reject a per-process one. The table is created by the uose
+# migrations, or with `python manage.py createcachetable`.
+# https://docs.djangoproject.com/en/4.2/topics/cache/#database-caching
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "utilis_cache",
+        "OPTIONS": {"MAX_ENTRIES": 20000},
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 